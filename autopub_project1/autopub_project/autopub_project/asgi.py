@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "autopub_project.settings")
 
 application = get_asgi_application()
+
+# Spawn the image processing workers now rather than on the first publish.
+from autopublish.imaging import start_pool  # noqa: E402
+
+start_pool()
@@ -96,6 +96,18 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # The web process, job workers, campaign pool and social dispatcher all write
+        # concurrently. Deferred transactions that read then write fail at once with
+        # "database is locked" when another connection holds the write lock; take it
+        # up front with BEGIN IMMEDIATE and wait for it instead.
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "30")),
+        },
+        # Worker pools write from several threads in the tests as well. Django's default
+        # in-memory test database shares one cache between connections, whose table
+        # locks fail at once ("database table is locked") rather than wait; use a file.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -159,3 +171,20 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     )
 }
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "autopublish": {
+            "handlers": ["console"],
+            "level": os.getenv("LOG_LEVEL", "INFO"),
+        },
+    },
+}
@@ -1,3 +1,82 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import (
+    CacheEntry,
+    CacheStat,
+    Campaign,
+    CampaignItem,
+    GeneratedDraft,
+    GenerationJob,
+    InflightCall,
+    RateLimitBucket,
+    TraceSpan,
+)
+from .tracing import TRACE_STATS_WINDOW, span_stats
+
+
+@admin.register(CacheStat)
+class CacheStatAdmin(admin.ModelAdmin):
+    list_display = ("name", "hits", "misses", "hit_rate")
+
+
+@admin.register(CacheEntry)
+class CacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("namespace", "key", "hits", "stored_at", "accessed_at")
+    list_filter = ("namespace",)
+
+
+@admin.register(RateLimitBucket)
+class RateLimitBucketAdmin(admin.ModelAdmin):
+    list_display = ("name", "rate", "burst", "granted", "waited_ms", "rejected", "throttled")
+    readonly_fields = ("tat",)
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ("keyword", "user", "status", "progress", "provider", "provider_latency_ms", "hedged", "created_at")
+    list_filter = ("status", "provider", "hedged")
+    search_fields = ("keyword", "trace_id")
+
+
+@admin.register(InflightCall)
+class InflightCallAdmin(admin.ModelAdmin):
+    list_display = ("key", "status", "owner", "started_at", "expires_at")
+    list_filter = ("status",)
+    exclude = ("result",)
+
+
+@admin.register(GeneratedDraft)
+class GeneratedDraftAdmin(admin.ModelAdmin):
+    list_display = ("keyword", "user", "created_at", "expires_at")
+    exclude = ("content",)
+
+
+class CampaignItemInline(admin.TabularInline):
+    model = CampaignItem
+    fields = ("keyword", "status", "published_post", "error")
+    readonly_fields = fields
+    extra = 0
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "user", "status", "parallelism", "publish", "created_at")
+    list_filter = ("status",)
+    inlines = [CampaignItemInline]
+
+
+@admin.register(TraceSpan)
+class TraceSpanAdmin(admin.ModelAdmin):
+    list_display = ("kind", "label", "name", "offset_ms", "duration_ms", "ok", "trace_id", "created_at")
+    list_filter = ("kind", "name", "ok")
+    search_fields = ("trace_id", "label")
+    change_list_template = "admin/autopublish/tracespan/change_list.html"
+
+    def changelist_view(self, request, extra_context=None):
+        kind = request.GET.get("kind") or None
+        extra_context = {
+            **(extra_context or {}),
+            "span_stats": span_stats(kind=kind),
+            "stats_window_days": TRACE_STATS_WINDOW // 86400,
+        }
+        return super().changelist_view(request, extra_context=extra_context)
@@ -1,16 +1,24 @@
 # autopublish/api_urls.py
 
 from django.urls import path
-from . import api_views
-
-urlpatterns = [
-    path("posts/", api_views.api_list_published_posts, name="api_list_published_posts"),
-]
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from . import api_views
+
 urlpatterns = [
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
-]
 
-path("social/generate/", api_views.api_generate_social_post, name="api_generate_social_post"),
+    path("posts/", api_views.api_list_published_posts, name="api_list_published_posts"),
+    path("social/generate/", api_views.api_generate_social_post, name="api_generate_social_post"),
+    path("social/generate/bulk/", api_views.api_generate_social_posts_bulk, name="api_generate_social_posts_bulk"),
+
+    path("campaigns/", api_views.api_campaigns, name="api_campaigns"),
+    path("campaigns/<int:campaign_id>/", api_views.api_campaign_detail, name="api_campaign_detail"),
+
+    path("drafts/<uuid:draft_id>/", api_views.api_draft_detail, name="api_draft_detail"),
+
+    path("cache/stats/", api_views.api_cache_stats, name="api_cache_stats"),
+    path("http/stats/", api_views.api_http_stats, name="api_http_stats"),
+    path("metrics/", api_views.api_metrics, name="api_metrics"),
+]
@@ -1,18 +1,100 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import parse_etags
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
-from .models import PublishedPost, SocialPost
-from .serializers import PublishedPostSerializer
-from .social_generator import generate_social_caption
+from .cache import cache_stats
+from .campaigns import CAMPAIGN_MAX_KEYWORDS, campaign_progress, create_campaign, parse_keywords
+from .http_client import http_stats
+from .drafts import get_draft
+from .generator import router
+from .models import Campaign, PublishedPost, SocialPost, day_bounds
+from .pagination import keyset_page
+from .ratelimit import rate_limit_stats
+from .rendering import render_stats
+from .serializers import CampaignItemSerializer, CampaignSerializer, PublishedPostSerializer
+from .social_generator import article_context, generate_social_caption, generate_social_captions
+from .tracing import span_stats
+
+
+POSTS_PAGE_SIZE = 50
+POSTS_MAX_PAGE_SIZE = 200
+
+
+def _parse_bound(value, end=False):
+    """Datetime from an ISO datetime or date (a date means its start, or its end with end=True)."""
+    day = parse_date(value)
+    if day is not None:
+        start, stop = day_bounds(day)
+        return stop if end else start
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(value)
+    return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def api_list_published_posts(request):
-    posts = PublishedPost.objects.filter(user=request.user).order_by("-created_at")
-    serializer = PublishedPostSerializer(posts, many=True)
-    return Response(serializer.data)
+    """
+    Newest-first published posts, one page at a time.
+
+    Query parameters: cursor (from next_cursor), limit, fields (comma
+    separated), keyword, since / until (ISO date or datetime).
+    Returns {"results": [...], "next_cursor"}. Responses carry an ETag; send
+    it back as If-None-Match to get a 304 when nothing matching the query
+    has changed.
+    """
+    params = request.query_params
+    posts = PublishedPost.objects.filter(user=request.user)
+
+    if params.get("keyword"):
+        posts = posts.filter(keyword=params["keyword"])
+    try:
+        if params.get("since"):
+            posts = posts.filter(created_at__gte=_parse_bound(params["since"]))
+        if params.get("until"):
+            posts = posts.filter(created_at__lt=_parse_bound(params["until"], end=True))
+        limit = min(max(int(params.get("limit", POSTS_PAGE_SIZE)), 1), POSTS_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({"error": "Invalid since, until or limit"}, status=400)
+
+    fields = [f for f in params.get("fields", "").split(",") if f]
+
+    # The count catches deletions, the newest updated_at catches additions and edits;
+    # both come from the (user, updated_at) index without touching the rows.
+    state = posts.aggregate(count=Count("id"), last_updated=Max("updated_at"))
+    etag_source = f"{state}|{request.get_full_path()}"
+    etag = '"%s"' % hashlib.sha1(etag_source.encode("utf-8")).hexdigest()
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = Response(status=304)
+        response["ETag"] = etag
+        return response
+
+    # Load only the columns the response needs (id and created_at always, for the cursor).
+    columns = [f for f in fields if f in PublishedPostSerializer.Meta.fields]
+    if columns:
+        posts = posts.only("id", "created_at", *columns)
+    else:
+        posts = posts.defer("body_markdown")
+
+    try:
+        page, next_cursor = keyset_page(posts, params.get("cursor"), limit)
+    except ValueError:
+        return Response({"error": "Invalid cursor"}, status=400)
+    serializer = PublishedPostSerializer(page, many=True, fields=fields)
+    response = Response({"results": serializer.data, "next_cursor": next_cursor})
+    response["ETag"] = etag
+    return response
 
 
 @api_view(["POST"])
@@ -23,7 +105,7 @@ def api_generate_social_post(request):
     platform = request.data.get("platform")
 
     try:
-        published_post = PublishedPost.objects.get(id=post_id, user=user)
+        published_post = PublishedPost.objects.defer("body_markdown").get(id=post_id, user=user)
     except PublishedPost.DoesNotExist:
         return Response({"error": "Post not found"}, status=404)
 
@@ -32,7 +114,7 @@ def api_generate_social_post(request):
         title=published_post.title,
         keyword=published_post.keyword,
         wp_link=published_post.wp_link,
-        article_text=published_post.title,  # replace with full text if stored
+        article_text=article_context(published_post),
     )
 
     sp = SocialPost.objects.create(
@@ -48,3 +130,202 @@ def api_generate_social_post(request):
         "social_post_id": sp.id,
         "caption": caption
     })
+
+
+SOCIAL_BULK_MAX_POSTS = int(os.getenv("SOCIAL_BULK_MAX_POSTS", "50"))
+SOCIAL_BULK_CONCURRENCY = int(os.getenv("SOCIAL_BULK_CONCURRENCY", "4"))
+
+
+def _int_ids(values):
+    """Integer IDs from a JSON list of numbers or digit strings, or None if any value is something else."""
+    ids = []
+    for value in values:
+        # bool is an int subclass, but true is not an ID.
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            return None
+        try:
+            ids.append(int(value))
+        except ValueError:
+            return None
+    return ids
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def api_generate_social_posts_bulk(request):
+    """
+    Captions for several platforms and posts: {"post_ids": [...], "platforms": [...]}.
+    One LLM request per post covers all platforms (posts run in parallel),
+    and every SocialPost row is inserted with a single bulk_create.
+    """
+    valid = [p for p, _ in SocialPost.PLATFORM_CHOICES]
+    platforms = request.data.get("platforms", valid)
+    if not isinstance(platforms, list) or not platforms or not all(isinstance(p, str) for p in platforms):
+        return Response({"error": "platforms must be a non-empty list of platform names"}, status=400)
+    unknown = [p for p in platforms if p not in valid]
+    if unknown:
+        return Response({"error": f"Unknown platforms: {', '.join(map(str, unknown))}"}, status=400)
+
+    post_ids = request.data.get("post_ids") or []
+    if not isinstance(post_ids, list) or not post_ids:
+        return Response({"error": "post_ids must be a non-empty list"}, status=400)
+    post_ids = _int_ids(post_ids)
+    if post_ids is None:
+        return Response({"error": "post_ids must be integers"}, status=400)
+    if len(post_ids) > SOCIAL_BULK_MAX_POSTS:
+        return Response({"error": f"At most {SOCIAL_BULK_MAX_POSTS} posts per request"}, status=400)
+
+    scheduled_for = None
+    if request.data.get("scheduled_for"):
+        try:
+            scheduled_for = _parse_bound(request.data["scheduled_for"])
+        except ValueError:
+            return Response({"error": "Invalid scheduled_for"}, status=400)
+
+    posts = list(PublishedPost.objects.filter(user=request.user, id__in=post_ids).defer("body_markdown"))
+    if not posts:
+        return Response({"error": "Post not found"}, status=404)
+
+    def captions_for(post):
+        try:
+            return generate_social_captions(
+                platforms,
+                title=post.title,
+                keyword=post.keyword,
+                wp_link=post.wp_link,
+                article_text=article_context(post),
+            )
+        finally:
+            # article_context and the generation cache use this pool thread's own DB connection.
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=min(SOCIAL_BULK_CONCURRENCY, len(posts))) as pool:
+        generated = list(pool.map(captions_for, posts))
+
+    rows, errors = [], []
+    for post, captions in zip(posts, generated):
+        for platform, caption in captions.items():
+            if caption.startswith("Error:"):
+                errors.append({"post_id": post.id, "platform": platform, "error": caption})
+                continue
+            rows.append(SocialPost(
+                user=request.user,
+                published_post=post,
+                platform=platform,
+                caption=caption,
+                scheduled_for=scheduled_for,
+                status="scheduled",
+            ))
+    created = SocialPost.objects.bulk_create(rows)
+
+    return Response({
+        "message": f"{len(created)} social posts generated",
+        "social_posts": [
+            {"id": sp.id, "post_id": sp.published_post_id, "platform": sp.platform, "caption": sp.caption}
+            for sp in created
+        ],
+        "errors": errors,
+        "missing_post_ids": sorted(set(post_ids) - {p.id for p in posts}),
+    }, status=201)
+
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated])
+def api_campaigns(request):
+    if request.method == "GET":
+        campaigns = Campaign.objects.filter(user=request.user).order_by("-created_at")[:50]
+        return Response(CampaignSerializer(campaigns, many=True).data)
+
+    values = request.data.get("keywords") or []
+    if isinstance(values, str):
+        values = values.splitlines()
+    elif not isinstance(values, list):
+        return Response({"error": "keywords must be a list or newline separated text"}, status=400)
+
+    csv_text = request.data.get("csv") or ""
+    upload = request.FILES.get("file")
+    if upload:
+        csv_text += "\n" + upload.read().decode("utf-8-sig", errors="replace")
+
+    keywords, duplicates = parse_keywords(values, csv_text)
+    if not keywords:
+        return Response({"error": "No keywords provided"}, status=400)
+    if len(keywords) > CAMPAIGN_MAX_KEYWORDS:
+        return Response({"error": f"At most {CAMPAIGN_MAX_KEYWORDS} keywords per campaign"}, status=400)
+
+    try:
+        parallelism = int(request.data.get("parallelism", 2))
+    except (TypeError, ValueError):
+        return Response({"error": "parallelism must be an integer"}, status=400)
+
+    publish = str(request.data.get("publish", "true")).lower() in ("1", "true", "yes")
+    campaign = create_campaign(
+        request.user,
+        keywords,
+        parallelism=parallelism,
+        publish=publish,
+        name=request.data.get("name", ""),
+    )
+
+    return Response({
+        **CampaignSerializer(campaign).data,
+        "keywords": len(keywords),
+        "duplicates_skipped": duplicates,
+    }, status=201)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def api_campaign_detail(request, campaign_id):
+    try:
+        campaign = Campaign.objects.get(id=campaign_id, user=request.user)
+    except Campaign.DoesNotExist:
+        return Response({"error": "Campaign not found"}, status=404)
+
+    return Response({
+        **CampaignSerializer(campaign).data,
+        "progress": campaign_progress(campaign),
+        "items": CampaignItemSerializer(campaign.items.all(), many=True).data,
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def api_draft_detail(request, draft_id):
+    draft = get_draft(request.user, draft_id)
+    if draft is None:
+        return Response({"error": "Draft not found"}, status=404)
+
+    return Response({
+        "id": str(draft.id),
+        "keyword": draft.keyword,
+        "created_at": draft.created_at,
+        "expires_at": draft.expires_at,
+        **draft.content,
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def api_cache_stats(request):
+    return Response({"caches": cache_stats()})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def api_http_stats(request):
+    return Response({"hosts": http_stats()})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def api_metrics(request):
+    """Per-stage latency percentiles plus cache, HTTP, LLM provider, rate limit and render cache stats."""
+    return Response({
+        "spans": span_stats(kind=request.query_params.get("kind") or None),
+        "caches": cache_stats(),
+        "hosts": http_stats(),
+        "providers": router.stats(),
+        "rate_limits": rate_limit_stats(),
+        "render_cache": render_stats(),
+    })
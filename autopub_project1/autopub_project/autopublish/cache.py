@@ -0,0 +1,133 @@
+# autopublish/cache.py
+
+import hashlib
+import re
+from datetime import timedelta
+from typing import Any, Callable, Optional
+
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CacheEntry, CacheStat
+from .singleflight import SingleFlight
+
+_MISSING = object()
+
+
+# ---------- Keys ---------- #
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share a key."""
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+def make_key(*parts) -> str:
+    raw = "\x1f".join(str(p) for p in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ---------- Counters ---------- #
+
+def record_stat(name: str, hit: bool) -> None:
+    field = "hits" if hit else "misses"
+    updated = CacheStat.objects.filter(name=name).update(**{field: F(field) + 1})
+    if not updated:
+        try:
+            CacheStat.objects.create(name=name, **{field: 1})
+        except IntegrityError:
+            CacheStat.objects.filter(name=name).update(**{field: F(field) + 1})
+
+
+def cache_stats() -> list:
+    return [
+        {
+            "name": s.name,
+            "hits": s.hits,
+            "misses": s.misses,
+            "hit_rate": round(s.hit_rate, 4),
+        }
+        for s in CacheStat.objects.order_by("name")
+    ]
+
+
+# ---------- DB-backed TTL + LRU cache ---------- #
+
+class DBCache:
+    """
+    JSON values stored in CacheEntry rows.
+    Entries older than `ttl` seconds are ignored; once the namespace holds more
+    than `max_entries` rows the least recently accessed ones are deleted.
+    Concurrent misses for the same key in one process share one computation.
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_entries: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._flight = SingleFlight()
+
+    def _entries(self):
+        return CacheEntry.objects.filter(namespace=self.namespace)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = timezone.now()
+        entry = (
+            self._entries()
+            .filter(key=key, stored_at__gte=now - timedelta(seconds=self.ttl))
+            .only("id", "value")
+            .first()
+        )
+        if entry is None:
+            return default
+        CacheEntry.objects.filter(id=entry.id).update(accessed_at=now, hits=F("hits") + 1)
+        return entry.value
+
+    def set(self, key: str, value: Any) -> None:
+        now = timezone.now()
+        CacheEntry.objects.update_or_create(
+            namespace=self.namespace,
+            key=key,
+            defaults={"value": value, "stored_at": now, "accessed_at": now, "hits": 0},
+        )
+        self.evict()
+
+    def delete(self, key: str) -> None:
+        self._entries().filter(key=key).delete()
+
+    def evict(self) -> None:
+        cutoff = timezone.now() - timedelta(seconds=self.ttl)
+        self._entries().filter(stored_at__lt=cutoff).delete()
+
+        stale = list(
+            self._entries()
+            .order_by("-accessed_at")
+            .values_list("id", flat=True)[self.max_entries:]
+        )
+        if stale:
+            CacheEntry.objects.filter(id__in=stale).delete()
+
+    def get_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+        Values rejected by `cache_if` are returned but not stored.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            record_stat(self.namespace, hit=True)
+            return value
+
+        def fill():
+            value = compute()
+            if cache_if is None or cache_if(value):
+                self.set(key, value)
+            return value
+
+        value, shared = self._flight.do(key, fill)
+        record_stat(self.namespace, hit=shared)
+        return value
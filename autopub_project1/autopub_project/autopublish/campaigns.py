@@ -0,0 +1,296 @@
+# autopublish/campaigns.py
+
+import csv
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import close_old_connections, connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import normalize_query
+from .jobs import Heartbeat
+from .models import Campaign, CampaignItem, UserProfile
+from .pipeline import competitor_context, competitor_urls, fetch_competitors, write_draft
+from .publisher import publish_article, save_published_post
+from .scraper import scrape_many
+from .tracing import start_trace
+
+# ---------- Settings ---------- #
+
+CAMPAIGN_MAX_KEYWORDS = int(os.getenv("CAMPAIGN_MAX_KEYWORDS", "500"))
+CAMPAIGN_MAX_PARALLELISM = int(os.getenv("CAMPAIGN_MAX_PARALLELISM", "4"))
+CAMPAIGN_SCRAPE_BATCH = int(os.getenv("CAMPAIGN_SCRAPE_BATCH", "20"))
+CAMPAIGN_POLL_INTERVAL = float(os.getenv("CAMPAIGN_POLL_INTERVAL", "2.0"))
+CAMPAIGN_HEARTBEAT_INTERVAL = float(os.getenv("CAMPAIGN_HEARTBEAT_INTERVAL", "30"))
+# A running campaign whose heartbeat is older than this is assumed to have lost its worker.
+CAMPAIGN_STALE_AFTER = int(os.getenv("CAMPAIGN_STALE_AFTER", "300"))
+
+
+# ---------- Input ---------- #
+
+def parse_keywords(values: Iterable[str] = (), csv_text: str = "") -> Tuple[List[str], int]:
+    """
+    Collect keywords from a list and/or CSV text (first column; a "keyword"
+    header row is ignored). Returns (unique keywords in order, duplicates dropped).
+    """
+    raw = [v for v in values if isinstance(v, str)]
+    if csv_text:
+        for row in csv.reader(io.StringIO(csv_text)):
+            if row:
+                raw.append(row[0])
+
+    seen = set()
+    keywords = []
+    duplicates = 0
+    for value in raw:
+        keyword = " ".join(value.split())
+        key = normalize_query(keyword)
+        if not key or key == "keyword":
+            continue
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        keywords.append(keyword)
+    return keywords, duplicates
+
+
+def create_campaign(user, keywords: List[str], parallelism: int = 2, publish: bool = True, name: str = "") -> Campaign:
+    campaign = Campaign.objects.create(
+        user=user,
+        name=name,
+        parallelism=max(1, min(parallelism, CAMPAIGN_MAX_PARALLELISM)),
+        publish=publish,
+    )
+    CampaignItem.objects.bulk_create(
+        CampaignItem(campaign=campaign, keyword=keyword, position=i)
+        for i, keyword in enumerate(keywords[:CAMPAIGN_MAX_KEYWORDS])
+    )
+    return campaign
+
+
+def campaign_progress(campaign: Campaign) -> Dict[str, int]:
+    counts = {status: 0 for status, _ in CampaignItem.STATUS_CHOICES}
+    for item in campaign.items.values("status"):
+        counts[item["status"]] += 1
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+# ---------- Queue ---------- #
+
+def claim_next_campaign(worker_id: str) -> Optional[Campaign]:
+    candidates = (
+        Campaign.objects.filter(status="queued")
+        .order_by("created_at")
+        .values_list("id", flat=True)[:10]
+    )
+    for campaign_id in candidates:
+        now = timezone.now()
+        claimed = Campaign.objects.filter(id=campaign_id, status="queued").update(
+            status="running",
+            worker=worker_id,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return Campaign.objects.get(id=campaign_id)
+    return None
+
+
+def requeue_stale_campaigns(older_than: int = CAMPAIGN_STALE_AFTER) -> int:
+    """
+    Put back campaigns whose worker stopped sending heartbeats (it died
+    mid-run). Their keywords that were being generated go back to pending;
+    finished keywords keep their result.
+    """
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    stale = list(
+        Campaign.objects.filter(
+            Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+            status="running",
+        ).values_list("id", flat=True)
+    )
+    requeued = 0
+    for campaign_id in stale:
+        if Campaign.objects.filter(id=campaign_id, status="running").update(status="queued", worker=""):
+            CampaignItem.objects.filter(campaign_id=campaign_id, status="generating").update(status="pending")
+            requeued += 1
+    return requeued
+
+
+# ---------- Execution ---------- #
+
+def _in_thread(fn):
+    """Run fn in a pool thread and close that thread's DB connection afterwards."""
+    def wrapper(*args):
+        try:
+            return fn(*args)
+        finally:
+            connections.close_all()
+    return wrapper
+
+
+def _update(item: CampaignItem, **fields) -> None:
+    for name, value in fields.items():
+        setattr(item, name, value)
+    item.save(update_fields=list(fields) + ["updated_at"])
+
+
+def run_campaign(campaign: Campaign) -> Campaign:
+    """
+    Generate (and publish) every pending keyword of the campaign.
+
+    Keywords run in rounds. Each round takes as many pending keywords as the
+    user has daily posts left (all of them when not publishing): SERP lookups
+    first, then the union of competitor URLs is scraped once (shared pages
+    are downloaded a single time for the whole round), then drafts are
+    written and published with up to `campaign.parallelism` keywords in
+    flight. Every keyword reserves its quota slot before generating and
+    gives it back if it fails, so the next round can use it. Keywords left
+    when the quota runs out are skipped.
+    """
+    pending = list(campaign.items.filter(status="pending"))
+    profile = None
+    if campaign.publish:
+        profile, _ = UserProfile.objects.get_or_create(user=campaign.user)
+
+    claimed = Campaign.objects.filter(id=campaign.id, status="running", worker=campaign.worker)
+    try:
+        with Heartbeat(claimed, f"campaign-{campaign.id}", CAMPAIGN_HEARTBEAT_INTERVAL), \
+                ThreadPoolExecutor(max_workers=campaign.parallelism, thread_name_prefix="campaign") as pool:
+            while pending:
+                allowed = profile.remaining_today() if profile else len(pending)
+                if not allowed:
+                    break
+                items, pending = pending[:allowed], pending[allowed:]
+                _run_round(campaign, profile, pool, items)
+        for item in pending:
+            _update(item, status="skipped", error="Daily post limit reached")
+    except Exception as e:
+        campaign.status = "failed"
+        campaign.error = str(e)
+    else:
+        campaign.status = "done"
+
+    campaign.finished_at = timezone.now()
+    # Only the worker still holding the campaign may finish it (see jobs.run_job).
+    claimed.update(status=campaign.status, error=campaign.error, finished_at=campaign.finished_at)
+    return campaign
+
+
+def _run_round(campaign: Campaign, profile: Optional[UserProfile], pool: ThreadPoolExecutor, items) -> None:
+    # 1. SERP (cached and de-duplicated by normalized keyword)
+    serps = dict(zip(
+        (item.id for item in items),
+        pool.map(_in_thread(fetch_competitors), [item.keyword for item in items]),
+    ))
+
+    # 2. Scrape every distinct competitor URL once
+    urls = list(dict.fromkeys(
+        url for item in items for url in competitor_urls(serps[item.id])
+    ))
+    texts = {}
+    for i in range(0, len(urls), CAMPAIGN_SCRAPE_BATCH):
+        batch = urls[i:i + CAMPAIGN_SCRAPE_BATCH]
+        texts.update(zip(batch, scrape_many(batch)))
+
+    # 3. Generate + publish
+    def process(item):
+        competitors = serps[item.id]
+        content = competitor_context(
+            item.keyword,
+            [texts.get(url) for url in competitor_urls(competitors)],
+        )
+        _process_item(campaign, item, competitors, content, profile)
+
+    list(pool.map(_in_thread(process), items))
+
+
+def _process_item(
+    campaign: Campaign,
+    item: CampaignItem,
+    competitors,
+    competitor_content: str,
+    profile: Optional[UserProfile] = None,
+) -> None:
+    # Another campaign or a manual publish may have used the quota since the round started.
+    if profile is not None and not profile.reserve_post():
+        _update(item, status="skipped", error="Daily post limit reached")
+        return
+
+    published = False
+    try:
+        published = _generate_item(campaign, item, competitors, competitor_content, quota_reserved=profile is not None)
+    finally:
+        if profile is not None and not published:
+            profile.release_post()
+
+
+def _generate_item(
+    campaign: Campaign,
+    item: CampaignItem,
+    competitors,
+    competitor_content: str,
+    quota_reserved: bool = False,
+) -> bool:
+    """Write (and publish) one keyword; returns whether a post was published."""
+    with start_trace("campaign", item.keyword):
+        _update(item, status="generating")
+        try:
+            draft = write_draft(item.keyword, competitors, competitor_content)
+        except Exception as e:
+            _update(item, status="failed", error=str(e))
+            return False
+
+        data = draft["data"]
+        summary = {
+            "title": data["title"],
+            "meta_description": data["meta_description"],
+            "generation": draft.get("generation"),
+        }
+
+        if not campaign.publish:
+            _update(item, status="generated", result={**summary, "body_markdown": data["body_markdown"]})
+            return False
+
+        result = publish_article(data, draft["content_html"], draft["slug"])
+        if not result["ok"]:
+            _update(item, status="failed", result=summary, error=result["error"][:2000])
+            return False
+
+        published = save_published_post(campaign.user, item.keyword, data, result, quota_reserved=quota_reserved)
+        _update(
+            item,
+            status="published",
+            published_post=published,
+            result={**summary, "wp_link": published.wp_link, "timings": result["timings"]},
+        )
+        return True
+
+
+def run_campaign_worker(worker_id: str, poll_interval: float = CAMPAIGN_POLL_INTERVAL, once: bool = False) -> int:
+    processed = 0
+    requeue_stale_campaigns()
+    last_requeue = time.monotonic()
+
+    while True:
+        close_old_connections()
+        if time.monotonic() - last_requeue >= CAMPAIGN_HEARTBEAT_INTERVAL:
+            requeue_stale_campaigns()
+            last_requeue = time.monotonic()
+
+        campaign = claim_next_campaign(worker_id)
+        if campaign is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        run_campaign(campaign)
+        processed += 1
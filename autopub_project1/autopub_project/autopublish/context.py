@@ -0,0 +1,214 @@
+# autopublish/context.py
+
+import hashlib
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .textutils import STOPWORDS
+
+# ---------- Settings ---------- #
+
+CONTEXT_COMPRESSION = os.getenv("CONTEXT_COMPRESSION", "true").lower() in ("1", "true", "yes")
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_MIN_WORDS = int(os.getenv("CONTEXT_MIN_WORDS", "8"))
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.7"))
+# Lines this long are content even when they mention cookies or a newsletter.
+CONTEXT_BOILERPLATE_MAX_WORDS = int(os.getenv("CONTEXT_BOILERPLATE_MAX_WORDS", "20"))
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+SHINGLE_SIZE = 4
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Phrases that mark a short line as navigation, a banner or a call to action.
+BOILERPLATE = re.compile(
+    r"cookie|subscribe|newsletter|all rights reserved|privacy policy|terms of (use|service)"
+    r"|sign up|log in|follow us|share this|advertisement|related posts|click here",
+    re.IGNORECASE,
+)
+# Lines that are boilerplate whatever their length.
+BOILERPLATE_LINE = re.compile(
+    r"(©|copyright\b).*|.*\ball rights reserved\W*|(we|this (site|website)) uses? cookies\b.*",
+    re.IGNORECASE,
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_MERSENNE = (1 << 61) - 1
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English prose)."""
+    return math.ceil(len(text) / 4)
+
+
+def _terms(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+# ---------- Paragraphs ---------- #
+
+class Paragraph:
+    __slots__ = ("text", "source", "position", "terms", "tokens", "score")
+
+    def __init__(self, text: str, source: int, position: int):
+        self.text = text
+        self.source = source
+        self.position = position
+        self.terms = _terms(text)
+        self.tokens = estimate_tokens(text)
+        self.score = 0.0
+
+
+def is_boilerplate(line: str, query_terms: frozenset = frozenset()) -> bool:
+    """
+    Whether a line is navigation or legal boilerplate: a short line with a
+    boilerplate phrase, or a standalone copyright/cookie notice. Lines that
+    mention the query are always kept.
+    """
+    if query_terms and not query_terms.isdisjoint(_terms(line)):
+        return False
+    if BOILERPLATE_LINE.fullmatch(line):
+        return True
+    return len(line.split()) < CONTEXT_BOILERPLATE_MAX_WORDS and bool(BOILERPLATE.search(line))
+
+
+def split_paragraphs(texts: Sequence[str], min_words: int = CONTEXT_MIN_WORDS, query: str = "") -> List[Paragraph]:
+    """One Paragraph per non-trivial line of each scraped page; navigation and legal boilerplate are dropped."""
+    query_terms = frozenset(_terms(query)) - STOPWORDS
+    paragraphs = []
+    for source, text in enumerate(texts):
+        position = 0
+        for line in (text or "").splitlines():
+            line = " ".join(line.split())
+            if len(line.split()) < min_words or is_boilerplate(line, query_terms):
+                continue
+            paragraphs.append(Paragraph(line, source, position))
+            position += 1
+    return paragraphs
+
+
+# ---------- Near-duplicate removal (MinHash + LSH) ---------- #
+
+def _seeds(n: int) -> List[Tuple[int, int]]:
+    seeds = []
+    for i in range(n):
+        digest = hashlib.blake2b(str(i).encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % _MERSENNE or 1
+        b = int.from_bytes(digest[8:], "big") % _MERSENNE
+        seeds.append((a, b))
+    return seeds
+
+
+_SEEDS = _seeds(MINHASH_PERMUTATIONS)
+
+
+def shingles(terms: List[str], size: int = SHINGLE_SIZE) -> set:
+    if len(terms) < size:
+        return {" ".join(terms)}
+    return {" ".join(terms[i:i + size]) for i in range(len(terms) - size + 1)}
+
+
+def minhash(shingle_set: set) -> Tuple[int, ...]:
+    hashed = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+        for s in shingle_set
+    ]
+    return tuple(min((a * h + b) % _MERSENNE for h in hashed) for a, b in _SEEDS)
+
+
+def _similarity(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+def dedupe(paragraphs: List[Paragraph], threshold: float = CONTEXT_DUPLICATE_THRESHOLD) -> List[Paragraph]:
+    """
+    Drop paragraphs whose estimated Jaccard similarity (MinHash over word
+    4-shingles) with an already kept paragraph reaches `threshold`.
+    LSH banding keeps this close to linear: only paragraphs that share a
+    band bucket are compared.
+    """
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    buckets = defaultdict(list)
+    kept = []
+    for paragraph in paragraphs:
+        signature = minhash(shingles(paragraph.terms))
+        keys = [(band, signature[band * rows:(band + 1) * rows]) for band in range(MINHASH_BANDS)]
+        candidates = {id(other): other_sig for key in keys for other, other_sig in buckets[key]}
+        if any(_similarity(signature, other_sig) >= threshold for other_sig in candidates.values()):
+            continue
+        for key in keys:
+            buckets[key].append((paragraph, signature))
+        kept.append(paragraph)
+    return kept
+
+
+# ---------- Relevance (BM25) ---------- #
+
+def bm25_rank(paragraphs: List[Paragraph], query: str) -> List[Paragraph]:
+    """Score paragraphs against the query with BM25; best first, earlier paragraphs win ties."""
+    query_terms = set(_terms(query))
+    if not paragraphs:
+        return []
+
+    doc_freq = Counter()
+    for paragraph in paragraphs:
+        doc_freq.update(set(paragraph.terms) & query_terms)
+
+    n = len(paragraphs)
+    avg_len = sum(len(p.terms) for p in paragraphs) / n
+    idf = {t: math.log(1 + (n - df + 0.5) / (df + 0.5)) for t, df in doc_freq.items()}
+
+    for paragraph in paragraphs:
+        tf = Counter(t for t in paragraph.terms if t in idf)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(paragraph.terms) / avg_len)
+        paragraph.score = sum(
+            idf[t] * count * (BM25_K1 + 1) / (count + norm) for t, count in tf.items()
+        )
+
+    return sorted(paragraphs, key=lambda p: (-p.score, p.position, p.source))
+
+
+# ---------- Packing ---------- #
+
+def pack(ranked: List[Paragraph], budget: int) -> List[Paragraph]:
+    """Greedily take the best paragraphs that fit in `budget` tokens, then restore page order."""
+    chosen = []
+    used = 0
+    for paragraph in ranked:
+        if used + paragraph.tokens > budget:
+            continue
+        chosen.append(paragraph)
+        used += paragraph.tokens
+    return sorted(chosen, key=lambda p: (p.source, p.position))
+
+
+def compress_context(
+    keyword: str,
+    texts: Sequence[Optional[str]],
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[str, Dict]:
+    """
+    Boil scraped competitor pages down to the most relevant, non-repeated
+    paragraphs that fit in `budget` tokens. Runs locally (no network).
+    Returns (context text, stats).
+    """
+    texts = [t for t in texts if t]
+    paragraphs = split_paragraphs(texts, query=keyword)
+    unique = dedupe(paragraphs)
+    chosen = pack(bm25_rank(unique, keyword), budget)
+
+    context = "\n\n".join(p.text for p in chosen)
+    stats = {
+        "input_tokens": sum(estimate_tokens(t) for t in texts),
+        "paragraphs": len(paragraphs),
+        "duplicates_removed": len(paragraphs) - len(unique),
+        "paragraphs_kept": len(chosen),
+        "output_tokens": estimate_tokens(context),
+        "budget": budget,
+    }
+    return context, stats
@@ -0,0 +1,35 @@
+# autopublish/drafts.py
+
+import os
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .models import GeneratedDraft
+
+DRAFT_TTL = int(os.getenv("DRAFT_TTL", str(7 * 86400)))
+
+
+def save_draft(user, draft: Dict) -> GeneratedDraft:
+    """Store a generate_draft()/stream_draft() result and return the row."""
+    return GeneratedDraft.objects.create(
+        user=user,
+        keyword=draft["keyword"],
+        content=draft,
+        expires_at=timezone.now() + timedelta(seconds=DRAFT_TTL),
+    )
+
+
+def get_draft(user, draft_id) -> Optional[GeneratedDraft]:
+    """The user's draft with this ID, unless it is missing or expired."""
+    try:
+        return GeneratedDraft.objects.get(id=draft_id, user=user, expires_at__gt=timezone.now())
+    except (GeneratedDraft.DoesNotExist, ValidationError):
+        return None
+
+
+def delete_expired_drafts() -> int:
+    deleted, _ = GeneratedDraft.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
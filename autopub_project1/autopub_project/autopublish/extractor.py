@@ -0,0 +1,114 @@
+# autopublish/extractor.py
+
+import codecs
+import os
+from typing import List, Optional, Union
+
+from lxml import etree
+
+# ---------- Settings ---------- #
+
+EXTRACT_CHUNK_SIZE = int(os.getenv("EXTRACT_CHUNK_SIZE", "16384"))
+# Below this many characters the fast path is considered to have missed the article.
+EXTRACT_MIN_CHARS = int(os.getenv("EXTRACT_MIN_CHARS", "200"))
+
+BLOCK_TAGS = frozenset(("p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre", "td", "dd"))
+SKIP_TAGS = frozenset((
+    "script", "style", "noscript", "template", "svg", "nav", "header", "footer",
+    "aside", "form", "button", "select", "iframe",
+))
+MIN_BLOCK_CHARS = 20
+MAX_LINK_DENSITY = 0.5
+
+
+def _local(tag) -> str:
+    # Comments/processing instructions have a callable tag; namespaced tags look like {ns}name.
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _block_text(element) -> Optional[str]:
+    text = " ".join("".join(element.itertext()).split())
+    if len(text) < MIN_BLOCK_CHARS:
+        return None
+    link_chars = sum(len("".join(a.itertext())) for a in element.iter("a"))
+    if link_chars / len(text) > MAX_LINK_DENSITY:
+        return None
+    return text
+
+
+def _pull_parser(encoding: Optional[str]) -> etree.HTMLPullParser:
+    """
+    Incremental parser for `encoding`. A declared charset libxml2 doesn't know
+    (e.g. "latin-1") is retried under Python's name for it, then sniffed.
+    """
+    candidates = [encoding]
+    if encoding:
+        try:
+            candidates.append(codecs.lookup(encoding).name)
+        except LookupError:
+            pass
+    for candidate in candidates:
+        try:
+            return etree.HTMLPullParser(events=("start", "end"), encoding=candidate, recover=True)
+        except LookupError:
+            continue
+    return etree.HTMLPullParser(events=("start", "end"), recover=True)
+
+
+def fast_extract(html: Union[bytes, str], max_chars: int = 3000, encoding: Optional[str] = None) -> str:
+    """
+    Main-content text of an HTML document, one block (paragraph, heading,
+    list item...) per line.
+
+    The document is fed to lxml's incremental HTMLPullParser in chunks and
+    parsing stops as soon as max_chars of text have been collected, so the
+    tail of long pages is never parsed. Scripts, navigation, headers,
+    footers, forms and link-heavy blocks (menus) are skipped, and finished
+    blocks are cleared to keep memory flat.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+        encoding = "utf-8"
+
+    parser = _pull_parser(encoding)
+    blocks: List[str] = []
+    collected = 0
+    skip_depth = 0
+
+    def handle(events):
+        nonlocal collected, skip_depth
+        for event, element in events:
+            tag = _local(element.tag)
+            if tag in SKIP_TAGS:
+                if event == "start":
+                    skip_depth += 1
+                else:
+                    skip_depth -= 1
+                    element.clear(keep_tail=True)
+                continue
+            if event != "end" or tag not in BLOCK_TAGS:
+                continue
+
+            if not skip_depth:
+                text = _block_text(element)
+                if text:
+                    blocks.append(text)
+                    collected += len(text) + 1
+            # Drop the block's children so enclosing blocks don't repeat its text.
+            element.clear(keep_tail=True)
+
+    try:
+        for offset in range(0, len(html), EXTRACT_CHUNK_SIZE):
+            parser.feed(html[offset:offset + EXTRACT_CHUNK_SIZE])
+            handle(parser.read_events())
+            if collected >= max_chars:
+                break
+        else:
+            parser.close()
+            handle(parser.read_events())
+    except (etree.LxmlError, ValueError):
+        pass
+
+    return "\n".join(blocks)[:max_chars]
@@ -0,0 +1,62 @@
+# autopublish/fields.py
+
+import json
+import zlib
+
+from django.db import models
+
+
+class CompressedJSONField(models.BinaryField):
+    """A JSON value stored zlib-compressed in a binary column."""
+
+    description = "zlib-compressed JSON"
+
+    def _decode(self, value):
+        return json.loads(zlib.decompress(bytes(value)).decode("utf-8"))
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return self._decode(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return self._decode(value)
+        if isinstance(value, str):
+            # Fixtures serialize the decoded JSON (see value_to_string).
+            return json.loads(value)
+        return value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        return zlib.compress(raw, 6)
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj))
+
+
+class CompressedTextField(models.BinaryField):
+    """A (large) text value stored zlib-compressed in a binary column."""
+
+    description = "zlib-compressed text"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return zlib.decompress(bytes(value)).decode("utf-8")
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return zlib.decompress(bytes(value)).decode("utf-8")
+        return value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return zlib.compress(value.encode("utf-8"), 6)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
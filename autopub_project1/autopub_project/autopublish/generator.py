@@ -1,12 +1,27 @@
 import os
+import re
+import json
+import time
+import hashlib
 import openai
 import cohere
-from typing import List, Dict
+from typing import Dict, Iterator, List, Tuple
+
+from .cache import DBCache, make_key, record_stat
+from .ratelimit import RateLimited, acquire_llm
+from .router import Provider, ProviderRouter
+from .tracing import span
 
 # ---------- Load API Keys ---------- #
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 USE_COHERE = os.getenv("USE_COHERE", "false").lower() in ("1", "true", "yes")
+USE_FAKE_LLM = os.getenv("USE_FAKE_LLM", "false").lower() in ("1", "true", "yes")
+FAKE_LLM_DELAY = float(os.getenv("FAKE_LLM_DELAY", "0.02"))
+
+OPENAI_MODEL = "gpt-4o-mini"
+COHERE_MODEL = "command-r-plus-08-2024"
+DEFAULT_TEMPERATURE = 0.7
 
 if OPENAI_API_KEY:
     openai.api_key = OPENAI_API_KEY
@@ -16,6 +31,18 @@ if COHERE_API_KEY:
     co = cohere.Client(COHERE_API_KEY)
 
 
+# ---------- Generation cache (opt-in) ---------- #
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 86400)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+llm_cache = DBCache("llm", LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+
+
+class GenerationError(Exception):
+    """The LLM call failed. Streams raise it (possibly after partial output) instead of yielding the error as text."""
+
+
 # ---------- Prompt Builder ---------- #
 def build_prompt(
     keyword: str,
@@ -54,9 +81,9 @@ Additional competitor page content (summarized, do not copy directly):
 
 
 # ---------- OpenAI ---------- #
-def generate_content_openai(prompt: str, max_tokens: int = 1800, temperature: float = 0.7) -> str:
+def generate_content_openai(prompt: str, max_tokens: int = 1800, temperature: float = DEFAULT_TEMPERATURE) -> str:
     resp = openai.ChatCompletion.create(
-        model="gpt-4o-mini",
+        model=OPENAI_MODEL,
         messages=[{"role": "user", "content": prompt}],
         max_tokens=max_tokens,
         temperature=temperature,
@@ -65,13 +92,13 @@ def generate_content_openai(prompt: str, max_tokens: int = 1800, temperature: fl
 
 
 # ---------- Cohere ---------- #
-def generate_content_cohere(prompt: str, temperature: float = 0.7) -> str:
+def generate_content_cohere(prompt: str, temperature: float = DEFAULT_TEMPERATURE) -> str:
     try:
         if not COHERE_API_KEY:
             return "Error: Cohere API key not found."
 
         response = co.chat(
-            model="command-r-plus-08-2024",
+            model=COHERE_MODEL,
             message=prompt,
             temperature=temperature,
         )
@@ -80,16 +107,240 @@ def generate_content_cohere(prompt: str, temperature: float = 0.7) -> str:
         return f"Error: {str(e)}"
 
 
+# ---------- Fake provider (local testing) ---------- #
+def _fake_article(prompt: str) -> str:
+    match = re.search(r'about: "(.+?)"', prompt)
+    keyword = match.group(1) if match else "your topic"
+    body = "\n\n".join(
+        [
+            f"{keyword.capitalize()} matters more than ever. This guide covers what you need to know about {keyword}.",
+            f"## Why {keyword} matters",
+            f"Readers searching for {keyword} want clear, practical answers.",
+            "- Short paragraphs\n- Useful lists\n- A clear conclusion",
+            f"## Getting started with {keyword}",
+            f"Start small, measure results and refine your approach to {keyword}.",
+            "## Conclusion",
+            f"Now you know the essentials of {keyword}. Start today!",
+        ]
+    )
+    return json.dumps(
+        {
+            "meta_title": f"{keyword.capitalize()}: The Essential Guide",
+            "meta_description": f"Everything you need to know about {keyword}.",
+            "title": f"The Complete Guide to {keyword}",
+            "body_markdown": body,
+        }
+    )
+
+
+def _fake_captions(prompt: str) -> str:
+    platforms = re.findall(r'^- "(\w+)":', prompt, flags=re.MULTILINE)
+    return json.dumps({p: f"Fake {p} caption. Read more: https://example.com" for p in platforms})
+
+
+def stream_content_fake(prompt: str, delay: float = FAKE_LLM_DELAY) -> Iterator[str]:
+    """Yield a canned article (or caption set) a few characters at a time, like a streaming provider would."""
+    text = _fake_captions(prompt) if "captions keyed by platform" in prompt else _fake_article(prompt)
+    for i in range(0, len(text), 16):
+        if delay:
+            time.sleep(delay)
+        yield text[i:i + 16]
+
+
+def generate_content_fake(prompt: str) -> str:
+    return "".join(stream_content_fake(prompt))
+
+
+# ---------- Streaming ---------- #
+def stream_content_openai(prompt: str, max_tokens: int = 1800, temperature: float = DEFAULT_TEMPERATURE) -> Iterator[str]:
+    try:
+        resp = openai.ChatCompletion.create(
+            model=OPENAI_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        for chunk in resp:
+            text = chunk["choices"][0].get("delta", {}).get("content")
+            if text:
+                yield text
+    except Exception as e:
+        raise GenerationError(str(e)) from e
+
+
+def stream_content_cohere(prompt: str, temperature: float = DEFAULT_TEMPERATURE) -> Iterator[str]:
+    if not COHERE_API_KEY:
+        raise GenerationError("Cohere API key not found.")
+
+    try:
+        for event in co.chat_stream(
+            model=COHERE_MODEL,
+            message=prompt,
+            temperature=temperature,
+        ):
+            if getattr(event, "event_type", None) == "text-generation":
+                yield event.text
+    except Exception as e:
+        raise GenerationError(str(e)) from e
+
+
+# ---------- Backend dispatch ---------- #
+def configured_providers() -> List[Provider]:
+    """Every configured backend, preferred one first (fake, then Cohere if USE_COHERE, then OpenAI)."""
+    providers = []
+    if USE_FAKE_LLM:
+        providers.append(Provider("fake", "fake", generate_content_fake))
+    if co:
+        providers.append(Provider("cohere", COHERE_MODEL, generate_content_cohere))
+    if OPENAI_API_KEY:
+        providers.append(Provider("openai", OPENAI_MODEL, generate_content_openai))
+    if not USE_COHERE:
+        providers.sort(key=lambda p: p.name == "cohere")
+    return providers
+
+
+router = ProviderRouter(configured_providers())
+
+
+def generate_text_with_meta(prompt: str) -> Tuple[str, Dict]:
+    """Send a prompt through the provider router; returns (text, routing metadata)."""
+    return router.generate(prompt)
+
+
+def generate_text(prompt: str) -> str:
+    """Send a prompt to the configured backends (with failover)."""
+    return generate_text_with_meta(prompt)[0]
+
+
+def stream_text(prompt: str) -> Iterator[str]:
+    """
+    Like generate_text, but yields the completion chunk by chunk.
+    Raises GenerationError when the provider fails, even after partial output.
+    The call takes its quota slot first, as ProviderRouter does.
+    """
+    if USE_FAKE_LLM:
+        name, stream = "fake", stream_content_fake
+    elif USE_COHERE and co:
+        name, stream = "cohere", stream_content_cohere
+    elif OPENAI_API_KEY:
+        name, stream = "openai", stream_content_openai
+    else:
+        raise GenerationError("No content generation API configured. Set OPENAI_API_KEY or COHERE_API_KEY.")
+
+    try:
+        acquire_llm(name, prompt)
+    except RateLimited as e:
+        raise GenerationError(str(e)) from e
+    yield from stream(prompt)
+
+
+# ---------- Cached generation ---------- #
+def active_provider() -> Tuple[str, str]:
+    """(provider, model) preferred by the router; used to key the generation cache."""
+    if not router.providers:
+        return "none", ""
+    preferred = router.providers[0]
+    return preferred.name, preferred.model
+
+
+def _is_cacheable(output: str) -> bool:
+    return bool(output) and not output.startswith("Error:")
+
+
+def generation_cache_key(prompt: str, temperature: float = DEFAULT_TEMPERATURE) -> str:
+    provider, model = active_provider()
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return make_key(provider, model, temperature, prompt_hash)
+
+
+def cached_generate(prompt: str, force: bool = False) -> Tuple[str, Dict]:
+    """
+    generate_text_with_meta with the opt-in generation cache (LLM_CACHE_ENABLED).
+    force=True skips the lookup but still stores the fresh output.
+    """
+    if not LLM_CACHE_ENABLED:
+        return generate_text_with_meta(prompt)
+
+    key = generation_cache_key(prompt)
+    if not force:
+        meta = {"provider": "cache", "model": None, "latency_ms": 0, "hedged": False, "attempts": []}
+
+        def compute():
+            output, fresh = generate_text_with_meta(prompt)
+            meta.update(fresh)
+            return output
+
+        return llm_cache.get_or_set(key, compute, cache_if=_is_cacheable), meta
+
+    record_stat(llm_cache.namespace, hit=False)
+    output, meta = generate_text_with_meta(prompt)
+    if _is_cacheable(output):
+        llm_cache.set(key, output)
+    return output, meta
+
+
 # ---------- Main entry point ---------- #
+def generate_article_with_meta(
+    keyword: str,
+    serp_results: List[Dict],
+    competitor_content: str,
+    word_count: int = 900,
+    force: bool = False,
+) -> Tuple[str, Dict]:
+    """Like generate_article, also returning which provider answered and how fast."""
+    with span("build_prompt") as s:
+        prompt = build_prompt(keyword, serp_results, competitor_content, word_count)
+        s["chars"] = len(prompt)
+    with span("llm") as s:
+        output, meta = cached_generate(prompt, force=force)
+        s.update(provider=meta["provider"], hedged=meta["hedged"], failed=output.startswith("Error:"))
+    return output, meta
+
+
 def generate_article(
-    keyword: str, serp_results: List[Dict], competitor_content: str, word_count: int = 900
+    keyword: str,
+    serp_results: List[Dict],
+    competitor_content: str,
+    word_count: int = 900,
+    force: bool = False,
 ) -> str:
-    """Main entry point for content generation (chooses OpenAI or Cohere)."""
-    prompt = build_prompt(keyword, serp_results, competitor_content, word_count)
+    """Main entry point for content generation (routes between OpenAI and Cohere)."""
+    return generate_article_with_meta(keyword, serp_results, competitor_content, word_count, force)[0]
 
-    if USE_COHERE and co:
-        return generate_content_cohere(prompt)
-    elif OPENAI_API_KEY:
-        return generate_content_openai(prompt)
+
+def stream_article(
+    keyword: str,
+    serp_results: List[Dict],
+    competitor_content: str,
+    word_count: int = 900,
+    force: bool = False,
+) -> Iterator[str]:
+    """Streaming variant of generate_article (a cache hit is yielded as one chunk)."""
+    with span("build_prompt") as s:
+        prompt = build_prompt(keyword, serp_results, competitor_content, word_count)
+        s["chars"] = len(prompt)
+    if not LLM_CACHE_ENABLED:
+        yield from stream_text(prompt)
+        return
+
+    key = generation_cache_key(prompt)
+    if not force:
+        cached = llm_cache.get(key)
+        record_stat(llm_cache.namespace, hit=cached is not None)
+        if cached is not None:
+            yield cached
+            return
     else:
-        return "Error: No content generation API configured. Set OPENAI_API_KEY or COHERE_API_KEY."
+        record_stat(llm_cache.namespace, hit=False)
+
+    chunks = []
+    for chunk in stream_text(prompt):
+        chunks.append(chunk)
+        yield chunk
+
+    # Only reached when the stream finished: one that raised GenerationError after
+    # partial output (or was abandoned by its consumer) is never cached.
+    output = "".join(chunks)
+    if _is_cacheable(output):
+        llm_cache.set(key, output)
@@ -0,0 +1,237 @@
+# autopublish/http_client.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Set
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ---------- Settings ---------- #
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_MAX_SESSIONS = int(os.getenv("HTTP_MAX_SESSIONS", "64"))
+HTTP_MAX_STATS_HOSTS = int(os.getenv("HTTP_MAX_STATS_HOSTS", "256"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_MAX_RETRY_AFTER = float(os.getenv("HTTP_MAX_RETRY_AFTER", "30"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Hosts paced by ratelimit.acquire() answer 429 to the caller, which calls
+# ratelimit.backoff() so every worker sharing the bucket holds back; an internal
+# urllib3 retry would sleep and resend behind the bucket's back.
+RATE_LIMITED_RETRY_STATUSES = tuple(s for s in RETRY_STATUSES if s != 429)
+
+
+# ---------- Retry policy ---------- #
+
+class CappedRetry(Retry):
+    """urllib3 Retry that honours Retry-After but never sleeps longer than HTTP_MAX_RETRY_AFTER."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, HTTP_MAX_RETRY_AFTER)
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        # urllib3 retries any 429 carrying Retry-After regardless of status_forcelist.
+        if status_code == 429 and 429 not in (self.status_forcelist or ()):
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def default_retry(statuses=RETRY_STATUSES) -> Retry:
+    # Only idempotent methods are retried after the request was sent;
+    # connection failures are retried for every method.
+    return CappedRetry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        backoff_jitter=HTTP_BACKOFF,
+        status_forcelist=statuses,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+# ---------- Per-host sessions ---------- #
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+_lock = threading.Lock()
+_sessions: "OrderedDict[str, requests.Session]" = OrderedDict()
+# Requests currently running on each session; evicted sessions still in use are closed by the last one.
+_in_use: Dict[requests.Session, int] = {}
+_retired: Set[requests.Session] = set()
+# Origins requested with rate_limited=True; their sessions never retry 429.
+_rate_limited: Set[str] = set()
+# Least recently requested hosts are dropped past HTTP_MAX_STATS_HOSTS.
+_stats: "OrderedDict[str, _HostStats]" = OrderedDict()
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _new_session(origin: str) -> requests.Session:
+    session = requests.Session()
+    statuses = RATE_LIMITED_RETRY_STATUSES if origin in _rate_limited else RETRY_STATUSES
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=default_retry(statuses),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _retire_locked(session: requests.Session) -> None:
+    if _in_use.get(session):
+        _retired.add(session)
+    else:
+        session.close()
+
+
+def _session_locked(origin: str) -> requests.Session:
+    session = _sessions.get(origin)
+    if session is None:
+        session = _sessions[origin] = _new_session(origin)
+        while len(_sessions) > HTTP_MAX_SESSIONS:
+            _, old = _sessions.popitem(last=False)
+            _retire_locked(old)
+    else:
+        _sessions.move_to_end(origin)
+    return session
+
+
+def session_for(url: str) -> requests.Session:
+    """
+    Return the keep-alive session for this URL's host. Least recently used
+    hosts are evicted; their session is closed once no request is using it.
+    """
+    with _lock:
+        return _session_locked(_origin(url))
+
+
+def _checkout(origin: str, rate_limited: bool) -> requests.Session:
+    with _lock:
+        if rate_limited and origin not in _rate_limited:
+            # First paced request to this host: replace a session built with 429 retries.
+            _rate_limited.add(origin)
+            old = _sessions.pop(origin, None)
+            if old is not None:
+                _retire_locked(old)
+        session = _session_locked(origin)
+        _in_use[session] = _in_use.get(session, 0) + 1
+        return session
+
+
+def _checkin(session: requests.Session) -> None:
+    with _lock:
+        _in_use[session] -= 1
+        if _in_use[session]:
+            return
+        del _in_use[session]
+        if session not in _retired:
+            return
+        _retired.discard(session)
+    session.close()
+
+
+# ---------- Requests ---------- #
+
+def request(method: str, url: str, rate_limited: bool = False, **kwargs) -> requests.Response:
+    """
+    requests.request() through the pooled session for the host, with default
+    timeouts. Pass rate_limited=True for hosts paced by ratelimit.acquire():
+    a 429 is then returned to the caller (to call ratelimit.backoff()) instead
+    of being retried here.
+    """
+    kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    origin = _origin(url)
+    session = _checkout(origin, rate_limited)
+
+    start = time.monotonic()
+    failed = True
+    try:
+        response = session.request(method, url, **kwargs)
+        failed = response.status_code >= 500
+        return response
+    finally:
+        _checkin(session)
+        elapsed = (time.monotonic() - start) * 1000
+        with _lock:
+            stats = _stats.get(origin)
+            if stats is None:
+                stats = _stats[origin] = _HostStats()
+                while len(_stats) > HTTP_MAX_STATS_HOSTS:
+                    _stats.popitem(last=False)
+            else:
+                _stats.move_to_end(origin)
+            stats.requests += 1
+            stats.errors += int(failed)
+            stats.total_ms += elapsed
+            stats.max_ms = max(stats.max_ms, elapsed)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+# ---------- Metrics ---------- #
+
+def _connections_opened(session: requests.Session) -> int:
+    opened = 0
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+    return opened
+
+
+def http_stats() -> List[Dict]:
+    """Per-host request count, errors, latency and how often connections were reused."""
+    with _lock:
+        sessions = dict(_sessions)
+        snapshot = {
+            origin: {name: getattr(s, name) for name in _HostStats.__slots__}
+            for origin, s in _stats.items()
+        }
+
+    rows = []
+    for origin, s in sorted(snapshot.items()):
+        session = sessions.get(origin)
+        opened = _connections_opened(session) if session else None
+        rows.append({
+            "host": origin,
+            "requests": s["requests"],
+            "errors": s["errors"],
+            "avg_ms": round(s["total_ms"] / s["requests"], 1) if s["requests"] else 0.0,
+            "max_ms": round(s["max_ms"], 1),
+            "connections_opened": opened,
+            "reuse_rate": round(1 - opened / s["requests"], 3) if opened is not None and s["requests"] else None,
+        })
+    return rows
@@ -0,0 +1,311 @@
+# autopublish/images.py
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+
+from . import http_client
+from .cache import DBCache, make_key, normalize_query
+from .imaging import FORMATS, IMAGE_FORMAT, IMAGE_OPTIMIZE, optimize_in_pool
+from .models import ImageAsset
+from .ratelimit import acquire, backoff, retry_after
+from .singleflight import SingleFlight
+from .tracing import timed
+
+# ---------- Settings ---------- #
+
+PEXELS_SEARCH_URL = os.getenv("PEXELS_SEARCH_URL", "https://api.pexels.com/v1/search")
+PEXELS_CACHE_TTL = int(os.getenv("PEXELS_CACHE_TTL", str(7 * 86400)))
+PEXELS_CACHE_MAX_ENTRIES = int(os.getenv("PEXELS_CACHE_MAX_ENTRIES", "2000"))
+
+IMAGE_DOWNLOAD_DIR = os.getenv("IMAGE_DOWNLOAD_DIR") or str(Path(settings.BASE_DIR) / "cache" / "images")
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+pexels_cache = DBCache("pexels", PEXELS_CACHE_TTL, PEXELS_CACHE_MAX_ENTRIES)
+_uploads = SingleFlight()
+
+
+def site_key(wp_site_url: str) -> str:
+    return (wp_site_url or "").rstrip("/").lower()
+
+
+# ---------- Search (cached) ---------- #
+
+def _search_pexels(query: str) -> List[Dict]:
+    api_key = os.getenv("PEXELS_API_KEY")
+    if not api_key:
+        return []
+
+    try:
+        acquire("pexels")
+        res = http_client.get(
+            PEXELS_SEARCH_URL,
+            headers={"Authorization": api_key},
+            params={"query": query, "per_page": 5, "orientation": "landscape"},
+            timeout=15,
+            rate_limited=True,
+        )
+    except Exception:
+        return []
+    if res.status_code == 429:
+        backoff("pexels", retry_after(res))
+    if res.status_code != 200:
+        return []
+
+    photos = []
+    for photo in res.json().get("photos", []):
+        src = photo.get("src", {})
+        url = src.get("large2x") or src.get("large") or src.get("medium")
+        if url:
+            photos.append({"id": photo["id"], "url": url})
+    return photos
+
+
+def search_photos(query: str) -> List[Dict]:
+    """[{id, url}] for a query, cached per normalized query. Empty results are not cached."""
+    q = normalize_query(query)
+    return pexels_cache.get_or_set(make_key("search", q), lambda: _search_pexels(q), cache_if=bool)
+
+
+# ---------- Download (streamed to disk) ---------- #
+
+def download_to_file(url: str) -> Optional[Tuple[Path, str, int]]:
+    """
+    Stream `url` into IMAGE_DOWNLOAD_DIR, hashing as it goes. Returns (path, sha256, size).
+    The file name is unique to this call, so concurrent downloads never share a file.
+    """
+    Path(IMAGE_DOWNLOAD_DIR).mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp = tempfile.mkstemp(dir=IMAGE_DOWNLOAD_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f, http_client.get(url, stream=True, timeout=15) as res:
+            if res.status_code != 200:
+                raise IOError(f"download failed: {res.status_code}")
+            for chunk in res.iter_content(IMAGE_CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+    except Exception:
+        os.unlink(tmp)
+        return None
+
+    path = Path(tmp).with_suffix(".jpg")
+    os.replace(tmp, path)
+    return path, digest.hexdigest(), size
+
+
+# ---------- Processing ---------- #
+
+def prepare_upload(path: Path, timings: Dict[str, int], info: Dict) -> Dict:
+    """
+    Resize/recompress the downloaded file in the image process pool
+    (IMAGE_OPTIMIZE). Falls back to the original bytes if processing fails.
+    """
+    original = {"path": str(path), "content_type": "image/jpeg", "ext": "jpg", "bytes_after": path.stat().st_size}
+    if not IMAGE_OPTIMIZE:
+        return original
+
+    dst = path.with_name(f"{path.stem}.opt.{FORMATS[IMAGE_FORMAT][2]}")
+    try:
+        with timed(timings, "image_process"):
+            result = optimize_in_pool(str(path), str(dst))
+    except Exception:
+        dst.unlink(missing_ok=True)
+        return original
+
+    info.update(
+        bytes_before=result["bytes_before"],
+        bytes_after=result["bytes_after"],
+        bytes_saved=result["bytes_before"] - result["bytes_after"],
+    )
+    return result
+
+
+# ---------- Upload ---------- #
+
+def upload_file_to_wordpress(
+    path: Path,
+    filename: str,
+    wp_site_url: str,
+    wp_user: str,
+    wp_app_pass: str,
+    content_type: str = "image/jpeg",
+    post_id: Optional[int] = None,
+) -> Optional[int]:
+    """
+    Upload a file to the WordPress media library, streaming it from disk.
+    If post_id is provided, attaches the image to that post. Returns the media ID.
+    """
+    media_url = wp_site_url.rstrip("/") + "/wp-json/wp/v2/media"
+    if post_id:
+        media_url += f"?post={post_id}"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Content-Type": content_type,
+    }
+    try:
+        with open(path, "rb") as f:
+            res = http_client.post(media_url, headers=headers, data=f, auth=(wp_user, wp_app_pass), timeout=30)
+    except Exception:
+        return None
+    if res.status_code not in (200, 201):
+        return None
+    return res.json().get("id")
+
+
+def attach_media(media_id: int, post_id: int, wp_site_url: str, wp_user: str, wp_app_pass: str) -> bool:
+    """Attach an uploaded media item to a post (what ?post= does at upload time)."""
+    media_url = wp_site_url.rstrip("/") + f"/wp-json/wp/v2/media/{media_id}"
+    try:
+        res = http_client.post(media_url, json={"post": post_id}, auth=(wp_user, wp_app_pass), timeout=30)
+    except Exception:
+        return False
+    return res.status_code == 200
+
+
+def media_exists(media_id: int, wp_site_url: str, wp_user: str, wp_app_pass: str) -> bool:
+    """False only when WordPress says the media item is gone (errors count as present)."""
+    media_url = wp_site_url.rstrip("/") + f"/wp-json/wp/v2/media/{media_id}"
+    try:
+        res = http_client.get(media_url, params={"_fields": "id"}, auth=(wp_user, wp_app_pass), timeout=15)
+    except Exception:
+        return True
+    return res.status_code not in (404, 410)
+
+
+def forget_media(media_id: int, wp_site_url: str) -> None:
+    """Drop every asset store entry pointing at a media item."""
+    ImageAsset.objects.filter(wp_site=site_key(wp_site_url), media_id=media_id).delete()
+
+
+def discard_media(media_id: int, wp_site_url: str, wp_user: str, wp_app_pass: str) -> None:
+    """Delete an uploaded media item nothing uses, and forget it in the asset store."""
+    forget_media(media_id, wp_site_url)
+    media_url = wp_site_url.rstrip("/") + f"/wp-json/wp/v2/media/{media_id}"
+    try:
+        http_client.request("DELETE", media_url, params={"force": "true"}, auth=(wp_user, wp_app_pass), timeout=30)
+    except Exception:
+        pass
+
+
+# ---------- Asset store ---------- #
+
+def _reuse(asset: ImageAsset) -> int:
+    ImageAsset.objects.filter(id=asset.id).update(uses=F("uses") + 1)
+    return asset.media_id
+
+
+def _still_uploaded(asset: Optional[ImageAsset], wp_site_url: str, wp_user: str, wp_app_pass: str) -> bool:
+    """Whether a stored asset's media item still exists; entries for deleted media are dropped."""
+    if asset is None:
+        return False
+    if media_exists(asset.media_id, wp_site_url, wp_user, wp_app_pass):
+        return True
+    forget_media(asset.media_id, wp_site_url)
+    return False
+
+
+def _remember(site: str, photo: Dict, content_hash: str, size: int, media_id: int) -> None:
+    try:
+        ImageAsset.objects.update_or_create(
+            wp_site=site,
+            pexels_id=photo["id"],
+            defaults={
+                "content_hash": content_hash,
+                "source_url": photo["url"],
+                "media_id": media_id,
+                "size_bytes": size,
+            },
+        )
+    except IntegrityError:
+        # Another process recorded the same photo first; its media ID is just as good.
+        pass
+
+
+def featured_media(
+    query: str,
+    slug: str,
+    wp_site_url: str,
+    wp_user: str,
+    wp_app_pass: str,
+) -> Tuple[Optional[int], Dict[str, int], Dict]:
+    """
+    WordPress media ID of a stock photo for `query`, uploading only when needed.
+
+    1. Pexels search results come from the per-query cache.
+    2. A photo already uploaded to this site (same Pexels ID) is reused with
+       no download or upload, once WordPress confirms the media still exists.
+    3. Otherwise the photo is streamed to disk and hashed; identical bytes
+       already in the library (same content hash) are reused too.
+    4. New images are downscaled/recompressed (imaging.py) and uploaded,
+       streamed from the file, with the matching content type.
+
+    Returns (media_id, timings, info): timings in milliseconds per stage;
+    info has "reused" (nothing uploaded) and, after processing,
+    bytes_before / bytes_after / bytes_saved.
+    """
+    site = site_key(wp_site_url)
+    timings = {}
+    info = {"reused": False}
+
+    with timed(timings, "image_search"):
+        photos = search_photos(query)
+    if not photos:
+        return None, timings, info
+    photo = photos[0]
+
+    def still_uploaded(asset):
+        if asset is None:
+            return False
+        with timed(timings, "image_verify"):
+            return _still_uploaded(asset, wp_site_url, wp_user, wp_app_pass)
+
+    def _obtain():
+        asset = ImageAsset.objects.filter(wp_site=site, pexels_id=photo["id"]).first()
+        if still_uploaded(asset):
+            return _reuse(asset), True
+
+        with timed(timings, "image_fetch"):
+            downloaded = download_to_file(photo["url"])
+        if not downloaded:
+            return None, False
+        path, content_hash, size = downloaded
+        created = [path]
+
+        try:
+            same_bytes = ImageAsset.objects.filter(wp_site=site, content_hash=content_hash).first()
+            if still_uploaded(same_bytes):
+                _remember(site, photo, content_hash, size, same_bytes.media_id)
+                return _reuse(same_bytes), True
+
+            upload = prepare_upload(path, timings, info)
+            created.append(Path(upload["path"]))
+
+            with timed(timings, "image_upload", bytes=upload["bytes_after"]):
+                media_id = upload_file_to_wordpress(
+                    Path(upload["path"]),
+                    f"{slug}.{upload['ext']}",
+                    wp_site_url,
+                    wp_user,
+                    wp_app_pass,
+                    content_type=upload["content_type"],
+                )
+            if media_id:
+                _remember(site, photo, content_hash, upload["bytes_after"], media_id)
+            return media_id, False
+        finally:
+            for leftover in created:
+                leftover.unlink(missing_ok=True)
+
+    # Concurrent publishes picking the same photo upload it once.
+    (media_id, reused), shared = _uploads.do(f"{site}|{photo['id']}", _obtain)
+    info["reused"] = reused or shared
+    return media_id, timings, info
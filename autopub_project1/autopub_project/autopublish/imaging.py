@@ -0,0 +1,133 @@
+# autopublish/imaging.py
+#
+# Runs inside worker processes: keep this module free of Django imports.
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+# ---------- Settings ---------- #
+
+IMAGE_OPTIMIZE = os.getenv("IMAGE_OPTIMIZE", "true").lower() in ("1", "true", "yes")
+IMAGE_MAX_WIDTH = int(os.getenv("IMAGE_MAX_WIDTH", "1600"))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "jpeg").lower()  # "jpeg" (progressive) or "webp"
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "82"))
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+
+FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "webp": ("WEBP", "image/webp", "webp"),
+}
+
+# Source formats that may be uploaded unchanged; anything else (GIF, BMP, TIFF, ...) is always re-encoded.
+KEEP_ORIGINAL = {
+    "JPEG": ("image/jpeg", "jpg"),
+    "PNG": ("image/png", "png"),
+    "WEBP": ("image/webp", "webp"),
+}
+
+
+def _ms(start: float) -> int:
+    return int((time.monotonic() - start) * 1000)
+
+
+# ---------- Processing ---------- #
+
+def optimize_image(
+    src: str,
+    dst: str,
+    max_width: int = IMAGE_MAX_WIDTH,
+    fmt: str = IMAGE_FORMAT,
+    quality: int = IMAGE_QUALITY,
+) -> Dict:
+    """
+    Downscale `src` to at most max_width pixels wide and re-encode it to
+    `dst` as progressive JPEG or WebP, dropping EXIF/ICC/XMP metadata
+    (orientation is applied to the pixels first).
+
+    When re-encoding would not make an unscaled JPEG, PNG or WebP smaller,
+    `dst` is not written and the original is kept. Returns {path,
+    content_type, ext, bytes_before, bytes_after, width, height, process_ms}.
+    """
+    start = time.monotonic()
+    pil_format, content_type, ext = FORMATS[fmt]
+    bytes_before = os.path.getsize(src)
+
+    with Image.open(src) as img:
+        original = KEEP_ORIGINAL.get(img.format)
+        img = ImageOps.exif_transpose(img)
+        resized = img.width > max_width
+        if resized:
+            img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+        if img.mode not in ("RGB", "L") and pil_format == "JPEG":
+            img = img.convert("RGB")
+
+        options = {"quality": quality, "optimize": True}
+        if pil_format == "JPEG":
+            options["progressive"] = True
+        else:
+            options["method"] = 6
+        # No exif=/icc_profile= arguments: the new file carries no metadata.
+        img.save(dst, pil_format, **options)
+        width, height = img.size
+
+    bytes_after = os.path.getsize(dst)
+    if original and not resized and bytes_after >= bytes_before:
+        os.unlink(dst)
+        return {
+            "path": src, "content_type": original[0], "ext": original[1],
+            "bytes_before": bytes_before, "bytes_after": bytes_before,
+            "width": width, "height": height, "process_ms": _ms(start),
+        }
+
+    return {
+        "path": dst, "content_type": content_type, "ext": ext,
+        "bytes_before": bytes_before, "bytes_after": bytes_after,
+        "width": width, "height": height, "process_ms": _ms(start),
+    }
+
+
+# ---------- Process pool ---------- #
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def process_pool() -> ProcessPoolExecutor:
+    """Shared pool for CPU-bound image work (spawned, so no forked DB connections or threads)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=IMAGE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _ready() -> None:
+    pass
+
+
+def start_pool() -> None:
+    """
+    Start the pool's worker processes in the background, so the first
+    publish does not pay for spawning them. Call at process startup
+    (wsgi/asgi, worker commands); returns immediately.
+    """
+    if not IMAGE_OPTIMIZE:
+        return
+    pool = process_pool()
+    # Each submit finds no idle worker yet and spawns one.
+    for _ in range(IMAGE_PROCESS_WORKERS):
+        pool.submit(_ready)
+
+
+def optimize_in_pool(src: str, dst: str, **options) -> Dict:
+    """optimize_image() in the process pool; the calling thread only waits."""
+    return process_pool().submit(optimize_image, src, dst, **options).result()
@@ -0,0 +1,177 @@
+# autopublish/jobs.py
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.db import close_old_connections, connections
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .drafts import save_draft
+from .models import GenerationJob
+from .pipeline import generate_draft
+from .tracing import start_trace
+
+# ---------- Settings ---------- #
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))
+# A running job whose heartbeat is older than this is assumed to have lost its worker.
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ---------- Queue ---------- #
+
+def enqueue_generation(user, keyword: str, force: bool = False) -> GenerationJob:
+    return GenerationJob.objects.create(user=user, keyword=keyword, force=force, stage="Queued")
+
+
+def claim_next_job(worker_id: str) -> Optional[GenerationJob]:
+    """
+    Atomically move the oldest queued job to "running" and return it.
+    The conditional UPDATE acts as a compare-and-swap, so several worker
+    processes can poll the same table without taking the same job.
+    """
+    candidates = (
+        GenerationJob.objects.filter(status="queued")
+        .order_by("created_at")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in candidates:
+        now = timezone.now()
+        claimed = GenerationJob.objects.filter(id=job_id, status="queued").update(
+            status="running",
+            worker=worker_id,
+            started_at=now,
+            heartbeat_at=now,
+            stage="Starting",
+        )
+        if claimed:
+            return GenerationJob.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs(older_than: int = JOB_STALE_AFTER) -> int:
+    """Put back jobs whose worker stopped sending heartbeats (it died mid-run)."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return GenerationJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status="running",
+    ).update(
+        status="queued",
+        worker="",
+        progress=0,
+        stage="Queued",
+    )
+
+
+# ---------- Execution ---------- #
+
+class Heartbeat:
+    """
+    Sets heartbeat_at on `rows` (a queryset matching the claimed row while
+    it is still claimed) from a background thread, for as long as it is entered.
+    """
+
+    def __init__(self, rows: QuerySet, name: str, interval: float = JOB_HEARTBEAT_INTERVAL):
+        self.rows = rows
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"{name}-heartbeat", daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                self.rows.update(heartbeat_at=timezone.now())
+        finally:
+            connections.close_all()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+FINISH_FIELDS = (
+    "status", "draft", "error", "progress", "stage",
+    "provider", "provider_latency_ms", "hedged", "trace_id", "finished_at",
+)
+
+
+def run_job(job: GenerationJob) -> GenerationJob:
+    def progress(percent, stage):
+        GenerationJob.objects.filter(id=job.id).update(progress=percent, stage=stage, heartbeat_at=timezone.now())
+
+    try:
+        claimed = GenerationJob.objects.filter(id=job.id, status="running", worker=job.worker)
+        with Heartbeat(claimed, f"job-{job.id}"), start_trace("generation", job.keyword) as trace:
+            job.trace_id = trace.id
+            result = generate_draft(job.keyword, progress=progress, force=job.force)
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        job.stage = "Failed"
+    else:
+        generation = result.get("generation", {})
+        job.status = "done"
+        job.draft = save_draft(job.user, result)
+        job.progress = 100
+        job.stage = "Done"
+        job.provider = generation.get("provider") or ""
+        job.provider_latency_ms = generation.get("latency_ms")
+        job.hedged = bool(generation.get("hedged"))
+
+    job.finished_at = timezone.now()
+    # Only the worker still holding the job may finish it: if it was requeued
+    # meanwhile, whoever claimed it next owns the outcome.
+    finished = GenerationJob.objects.filter(id=job.id, status="running", worker=job.worker).update(
+        **{name: getattr(job, name) for name in FINISH_FIELDS}
+    )
+    if not finished:
+        logger.warning("Job %s was taken from worker %s before it finished", job.id, job.worker)
+        if job.draft is not None:
+            job.draft.delete()
+        job.refresh_from_db()
+    return job
+
+
+def run_worker(
+    worker_id: Optional[str] = None,
+    poll_interval: float = JOB_POLL_INTERVAL,
+    once: bool = False,
+) -> int:
+    """Process queued jobs until interrupted (or until the queue is empty with once=True)."""
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    requeue_stale_jobs()
+    last_requeue = time.monotonic()
+
+    while True:
+        close_old_connections()
+        if time.monotonic() - last_requeue >= JOB_HEARTBEAT_INTERVAL:
+            requeue_stale_jobs()
+            last_requeue = time.monotonic()
+
+        job = claim_next_job(worker_id)
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        processed += 1
@@ -0,0 +1,98 @@
+import random
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from autopublish.context import CONTEXT_TOKEN_BUDGET, compress_context, estimate_tokens
+from autopublish.generator import build_prompt, generate_text_with_meta
+from autopublish.scraper import extract_text
+
+FILLER = [
+    "Many readers ask how to get the most value for their money",
+    "Experts recommend comparing several options before deciding",
+    "Prices vary by season and by retailer",
+    "Our editors tested each product for several weeks",
+    "Durability and comfort were the two deciding factors",
+    "Customer reviews often mention sizing problems",
+    "Shipping times depend on where you live",
+    "The brand has a long history in the industry",
+]
+
+BOILERPLATE = [
+    "We use cookies to improve your experience on our site.",
+    "Subscribe to our newsletter for weekly deals.",
+    "Copyright 2024. All rights reserved.",
+    "Share this article with your friends on social media.",
+]
+
+
+def synthetic_pages(keyword: str, pages: int = 10, seed: int = 0):
+    """Competitor-like pages: boilerplate, paragraphs copied between sites, relevant and off-topic prose."""
+    rng = random.Random(seed)
+    shared = [
+        f"{keyword.capitalize()} is one of the most searched topics this year. " + ". ".join(rng.sample(FILLER, 3)) + "."
+        for _ in range(4)
+    ]
+    texts = []
+    for page in range(pages):
+        lines = list(BOILERPLATE)
+        lines += rng.sample(shared, 3)
+        for i in range(14):
+            topic = keyword if i % 2 == 0 else rng.choice(["gardening", "travel insurance", "phone plans"])
+            lines.append(f"When it comes to {topic}, tip {page}-{i}: " + ". ".join(rng.sample(FILLER, 4)) + ".")
+        rng.shuffle(lines)
+        texts.append("\n\n".join(lines)[:3000])
+    return texts
+
+
+class Command(BaseCommand):
+    help = "Measure prompt size (and optionally LLM latency) with and without competitor context compression."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keyword", default="running shoes")
+        parser.add_argument("--pages", default=None, help="Directory of saved competitor pages (.html or .txt). Default: synthetic pages.")
+        parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET, help="Context token budget.")
+        parser.add_argument("--generate", action="store_true", help="Also call the configured LLM with both prompts (uncached).")
+        parser.add_argument("--runs", type=int, default=1, help="LLM calls per prompt when --generate is set.")
+
+    def handle(self, *args, **options):
+        keyword = options["keyword"]
+        if options["pages"]:
+            texts = []
+            for path in sorted(Path(options["pages"]).iterdir()):
+                if path.suffix in (".html", ".htm"):
+                    texts.append(extract_text(path.read_bytes(), path.name, max_chars=3000))
+                else:
+                    texts.append(path.read_text(encoding="utf-8", errors="replace"))
+        else:
+            texts = synthetic_pages(keyword)
+
+        serp = [{"title": f"Result {i}", "link": f"https://example.com/{i}", "snippet": ""} for i in range(5)]
+
+        raw_context = "\n\n".join(t for t in texts if t)
+        start = time.perf_counter()
+        compressed, stats = compress_context(keyword, texts, budget=options["budget"])
+        compress_ms = (time.perf_counter() - start) * 1000
+
+        prompts = {
+            "before": build_prompt(keyword, serp, raw_context),
+            "after": build_prompt(keyword, serp, compressed),
+        }
+
+        self.stdout.write(f"Pages: {len(texts)}  paragraphs: {stats['paragraphs']}  "
+                          f"duplicates removed: {stats['duplicates_removed']}  kept: {stats['paragraphs_kept']}")
+        self.stdout.write(f"Compression: {compress_ms:.1f} ms")
+        for label, prompt in prompts.items():
+            self.stdout.write(f"Prompt {label:<6} {len(prompt):>7} chars  ~{estimate_tokens(prompt):>6} tokens")
+
+        if not options["generate"]:
+            return
+
+        for label, prompt in prompts.items():
+            latencies = []
+            for _ in range(options["runs"]):
+                start = time.perf_counter()
+                generate_text_with_meta(prompt)
+                latencies.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(f"Generation {label:<6} avg {sum(latencies) / len(latencies):.0f} ms over {len(latencies)} run(s)")
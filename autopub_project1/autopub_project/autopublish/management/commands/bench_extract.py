@@ -0,0 +1,89 @@
+import random
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+from newspaper import Article
+
+from autopublish.extractor import fast_extract
+from autopublish.scraper import extract_text
+
+WORDS = "shoe running comfort price cushion trail road fit size brand review test foot heel grip".split()
+
+
+def synthetic_page(rng: random.Random, paragraphs: int = 200) -> bytes:
+    """A long article page wrapped in the usual scripts, navigation and footer."""
+    nav = "".join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(40))
+    script = "<script>" + "var a=1;" * 2000 + "</script>"
+    body = "".join(
+        f"<h2>Section {i}</h2>" if i % 10 == 0 else
+        "<p>" + " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 90))) + ".</p>"
+        for i in range(paragraphs)
+    )
+    html = (
+        f"<html><head><title>Page</title>{script}<style>p{{margin:0}}</style></head>"
+        f"<body><header><nav><ul>{nav}</ul></nav></header><article>{body}</article>"
+        f"<footer><p>Copyright. All rights reserved.</p></footer></body></html>"
+    )
+    return html.encode("utf-8")
+
+
+def legacy_extract(html: bytes, url: str, max_chars: int) -> str:
+    """The previous extraction path: newspaper, then BeautifulSoup's html.parser."""
+    text = ""
+    try:
+        article = Article(url)
+        article.download(input_html=html.decode("utf-8", errors="replace"))
+        article.parse()
+        text = article.text
+    except Exception:
+        pass
+    if not text:
+        soup = BeautifulSoup(html.decode("utf-8", errors="replace"), "html.parser")
+        text = "\n".join(p.get_text() for p in soup.find_all("p"))
+    return text[:max_chars]
+
+
+ENGINES = {
+    "legacy": legacy_extract,
+    "fast": lambda html, url, max_chars: fast_extract(html, max_chars),
+    "extract_text": lambda html, url, max_chars: extract_text(html, url, max_chars),
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark HTML text extraction throughput and peak memory (Python allocations, via tracemalloc) over a local corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", default=None, help="Directory of saved .html pages. Default: synthetic pages.")
+        parser.add_argument("--pages", type=int, default=20, help="Number of synthetic pages.")
+        parser.add_argument("--max-chars", type=int, default=3000)
+        parser.add_argument("--engines", default=",".join(ENGINES), help="Comma separated: " + ", ".join(ENGINES))
+
+    def handle(self, *args, **options):
+        if options["corpus"]:
+            corpus = [(p.name, p.read_bytes()) for p in sorted(Path(options["corpus"]).glob("*.htm*"))]
+        else:
+            rng = random.Random(0)
+            corpus = [(f"synthetic-{i}.html", synthetic_page(rng)) for i in range(options["pages"])]
+        if not corpus:
+            self.stderr.write("No pages found")
+            return
+
+        total_mb = sum(len(html) for _, html in corpus) / 1e6
+        self.stdout.write(f"{len(corpus)} pages, {total_mb:.1f} MB, max_chars={options['max_chars']}")
+
+        for name in options["engines"].split(","):
+            extract = ENGINES[name.strip()]
+            tracemalloc.start()
+            start = time.perf_counter()
+            chars = sum(len(extract(html, url, options["max_chars"])) for url, html in corpus)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(
+                f"{name:<13} {len(corpus) / elapsed:8.1f} pages/s  {elapsed * 1000 / len(corpus):7.1f} ms/page  "
+                f"peak {peak / 1e6:6.1f} MB  {chars / len(corpus):6.0f} chars/page"
+            )
@@ -0,0 +1,388 @@
+import json
+import logging
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from autopublish import generator, images, pipeline, publisher
+from autopublish.generator import stream_content_fake
+from autopublish.imaging import start_pool
+from autopublish.jobs import claim_next_job, run_job
+from autopublish.models import PublishedPost, SocialPost, UserProfile
+from autopublish.router import Provider, ProviderRouter
+from autopublish.stubserver import ROUTES, Fixtures, StubServer
+from autopublish.tracing import span_stats
+
+SCENARIOS = ("generate", "publish", "api_posts", "api_social")
+DEFAULT_LATENCY = "serp=400,page=150,pexels=150,image=250,wp_post=300,wp_media=400"
+PASSWORD = "bench-password"
+
+
+def parse_latency(spec: str) -> dict:
+    """"serp=400,page=150" -> {"serp": 400.0, ...}; a bare number applies to every route."""
+    spec = spec.strip()
+    if not spec:
+        return {}
+    if "=" not in spec:
+        return {route: float(spec) for route in ROUTES}
+    latency = {}
+    for part in spec.split(","):
+        route, _, ms = part.partition("=")
+        route = route.strip()
+        if route not in ROUTES:
+            raise CommandError(f"Unknown route {route!r}, expected one of: {', '.join(ROUTES)}")
+        latency[route] = float(ms)
+    return latency
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * pct), len(sorted_values) - 1)]
+
+
+def rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if platform.system() == "Darwin" else 1024)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the keyword-to-publish pipeline offline: SerpApi, competitor pages, Pexels and "
+        "WordPress are replayed by a local stub server with injected latency, the LLM is the fake "
+        "provider, and the views are driven concurrently against a throwaway database. "
+        "Reports throughput, latency percentiles, per-stage spans and peak memory as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20, help="Requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients.")
+        parser.add_argument("--workers", type=int, default=None, help="Generation worker threads (default: --concurrency).")
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated: " + ", ".join(SCENARIOS))
+        parser.add_argument("--latency", default=DEFAULT_LATENCY,
+                            help="Injected upstream latency in ms, per route (" + ", ".join(ROUTES) + ") or one number for all.")
+        parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter as a fraction (0.2 = +/-20%%).")
+        parser.add_argument("--llm-delay", type=float, default=0.01, help="Fake LLM delay per 16-character chunk, seconds.")
+        parser.add_argument("--fixtures", default=None, help="Fixtures directory (serp.json, pexels.json, image.jpg, pages/). Default: synthetic.")
+        parser.add_argument("--dump-fixtures", default=None, help="Write the synthetic fixtures to this directory and exit.")
+        parser.add_argument("--output", default=None, help="JSON results file. Default: cache/bench/pipeline-<timestamp>.json")
+        parser.add_argument("--baseline", default=None, help="Earlier results file to compare against.")
+        parser.add_argument("--tracemalloc", action="store_true",
+                            help="Also report peak Python allocations (slows CPU-bound stages several times over).")
+
+    def handle(self, *args, **options):
+        if options["dump_fixtures"]:
+            Fixtures.synthetic().dump(options["dump_fixtures"])
+            self.stdout.write(self.style.SUCCESS(f"Fixtures written to {options['dump_fixtures']}"))
+            return
+
+        scenarios = [s.strip() for s in options["scenarios"].split(",") if s.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        fixtures = Fixtures.load(options["fixtures"]) if options["fixtures"] else Fixtures.synthetic()
+        latency = parse_latency(options["latency"])
+        options["workers"] = options["workers"] or options["concurrency"]
+        # One line per trace would drown the report.
+        logging.getLogger("autopublish.tracing").setLevel(logging.WARNING)
+        # Like wsgi.py at server startup.
+        start_pool()
+
+        with tempfile.TemporaryDirectory(prefix="autopublish-bench-") as tmp:
+            with StubServer(fixtures, latency, options["jitter"]) as stub:
+                self._point_at_stub(stub.url, options["llm_delay"], tmp)
+                results = self._run(scenarios, options, Path(tmp) / "bench.sqlite3")
+                results["stub"] = dict(stub.counts)
+
+        results["config"] = {
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "workers": options["workers"],
+            "latency_ms": latency,
+            "jitter": options["jitter"],
+            "llm_delay": options["llm_delay"],
+            "fixtures": options["fixtures"] or "synthetic",
+        }
+        results["started_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        results["python"] = platform.python_version()
+
+        output = Path(options["output"] or Path(settings.BASE_DIR) / "cache" / "bench" /
+                      f"pipeline-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+        self._report(results)
+        if options["baseline"]:
+            self._compare(results, json.loads(Path(options["baseline"]).read_text(encoding="utf-8")))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    # ---------- Setup ---------- #
+
+    def _point_at_stub(self, base: str, llm_delay: float, tmp: str) -> None:
+        pipeline.SERPAPI_URL = f"{base}/serpapi/search.json"
+        pipeline.SERPAPI_KEY = "bench"
+        images.PEXELS_SEARCH_URL = f"{base}/pexels/v1/search"
+        images.IMAGE_DOWNLOAD_DIR = str(Path(tmp) / "images")
+        os.environ["PEXELS_API_KEY"] = "bench"
+        publisher.WP_SITE_URL = base
+        publisher.WP_USERNAME = "bench"
+        publisher.WP_APP_PASSWORD = "bench"
+        generator.router = ProviderRouter([
+            Provider("fake", "fake", lambda prompt: "".join(stream_content_fake(prompt, delay=llm_delay))),
+        ])
+
+    def _run(self, scenarios, options, db_path: Path) -> dict:
+        # A file database (rather than in-memory) so client and worker threads share it.
+        # SQLite locking options (BEGIN IMMEDIATE, busy timeout) come from settings.DATABASES.
+        connection.settings_dict["TEST"]["NAME"] = str(db_path)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            users = []
+            for i in range(options["concurrency"]):
+                user = User.objects.create_user(f"bench{i}", password=PASSWORD)
+                UserProfile.objects.create(user=user, daily_post_limit=10 ** 6)
+                users.append(user)
+
+            state = {"drafts": [], "tokens": {}}
+            results = {"scenarios": {}}
+            for name in scenarios:
+                self.stdout.write(f"Running {name}...")
+                results["scenarios"][name] = getattr(self, f"_scenario_{name}")(users, state, options)
+            results["stages"] = span_stats()
+            return results
+        finally:
+            close_old_connections()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _measure(self, tasks, options) -> dict:
+        """Run callables on `concurrency` threads; each returns None on success or an error string."""
+        latencies, errors = [], []
+        lock = threading.Lock()
+        trace_memory = options["tracemalloc"]
+
+        def run(task):
+            try:
+                start = time.perf_counter()
+                error = task()
+                elapsed = (time.perf_counter() - start) * 1000
+            except Exception as e:
+                elapsed, error = None, f"{type(e).__name__}: {e}"
+            finally:
+                close_old_connections()
+            with lock:
+                if error:
+                    errors.append(error)
+                else:
+                    latencies.append(elapsed)
+
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"], thread_name_prefix="bench-client") as pool:
+            list(pool.map(run, tasks))
+        wall = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            "requests": len(tasks),
+            "ok": len(latencies),
+            "errors": len(errors),
+            "error_samples": sorted(set(errors))[:5],
+            "wall_s": round(wall, 3),
+            "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                "p50": round(percentile(latencies, 0.50), 1),
+                "p95": round(percentile(latencies, 0.95), 1),
+                "p99": round(percentile(latencies, 0.99), 1),
+                "max": round(latencies[-1], 1) if latencies else 0.0,
+            },
+            "peak_python_mb": round(peak / 1e6, 1) if peak is not None else None,
+            "peak_rss_mb": round(rss_mb(), 1),
+        }
+
+    # ---------- Scenarios ---------- #
+
+    def _scenario_generate(self, users, state, options) -> dict:
+        """ask_keyword -> generation job (worker threads) -> generate_content_view -> draft preview."""
+        stop = threading.Event()
+
+        def worker(n):
+            while not stop.is_set():
+                job = claim_next_job(f"bench-worker-{n}")
+                if job is None:
+                    time.sleep(0.02)
+                    continue
+                run_job(job)
+            close_old_connections()
+
+        def task(i):
+            user = users[i % len(users)]
+            client = Client()
+            client.force_login(user)
+
+            def run():
+                client.post("/ask/", {"keyword": f"running shoes {i}"})
+                job_id = client.session["job_id"]
+                deadline = time.monotonic() + 120
+                while time.monotonic() < deadline:
+                    res = client.get("/generate/", {"job": job_id})
+                    if res.status_code == 302:
+                        break
+                    if res.status_code != 200:
+                        return f"generate_content_view returned {res.status_code}"
+                    time.sleep(0.05)
+                else:
+                    return "generation timed out"
+                res = client.get(res.url)
+                if res.status_code != 200:
+                    return f"draft preview returned {res.status_code}"
+                state["drafts"].append((user, client.session["draft_id"]))
+                return None
+            return run
+
+        workers = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(options["workers"])]
+        for t in workers:
+            t.start()
+        try:
+            return self._measure([task(i) for i in range(options["requests"])], options)
+        finally:
+            stop.set()
+            for t in workers:
+                t.join()
+
+    def _scenario_publish(self, users, state, options) -> dict:
+        """publish_content for drafts left by the generate scenario (image search/optimize/upload + post)."""
+        if not state["drafts"]:
+            raise CommandError("The publish scenario needs drafts: run it after the generate scenario.")
+
+        def task(user, draft_id):
+            client = Client()
+            client.force_login(user)
+
+            def run():
+                res = client.post("/publish/", {"draft_id": draft_id})
+                if res.status_code != 200 or "publish_result.html" not in [t.name for t in res.templates]:
+                    return f"publish_content returned {res.status_code}: {res.content[:100]!r}"
+                return None
+            return run
+
+        drafts, state["drafts"] = state["drafts"], []
+        return self._measure([task(user, draft_id) for user, draft_id in drafts], options)
+
+    def _token(self, user, state) -> str:
+        if user.id not in state["tokens"]:
+            res = Client().post("/api/token/", {"username": user.username, "password": PASSWORD})
+            state["tokens"][user.id] = res.json()["access"]
+        return state["tokens"][user.id]
+
+    def _ensure_posts(self, users) -> None:
+        # API scenarios run on their own too: give every user something to list.
+        for user in users:
+            if not PublishedPost.objects.filter(user=user).exists():
+                PublishedPost.objects.bulk_create(
+                    PublishedPost(user=user, keyword=f"running shoes {i}", title=f"Running shoes {i}",
+                                  wp_post_id=i, wp_link=f"https://example.com/?p={i}")
+                    for i in range(100)
+                )
+
+    def _api_task(self, user, state, method, path, data=None):
+        auth = f"Bearer {self._token(user, state)}"
+
+        def run():
+            client = Client(HTTP_AUTHORIZATION=auth)
+            if method == "post":
+                res = client.post(path, data, content_type="application/json")
+            else:
+                res = client.get(path, data)
+            if res.status_code != 200:
+                return f"{path} returned {res.status_code}"
+            return None
+        return run
+
+    def _scenario_api_posts(self, users, state, options) -> dict:
+        """GET /api/posts/ pages, alternating full rows and a sparse field set."""
+        self._ensure_posts(users)
+        tasks = []
+        for i in range(options["requests"]):
+            params = {"limit": 50} if i % 2 == 0 else {"limit": 50, "fields": "id,title,wp_link"}
+            tasks.append(self._api_task(users[i % len(users)], state, "get", "/api/posts/", params))
+        return self._measure(tasks, options)
+
+    def _scenario_api_social(self, users, state, options) -> dict:
+        """POST /api/social/generate/ (one LLM caption per request)."""
+        self._ensure_posts(users)
+        post_ids = {
+            user.id: list(PublishedPost.objects.filter(user=user).values_list("id", flat=True)[:50])
+            for user in users
+        }
+        platforms = [p for p, _ in SocialPost.PLATFORM_CHOICES]
+        tasks = []
+        for i in range(options["requests"]):
+            user = users[i % len(users)]
+            ids = post_ids[user.id]
+            tasks.append(self._api_task(user, state, "post", "/api/social/generate/", {
+                "post_id": ids[i % len(ids)],
+                "platform": platforms[i % len(platforms)],
+            }))
+        return self._measure(tasks, options)
+
+    # ---------- Reporting ---------- #
+
+    def _report(self, results) -> None:
+        self.stdout.write(
+            f"\n{'scenario':<12} {'ok':>5} {'err':>4} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'py MB':>7} {'rss MB':>7}"
+        )
+        for name, r in results["scenarios"].items():
+            lat = r["latency_ms"]
+            peak = "-" if r["peak_python_mb"] is None else f"{r['peak_python_mb']:.1f}"
+            self.stdout.write(
+                f"{name:<12} {r['ok']:>5} {r['errors']:>4} {r['throughput_rps']:>7.2f} {lat['p50']:>8.0f} "
+                f"{lat['p95']:>8.0f} {lat['p99']:>8.0f} {peak:>7} {r['peak_rss_mb']:>7.1f}"
+            )
+            for sample in r["error_samples"]:
+                self.stdout.write(self.style.WARNING(f"  {sample}"))
+
+        self.stdout.write(f"\n{'stage':<28} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for row in results["stages"]:
+            self.stdout.write(
+                f"{row['kind'] + '/' + row['name']:<28} {row['count']:>6} {row['p50_ms']:>8} "
+                f"{row['p95_ms']:>8} {row['p99_ms']:>8}"
+            )
+        self.stdout.write("\nStub requests: " + ", ".join(f"{k}={v}" for k, v in results["stub"].items()))
+
+    def _compare(self, results, baseline) -> None:
+        def change(new, old):
+            return f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+
+        self.stdout.write(f"\n{'vs baseline':<12} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for name, r in results["scenarios"].items():
+            old = baseline.get("scenarios", {}).get(name)
+            if not old:
+                continue
+            self.stdout.write(
+                f"{name:<12} {change(r['throughput_rps'], old['throughput_rps']):>8} "
+                + " ".join(f"{change(r['latency_ms'][p], old['latency_ms'][p]):>8}" for p in ("p50", "p95", "p99"))
+            )
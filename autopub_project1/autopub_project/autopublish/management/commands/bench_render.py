@@ -0,0 +1,97 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from markdown2 import markdown
+
+from autopublish.rendering import SAFE_MODE, render_markdown, section_cache
+
+WORDS = "shoe running comfort price cushion trail road fit size brand review test foot heel grip **support** *weight*".split()
+
+
+def synthetic_draft(words: int, section_words: int = 300, seed: int = 0) -> str:
+    """A draft shaped like the LLM's: H2 sections of paragraphs, lists and the odd table."""
+    rng = random.Random(seed)
+    lines = ["# Synthetic draft", "", "Intro " + " ".join(rng.choice(WORDS) for _ in range(80)) + ".", ""]
+    written = 80
+    section = 0
+    while written < words:
+        section += 1
+        lines += [f"## Section {section}", ""]
+        budget = min(section_words, words - written)
+        written += budget
+        while budget > 0:
+            n = min(rng.randint(40, 90), budget)
+            budget -= n
+            kind = rng.random()
+            if kind < 0.15:
+                lines += [f"- {' '.join(rng.choice(WORDS) for _ in range(8))}" for _ in range(max(n // 8, 1))]
+            elif kind < 0.2:
+                lines += ["| Model | Price | Weight |", "|---|---|---|"]
+                lines += [f"| {rng.choice(WORDS)} | ${rng.randint(50, 250)} | {rng.randint(200, 400)} g |" for _ in range(4)]
+            else:
+                lines.append(" ".join(rng.choice(WORDS) for _ in range(n)) + ".")
+            lines.append("")
+    return "\n".join(lines)
+
+
+def edit_one_section(text: str) -> str:
+    head, sep, tail = text.rpartition("## Section 3\n")
+    return head + sep + "\nEdited paragraph added to this section.\n" + tail if sep else text + "\nEdited.\n"
+
+
+def ms(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) * 1000 / runs
+
+
+class Command(BaseCommand):
+    help = "Compare whole-document markdown rendering with the sectioned render cache on long drafts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--words", default="5000,10000,20000", help="Comma separated draft sizes in words.")
+        parser.add_argument("--runs", type=int, default=3, help="Timed runs per measurement.")
+        parser.add_argument("--chunk", type=int, default=400, help="Characters streamed between preview renders.")
+
+    def handle(self, *args, **options):
+        runs = options["runs"]
+        chunk = options["chunk"]
+        for words in [int(w) for w in options["words"].split(",") if w.strip()]:
+            draft = synthetic_draft(words)
+            edited = edit_one_section(draft)
+
+            full = ms(lambda: markdown(draft, safe_mode=SAFE_MODE), runs)
+
+            section_cache.clear()
+            start = time.perf_counter()
+            render_markdown(draft)
+            cold = (time.perf_counter() - start) * 1000
+            warm = ms(lambda: render_markdown(draft), runs)
+
+            full_edit = ms(lambda: markdown(edited, safe_mode=SAFE_MODE), runs)
+            start = time.perf_counter()
+            render_markdown(edited)
+            cached_edit = (time.perf_counter() - start) * 1000
+
+            self.stdout.write(f"{words} words, {len(draft)} chars, {draft.count(chr(10) + '## ')} sections")
+            self.stdout.write(f"  full render      {full:>9.1f} ms")
+            self.stdout.write(f"  sectioned cold   {cold:>9.1f} ms")
+            self.stdout.write(f"  sectioned warm   {warm:>9.1f} ms")
+            self.stdout.write(f"  one section edit {full_edit:>9.1f} ms full  {cached_edit:>7.1f} ms sectioned")
+
+            # A streamed preview re-renders the growing draft every `chunk` characters.
+            prefixes = [draft[:end] for end in range(chunk, len(draft) + chunk, chunk)]
+            section_cache.clear()
+            start = time.perf_counter()
+            for prefix in prefixes:
+                markdown(prefix, safe_mode=SAFE_MODE)
+            stream_full = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for prefix in prefixes:
+                render_markdown(prefix, cache_tail=False)
+            stream_cached = (time.perf_counter() - start) * 1000
+            self.stdout.write(f"  stream preview   {stream_full:>9.1f} ms full  {stream_cached:>7.1f} ms sectioned "
+                              f"({len(prefixes)} renders)")
+            self.stdout.write(f"  cache: {section_cache.stats()}")
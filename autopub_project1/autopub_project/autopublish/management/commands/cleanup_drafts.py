@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from autopublish.drafts import delete_expired_drafts
+
+
+class Command(BaseCommand):
+    help = "Delete generated drafts whose DRAFT_TTL has passed."
+
+    def handle(self, *args, **options):
+        deleted = delete_expired_drafts()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired draft(s)"))
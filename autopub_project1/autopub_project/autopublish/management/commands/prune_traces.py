@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from autopublish.tracing import TRACE_RETENTION, prune_traces
+
+
+class Command(BaseCommand):
+    help = "Delete trace spans older than TRACE_RETENTION seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=TRACE_RETENTION, help="Age in seconds.")
+
+    def handle(self, *args, **options):
+        deleted = prune_traces(options["older_than"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} span(s)"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from autopublish.campaigns import CAMPAIGN_POLL_INTERVAL, run_campaign_worker
+from autopublish.imaging import start_pool
+from autopublish.jobs import default_worker_id
+
+
+class Command(BaseCommand):
+    help = "Run a background worker that processes queued keyword campaigns."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--worker-id", default=None, help="Name recorded on claimed campaigns.")
+        parser.add_argument("--poll", type=float, default=CAMPAIGN_POLL_INTERVAL, help="Seconds between polls when idle.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"] or default_worker_id()
+        self.stdout.write(f"Campaign worker {worker_id} started")
+        start_pool()
+        try:
+            processed = run_campaign_worker(worker_id, poll_interval=options["poll"], once=options["once"])
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} campaign(s)"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from autopublish.jobs import JOB_POLL_INTERVAL, default_worker_id, run_worker
+
+
+class Command(BaseCommand):
+    help = "Run a background worker that processes queued article generation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--worker-id", default=None, help="Name recorded on claimed jobs.")
+        parser.add_argument("--poll", type=float, default=JOB_POLL_INTERVAL, help="Seconds between polls when idle.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"] or default_worker_id()
+        self.stdout.write(f"Generation worker {worker_id} started")
+        try:
+            processed = run_worker(worker_id, poll_interval=options["poll"], once=options["once"])
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)"))
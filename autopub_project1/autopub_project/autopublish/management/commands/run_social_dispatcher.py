@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from autopublish.jobs import default_worker_id
+from autopublish.social_dispatch import (
+    SOCIAL_BATCH_SIZE,
+    SOCIAL_CONCURRENCY,
+    SOCIAL_POLL_INTERVAL,
+    run_dispatcher,
+)
+
+
+class Command(BaseCommand):
+    help = "Run a worker that publishes due social posts through the platform adapters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--worker-id", default=None, help="Name recorded on claimed posts.")
+        parser.add_argument("--poll", type=float, default=SOCIAL_POLL_INTERVAL, help="Seconds between polls when idle.")
+        parser.add_argument("--batch", type=int, default=SOCIAL_BATCH_SIZE, help="Posts claimed per round.")
+        parser.add_argument("--concurrency", type=int, default=SOCIAL_CONCURRENCY, help="Posts dispatched in parallel.")
+        parser.add_argument("--once", action="store_true", help="Exit once no posts are due.")
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"] or default_worker_id()
+        self.stdout.write(f"Social dispatcher {worker_id} started")
+        try:
+            totals = run_dispatcher(
+                worker_id,
+                poll_interval=options["poll"],
+                batch_size=options["batch"],
+                concurrency=options["concurrency"],
+                once=options["once"],
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"Posted {totals['posted']}, failed {totals['failed']}, requeued {totals['requeued']}"))
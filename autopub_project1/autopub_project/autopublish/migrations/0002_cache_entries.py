@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('hits', models.PositiveBigIntegerField(default=0)),
+                ('misses', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=64)),
+                ('value', models.JSONField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('stored_at', models.DateTimeField()),
+                ('accessed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['namespace', 'accessed_at'], name='autopublish_namespa_a33a4c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('namespace', 'key'), name='uniq_cache_entry')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SocialPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('instagram', 'Instagram'), ('facebook', 'Facebook'), ('linkedin', 'LinkedIn'), ('medium', 'Medium'), ('pinterest', 'Pinterest')], max_length=20)),
+                ('caption', models.TextField(blank=True)),
+                ('image_url', models.URLField(blank=True, null=True)),
+                ('pinterest_url', models.URLField(blank=True, null=True)),
+                ('scheduled_for', models.DateTimeField(blank=True, null=True)),
+                ('posted_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('posted', 'Posted'), ('failed', 'Failed')], default='scheduled', max_length=20)),
+                ('response_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('published_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='social_posts', to='autopublish.publishedpost')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0004_campaigns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='force',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0005_generation_job_force'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='hedged',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='provider',
+            field=models.CharField(blank=True, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='provider_latency_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_quota_counters(apps, schema_editor):
+    """Seed today's counters from posts published before the counter existed."""
+    from datetime import datetime, time, timedelta
+
+    from django.utils import timezone
+
+    UserProfile = apps.get_model("autopublish", "UserProfile")
+    PublishedPost = apps.get_model("autopublish", "PublishedPost")
+
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    for profile in UserProfile.objects.all():
+        profile.quota_date = today
+        profile.quota_used = PublishedPost.objects.filter(
+            user_id=profile.user_id,
+            created_at__gte=start,
+            created_at__lt=start + timedelta(days=1),
+        ).count()
+        profile.save(update_fields=["quota_date", "quota_used"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0007_generated_drafts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='quota_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='quota_used',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='publishedpost',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='post_user_created_idx'),
+        ),
+        migrations.RunPython(fill_quota_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0008_dashboard_indexes_quota_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishedpost',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='publishedpost',
+            index=models.Index(fields=['user', 'keyword', '-created_at'], name='post_user_keyword_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publishedpost',
+            index=models.Index(fields=['user', 'updated_at'], name='post_user_updated_idx'),
+        ),
+    ]
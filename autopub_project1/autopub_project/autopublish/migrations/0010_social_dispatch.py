@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0009_post_keyword_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socialpost',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='socialpost',
+            name='worker',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='socialpost',
+            name='status',
+            field=models.CharField(choices=[('scheduled', 'Scheduled'), ('dispatching', 'Dispatching'), ('posted', 'Posted'), ('failed', 'Failed')], default='scheduled', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='socialpost',
+            index=models.Index(fields=['status', 'scheduled_for'], name='autopublish_status_30ad25_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:33
+
+import autopublish.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0010_social_dispatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishedpost',
+            name='body_markdown',
+            field=autopublish.fields.CompressedTextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='publishedpost',
+            name='key_phrases',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='publishedpost',
+            name='summary',
+            field=models.TextField(blank=True),
+        ),
+    ]
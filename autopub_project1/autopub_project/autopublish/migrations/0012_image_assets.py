@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0011_published_post_body_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wp_site', models.CharField(max_length=255)),
+                ('pexels_id', models.BigIntegerField(blank=True, null=True)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('source_url', models.URLField(blank=True, max_length=500)),
+                ('media_id', models.PositiveIntegerField()),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('uses', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['wp_site', 'content_hash'], name='autopublish_wp_site_750cf0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('wp_site', 'pexels_id'), name='image_asset_site_photo')],
+            },
+        ),
+    ]
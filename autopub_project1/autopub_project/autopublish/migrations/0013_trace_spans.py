@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0012_image_assets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='trace_id',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.CreateModel(
+            name='TraceSpan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trace_id', models.CharField(db_index=True, max_length=32)),
+                ('kind', models.CharField(max_length=20)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('name', models.CharField(max_length=60)),
+                ('offset_ms', models.PositiveIntegerField(default=0)),
+                ('duration_ms', models.PositiveIntegerField()),
+                ('ok', models.BooleanField(default=True)),
+                ('meta', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'kind'], name='autopublish_created_3dfc6e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0013_trace_spans'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('tat', models.FloatField(default=0)),
+                ('rate', models.FloatField(default=0)),
+                ('burst', models.FloatField(default=0)),
+                ('granted', models.PositiveBigIntegerField(default=0)),
+                ('waited_ms', models.PositiveBigIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('throttled', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
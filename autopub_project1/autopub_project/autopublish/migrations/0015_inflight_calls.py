@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:53
+
+import autopublish.fields
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autopublish', '0014_rate_limit_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InflightCall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('token', models.UUIDField(default=uuid.uuid4, unique=True)),
+                ('owner', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('expired', 'Expired')], default='running', max_length=10)),
+                ('result', autopublish.fields.CompressedJSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('key',), name='uniq_running_inflight_call')],
+            },
+        ),
+    ]
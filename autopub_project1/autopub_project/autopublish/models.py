@@ -1,13 +1,85 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+import uuid
+from datetime import datetime, time, timedelta
+
+from .fields import CompressedJSONField, CompressedTextField
 
 User = get_user_model()
 
 
+def day_bounds(day=None):
+    """[start, end) datetimes of a local calendar day, for index-friendly range filters."""
+    day = day or timezone.localdate()
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     daily_post_limit = models.PositiveIntegerField(default=5)
 
+    # Posts published on quota_date; a stale date means nothing was published today.
+    quota_date = models.DateField(null=True, blank=True)
+    quota_used = models.PositiveIntegerField(default=0)
+
+    def posts_used_today(self):
+        if self.quota_date != timezone.localdate():
+            return 0
+        return self.quota_used
+
+    def record_post(self):
+        """Count one published post against today's quota (atomic across processes)."""
+        today = timezone.localdate()
+        profiles = UserProfile.objects.filter(pk=self.pk)
+        if not profiles.filter(quota_date=today).update(quota_used=F("quota_used") + 1):
+            if not profiles.exclude(quota_date=today).update(quota_date=today, quota_used=1):
+                # Another process rolled the date over first.
+                profiles.update(quota_used=F("quota_used") + 1)
+        self.refresh_from_db(fields=["quota_date", "quota_used"])
+
+    def reserve_post(self):
+        """
+        Take one of today's remaining slots, atomically across processes.
+        Returns False when the limit is reached. A reserved slot counts as a
+        published post; give it back with release_post() if publishing fails.
+        """
+        today = timezone.localdate()
+        profiles = UserProfile.objects.filter(pk=self.pk)
+        today_left = profiles.filter(quota_date=today, quota_used__lt=F("daily_post_limit"))
+        reserved = today_left.update(quota_used=F("quota_used") + 1)
+        if not reserved:
+            reserved = profiles.exclude(quota_date=today).filter(daily_post_limit__gt=0).update(
+                quota_date=today, quota_used=1
+            )
+            if not reserved:
+                # Another process rolled the date over first.
+                reserved = today_left.update(quota_used=F("quota_used") + 1)
+        self.refresh_from_db(fields=["quota_date", "quota_used"])
+        return bool(reserved)
+
+    def release_post(self):
+        """Give back a slot taken with reserve_post()."""
+        UserProfile.objects.filter(pk=self.pk, quota_date=timezone.localdate(), quota_used__gt=0).update(
+            quota_used=F("quota_used") - 1
+        )
+        self.refresh_from_db(fields=["quota_date", "quota_used"])
+
+    def recount_today(self):
+        """Rebuild the counter from PublishedPost (e.g. after posts were deleted)."""
+        start, end = day_bounds()
+        self.quota_date = timezone.localdate()
+        self.quota_used = PublishedPost.objects.filter(
+            user=self.user, created_at__gte=start, created_at__lt=end
+        ).count()
+        self.save(update_fields=["quota_date", "quota_used"])
+
+    def remaining_today(self):
+        return max(self.daily_post_limit - self.posts_used_today(), 0)
+
     def __str__(self):
         return f"Profile for {self.user.username}"
 
@@ -24,7 +96,24 @@ class PublishedPost(models.Model):
     image_id = models.IntegerField(null=True, blank=True)
     word_count = models.PositiveIntegerField(default=0)
 
+    # Stored at publish time so repurposing never has to fetch the post back from WordPress
+    body_markdown = CompressedTextField(null=True, blank=True)
+    summary = models.TextField(blank=True)
+    key_phrases = models.JSONField(default=list, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    # Changes the /api/posts/ ETag when an existing post is edited
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Dashboard/API listing (keyset on created_at, id) and the daily range count
+            models.Index(fields=["user", "-created_at", "-id"], name="post_user_created_idx"),
+            # /api/posts/?keyword=...
+            models.Index(fields=["user", "keyword", "-created_at"], name="post_user_keyword_idx"),
+            # /api/posts/ ETag: count and newest updated_at straight from the index
+            models.Index(fields=["user", "updated_at"], name="post_user_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.user.username})"
@@ -41,6 +130,7 @@ class SocialPost(models.Model):
 
     STATUS_CHOICES = [
         ("scheduled", "Scheduled"),
+        ("dispatching", "Dispatching"),
         ("posted", "Posted"),
         ("failed", "Failed"),
     ]
@@ -72,5 +162,314 @@ class SocialPost(models.Model):
     response_message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Set by the dispatcher that claimed the post (see social_dispatch.py)
+    worker = models.CharField(max_length=100, blank=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "scheduled_for"]),
+        ]
+
     def __str__(self):
         return f"{self.platform} → {self.published_post.title}"
+
+
+class CacheEntry(models.Model):
+    """A cached JSON value (SERP results, ...) grouped by namespace."""
+    namespace = models.CharField(max_length=50)
+    key = models.CharField(max_length=64)
+
+    value = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+
+    stored_at = models.DateTimeField()
+    accessed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["namespace", "key"], name="uniq_cache_entry"),
+        ]
+        indexes = [
+            models.Index(fields=["namespace", "accessed_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.namespace}:{self.key}"
+
+
+class CacheStat(models.Model):
+    """Hit/miss counters for one cache, shared by all processes."""
+    name = models.CharField(max_length=50, unique=True)
+    hits = models.PositiveBigIntegerField(default=0)
+    misses = models.PositiveBigIntegerField(default=0)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self):
+        return f"{self.name}: {self.hits} hits / {self.misses} misses"
+
+
+class GenerationJob(models.Model):
+    """One article generation, run by a background worker."""
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    keyword = models.CharField(max_length=255)
+    force = models.BooleanField(default=False)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    progress = models.PositiveSmallIntegerField(default=0)
+    stage = models.CharField(max_length=100, blank=True)
+
+    draft = models.ForeignKey(
+        "GeneratedDraft",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+    )
+    error = models.TextField(blank=True)
+
+    # Which LLM provider answered, and how long the provider call took
+    provider = models.CharField(max_length=30, blank=True)
+    provider_latency_ms = models.PositiveIntegerField(blank=True, null=True)
+    hedged = models.BooleanField(default=False)
+
+    worker = models.CharField(max_length=100, blank=True)
+    trace_id = models.CharField(max_length=32, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    # Refreshed by the worker while the job runs (see jobs.py)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in ("done", "failed")
+
+    def __str__(self):
+        return f"{self.keyword} [{self.status}]"
+
+
+class Campaign(models.Model):
+    """A batch of keywords generated (and optionally published) in one go."""
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=255, blank=True)
+
+    parallelism = models.PositiveSmallIntegerField(default=2)
+    publish = models.BooleanField(default=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    error = models.TextField(blank=True)
+
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    # Refreshed by the worker while the campaign runs (see campaigns.requeue_stale_campaigns)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name or 'Campaign'} #{self.id} [{self.status}]"
+
+
+class CampaignItem(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("generating", "Generating"),
+        ("generated", "Generated"),
+        ("published", "Published"),
+        ("skipped", "Skipped"),
+        ("failed", "Failed"),
+    ]
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="items")
+    keyword = models.CharField(max_length=255)
+    position = models.PositiveIntegerField(default=0)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    published_post = models.ForeignKey(
+        PublishedPost,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="campaign_items",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["position"]
+
+    def __str__(self):
+        return f"{self.keyword} [{self.status}]"
+
+
+class GeneratedDraft(models.Model):
+    """
+    A generated article waiting to be published.
+    The preview data (content_data, rendered HTML, competitors, ...) is stored
+    compressed; sessions and API clients only carry the draft ID.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    keyword = models.CharField(max_length=255)
+
+    content = CompressedJSONField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    @property
+    def data(self):
+        return self.content["data"]
+
+    @property
+    def content_html(self):
+        return self.content["content_html"]
+
+    @property
+    def slug(self):
+        return self.content["slug"]
+
+    def __str__(self):
+        return f"Draft {self.keyword} ({self.id})"
+
+
+class ImageAsset(models.Model):
+    """
+    A stock photo already uploaded to a WordPress site's media library.
+    Looked up by Pexels photo ID, or by content hash for the same bytes
+    found under another ID, so repeat images reuse media_id.
+    """
+    wp_site = models.CharField(max_length=255)
+    pexels_id = models.BigIntegerField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+
+    source_url = models.URLField(max_length=500, blank=True)
+    media_id = models.PositiveIntegerField()
+    size_bytes = models.PositiveIntegerField(default=0)
+
+    uses = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["wp_site", "pexels_id"], name="image_asset_site_photo"),
+        ]
+        indexes = [
+            models.Index(fields=["wp_site", "content_hash"]),
+        ]
+
+    def __str__(self):
+        return f"Pexels {self.pexels_id} -> media {self.media_id} ({self.wp_site})"
+
+
+class TraceSpan(models.Model):
+    """One timed stage of a traced generation or publish (see tracing.py)."""
+    trace_id = models.CharField(max_length=32, db_index=True)
+    kind = models.CharField(max_length=20)
+    label = models.CharField(max_length=255, blank=True)
+
+    name = models.CharField(max_length=60)
+    offset_ms = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField()
+    ok = models.BooleanField(default=True)
+    meta = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "kind"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}/{self.name} {self.duration_ms} ms"
+
+
+class RateLimitBucket(models.Model):
+    """
+    Shared GCRA state for one upstream quota (see ratelimit.py): `tat` is the
+    theoretical arrival time, in epoch seconds, of the next unit of capacity.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    tat = models.FloatField(default=0)
+
+    rate = models.FloatField(default=0)
+    burst = models.FloatField(default=0)
+
+    granted = models.PositiveBigIntegerField(default=0)
+    waited_ms = models.PositiveBigIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    throttled = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.rate:g}/s, burst {self.burst:g}"
+
+
+class InflightCall(models.Model):
+    """
+    Advisory row for a computation shared between processes (see
+    singleflight.SharedFlight). At most one row per key is "running"; its
+    owner holds the key until expires_at. Finished rows keep the result
+    briefly for the callers that were waiting on their `token`.
+    """
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+        ("expired", "Expired"),
+    ]
+
+    key = models.CharField(max_length=64)
+    token = models.UUIDField(default=uuid.uuid4, unique=True)
+    owner = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="running")
+
+    result = CompressedJSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    started_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=models.Q(status="running"),
+                name="uniq_running_inflight_call",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.key} [{self.status}]"
@@ -0,0 +1,166 @@
+# autopublish/page_cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+
+# ---------- Settings ---------- #
+
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR") or str(Path(settings.BASE_DIR) / "cache" / "pages")
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "86400"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+# The directory is only scanned for eviction once this many bytes were written since the last scan.
+PAGE_CACHE_EVICT_EVERY = int(os.getenv("PAGE_CACHE_EVICT_EVERY", str(PAGE_CACHE_MAX_BYTES // 20)))
+
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid")
+
+
+# ---------- URL normalization ---------- #
+
+def normalize_url(url: str) -> str:
+    """Canonical form used as the cache key (no fragment, tracking params or default port)."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (
+        (scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)
+    ):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+# ---------- Disk store ---------- #
+
+class PageCache:
+    """
+    Extracted page text stored as one JSON file per normalized URL.
+
+    Entries younger than `ttl` are served as-is; older ones carry their
+    ETag/Last-Modified so the caller can revalidate with a conditional GET.
+    When the directory grows past `max_bytes` the least recently used files
+    (by mtime, refreshed on every hit) are removed. The directory is scanned
+    on the first write and then after every `evict_every` bytes written, so
+    it can overshoot max_bytes by at most that much.
+    """
+
+    def __init__(self, root: str, ttl: int, max_bytes: int, evict_every: int = PAGE_CACHE_EVICT_EVERY):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._evict_lock = threading.Lock()
+        # Bytes written since the last scan; None until the first one.
+        self._written: Optional[int] = None
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the stored entry (with an extra "fresh" flag) or None."""
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entry["fresh"] = time.time() - entry.get("fetched_at", 0) < self.ttl
+        return entry
+
+    def touch(self, url: str, revalidated: bool = False) -> None:
+        """Mark an entry as recently used; `revalidated` also restarts its TTL."""
+        path = self._path(url)
+        if revalidated:
+            entry = self.get(url)
+            if entry:
+                entry.pop("fresh", None)
+                entry["fetched_at"] = time.time()
+                self._write(path, entry)
+                return
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def put(
+        self,
+        url: str,
+        text: str,
+        max_chars: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        entry = {
+            "url": normalize_url(url),
+            "text": text,
+            "max_chars": max_chars,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        written = self._write(self._path(url), entry)
+        with self._evict_lock:
+            due = self._written is None or self._written + written >= self.evict_every
+            self._written = (self._written or 0) + written
+        if due:
+            self.evict()
+
+    def _write(self, path: Path, entry: Dict) -> int:
+        """Atomically replace `path` with `entry`; returns the bytes written (0 on failure)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+                written = f.tell()
+            os.replace(tmp, path)
+            return written
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return 0
+
+    def evict(self) -> None:
+        with self._evict_lock:
+            self._written = 0
+            files = []
+            total = 0
+            for shard in self.root.glob("*"):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard):
+                    if entry.name.endswith(".json"):
+                        st = entry.stat()
+                        files.append((st.st_mtime, st.st_size, entry.path))
+                        total += st.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(files):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+page_cache = PageCache(PAGE_CACHE_DIR, PAGE_CACHE_TTL, PAGE_CACHE_MAX_BYTES)
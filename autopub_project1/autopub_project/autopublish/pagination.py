@@ -0,0 +1,51 @@
+# autopublish/pagination.py
+
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+
+# ---------- Cursors ---------- #
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    raw = f"{created_at.isoformat()}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """(created_at, id) from a cursor, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, pk = raw.split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# ---------- Keyset pagination ---------- #
+
+def keyset_page(queryset: QuerySet, cursor: Optional[str], page_size: int) -> Tuple[List, Optional[str]]:
+    """
+    Newest-first page of `queryset` after `cursor`, ordered by (created_at, id).
+
+    Instead of OFFSET, each page continues below the last row of the previous
+    one, so the (user, created_at, id) index serves every page in the same
+    time no matter how deep it is. Returns (rows, next_cursor); next_cursor is
+    None on the last page. Raises ValueError for a malformed cursor.
+    """
+    queryset = queryset.order_by("-created_at", "-id")
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise ValueError(f"Invalid cursor {cursor!r}")
+        created_at, pk = position
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,288 @@
+# autopublish/pipeline.py
+
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from . import http_client
+from .cache import make_key, normalize_query
+from .context import CONTEXT_COMPRESSION, compress_context
+from .generator import GenerationError, active_provider, generate_article_with_meta, stream_article
+from .ratelimit import acquire, backoff, retry_after
+from .rendering import render_markdown
+from .scraper import scrape_many
+from .singleflight import SharedFlight
+from .tracing import span
+from .utils import cached_serp
+
+load_dotenv()
+
+SERPAPI_KEY = os.getenv("SERPAPI_KEY")
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search.json")
+STREAM_RENDER_INTERVAL = float(os.getenv("STREAM_RENDER_INTERVAL", "0.25"))
+GENERATION_COALESCING = os.getenv("GENERATION_COALESCING", "true").lower() in ("1", "true", "yes")
+
+draft_flight = SharedFlight()
+
+
+# ---------------- COMPETITOR FETCH ---------------- #
+def fetch_competitors(keyword: str):
+    with span("serp") as s:
+        try:
+            competitors = cached_serp("serpapi:en", keyword, 5, _fetch_competitors)
+        except Exception as e:
+            s.update(failed=True, error=str(e)[:200])
+            return []
+        s["results"] = len(competitors)
+        return competitors
+
+
+def _fetch_competitors(keyword: str):
+    params = {
+        "engine": "google",
+        "q": keyword,
+        "api_key": SERPAPI_KEY,
+        "hl": "en",
+        "num": 5,
+    }
+
+    acquire("serpapi")
+    res = http_client.get(SERPAPI_URL, params=params, timeout=20, rate_limited=True)
+    if res.status_code == 429:
+        backoff("serpapi", retry_after(res))
+    if res.status_code != 200:
+        return []
+
+    data = res.json()
+    competitors = []
+
+    for result in data.get("organic_results", []):
+        competitors.append({
+            "title": result.get("title"),
+            "link": result.get("link"),
+            "snippet": result.get("snippet"),
+        })
+
+    return competitors
+
+
+def competitor_urls(competitors, max_articles=10):
+    return [c.get("link") for c in competitors[:max_articles] if c.get("link")]
+
+
+def competitor_context(keyword: str, texts: List[Optional[str]]) -> str:
+    """Scraped page texts -> prompt context (deduplicated, ranked and token-budgeted when CONTEXT_COMPRESSION is on)."""
+    if CONTEXT_COMPRESSION:
+        with span("compress_context") as s:
+            context, stats = compress_context(keyword, texts)
+            s.update(stats)
+        return context
+    return "\n\n".join(t for t in texts if t)
+
+
+def scrape_competitor_content(keyword, competitors, max_articles=10, max_chars=3000):
+    urls = competitor_urls(competitors, max_articles)
+    with span("scrape_all", urls=len(urls)) as s:
+        texts = scrape_many(urls, max_chars=max_chars)
+        s["pages"] = sum(1 for t in texts if t)
+    return competitor_context(keyword, texts)
+
+
+# ---------------- CLEAN GPT OUTPUT ---------------- #
+def clean_output(raw):
+    bad_keys = ["meta_title", "meta_description", "title", "body_markdown"]
+    cleaned = "\n".join(
+        l for l in raw.splitlines() if not any(k in l for k in bad_keys)
+    )
+    return re.sub(r"^[\{\}\[\]]+$", "", cleaned).strip()
+
+
+def parse_article_output(raw_output: str, keyword: str) -> Dict:
+    """Turn the raw LLM output into the content_data dict (falls back to plain markdown)."""
+    try:
+        data = json.loads(raw_output)
+    except Exception:
+        cleaned = clean_output(raw_output)
+        data = {
+            "meta_title": keyword,
+            "meta_description": f"Guide to {keyword}",
+            "title": f"Complete Guide to {keyword}",
+            "body_markdown": cleaned,
+        }
+    return data
+
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "", '"': '"', "\\": "\\", "/": "/", "b": "", "f": ""}
+
+
+def _partial_json_string(raw: str, field: str) -> Optional[str]:
+    """Decode as much of a JSON string field as has arrived so far."""
+    match = re.search(r'"%s"\s*:\s*"' % field, raw)
+    if not match:
+        return None
+
+    out = []
+    i = match.end()
+    while i < len(raw):
+        ch = raw[i]
+        if ch == '"':
+            break
+        if ch == "\\":
+            if i + 1 >= len(raw):
+                break
+            esc = raw[i + 1]
+            if esc == "u":
+                if i + 6 > len(raw):
+                    break
+                try:
+                    out.append(chr(int(raw[i + 2:i + 6], 16)))
+                except ValueError:
+                    pass
+                i += 6
+                continue
+            out.append(_ESCAPES.get(esc, esc))
+            i += 2
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def partial_markdown(raw: str) -> str:
+    """Best-effort markdown for a response that is still streaming (JSON or plain markdown)."""
+    if not raw.lstrip().startswith(("{", "```")):
+        return raw
+
+    body = _partial_json_string(raw, "body_markdown")
+    title = _partial_json_string(raw, "title")
+    parts = []
+    if title:
+        parts.append(f"# {title}")
+    if body:
+        parts.append(body)
+    return "\n\n".join(parts)
+
+
+# ---------------- FULL GENERATION ---------------- #
+def build_draft(keyword: str, competitors, data: Dict) -> Dict:
+    """Everything the preview page needs for one generated article."""
+    with span("render"):
+        content_html = render_markdown(f"# {data['title']}\n\n{data['body_markdown']}")
+    return {
+        "keyword": keyword,
+        "competitors": competitors,
+        "data": data,
+        "content_html": content_html,
+        "slug": keyword.lower().replace(" ", "-"),
+    }
+
+
+def write_draft(keyword: str, competitors, competitor_content: str, force: bool = False) -> Dict:
+    """
+    LLM call plus parsing/rendering, given already fetched competitor data.
+    force=True bypasses the generation cache. Raises GenerationError when
+    no provider produced an article.
+    """
+    raw_output, generation = generate_article_with_meta(
+        keyword,
+        competitors,
+        competitor_content,
+        900,
+        force=force,
+    )
+    if not raw_output or raw_output.startswith("Error:"):
+        raise GenerationError(raw_output[len("Error:"):].strip() or "The provider returned no content")
+    draft = build_draft(keyword, competitors, parse_article_output(raw_output, keyword))
+    draft["generation"] = {
+        "provider": generation["provider"],
+        "model": generation["model"],
+        "latency_ms": generation["latency_ms"],
+        "hedged": generation["hedged"],
+    }
+    return draft
+
+
+def draft_key(keyword: str, force: bool = False, word_count: int = 900) -> str:
+    """Identity of a generation: normalized keyword plus everything else that changes the output."""
+    provider, model = active_provider()
+    return make_key("draft", normalize_query(keyword), word_count, provider, model, force)
+
+
+def generate_draft(
+    keyword: str,
+    progress: Optional[Callable[[int, str], None]] = None,
+    force: bool = False,
+) -> Dict:
+    """
+    Run SERP lookup, scraping and the LLM call for one keyword.
+    `progress(percent, stage)` is called between steps.
+    Returns everything the preview page needs.
+
+    With GENERATION_COALESCING, concurrent calls with the same draft_key,
+    in this process or any other, wait for a single run and share its
+    draft (marked generation["coalesced"]).
+    """
+    report = progress or (lambda percent, stage: None)
+    if not GENERATION_COALESCING:
+        return _generate_draft(keyword, report, force)
+
+    draft, shared = draft_flight.do(
+        draft_key(keyword, force),
+        lambda: _generate_draft(keyword, report, force),
+        on_wait=lambda: report(10, "Waiting for an identical generation"),
+    )
+    if shared:
+        draft = {**draft, "generation": {**draft.get("generation", {}), "coalesced": True}}
+    return draft
+
+
+def _generate_draft(keyword: str, report: Callable[[int, str], None], force: bool) -> Dict:
+    report(5, "Fetching competitors")
+    competitors = fetch_competitors(keyword)
+
+    report(25, "Reading competitor pages")
+    competitor_content = scrape_competitor_content(keyword, competitors)
+
+    report(50, "Writing the article")
+    return write_draft(keyword, competitors, competitor_content, force=force)
+
+
+def stream_draft(keyword: str, force: bool = False) -> Iterator[Tuple[str, Dict]]:
+    """
+    Streaming counterpart of generate_draft.
+    Yields (event, payload) pairs: "stage", "competitors", "preview" (progressively
+    rendered HTML, throttled to STREAM_RENDER_INTERVAL) and finally "done" with
+    the same dict generate_draft returns, or "failed" when the provider errored.
+    """
+    yield "stage", {"stage": "Fetching competitors"}
+    competitors = fetch_competitors(keyword)
+    yield "competitors", {"competitors": competitors}
+
+    yield "stage", {"stage": "Reading competitor pages"}
+    competitor_content = scrape_competitor_content(keyword, competitors)
+
+    yield "stage", {"stage": "Writing the article"}
+    raw_output = ""
+    last_render = 0.0
+    started = time.monotonic()
+    with span("llm_stream") as s:
+        try:
+            for chunk in stream_article(keyword, competitors, competitor_content, 900, force=force):
+                if not raw_output:
+                    s["first_chunk_ms"] = int((time.monotonic() - started) * 1000)
+                raw_output += chunk
+                now = time.monotonic()
+                if now - last_render >= STREAM_RENDER_INTERVAL:
+                    last_render = now
+                    # Finished sections come from the render cache; only the growing last one is re-rendered.
+                    yield "preview", {"html": render_markdown(partial_markdown(raw_output), cache_tail=False)}
+        except GenerationError as e:
+            s["failed"] = True
+            yield "failed", {"error": str(e)}
+            return
+
+    yield "done", build_draft(keyword, competitors, parse_article_output(raw_output, keyword))
@@ -0,0 +1,180 @@
+# autopublish/publisher.py
+
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from . import http_client
+from .images import attach_media, discard_media, featured_media, forget_media
+from .models import PublishedPost, UserProfile
+from .textutils import key_phrases, summarize
+from .tracing import propagate, timed
+
+load_dotenv()
+
+WP_SITE_URL = os.getenv("WP_SITE_URL")
+WP_USERNAME = os.getenv("WP_USERNAME")
+WP_APP_PASSWORD = os.getenv("WP_APP_PASSWORD")
+
+# How long post creation waits for the featured image before going ahead without it.
+PUBLISH_IMAGE_GRACE = float(os.getenv("PUBLISH_IMAGE_GRACE", "1.5"))
+
+logger = logging.getLogger(__name__)
+
+
+def _ms(start: float) -> int:
+    return int((time.monotonic() - start) * 1000)
+
+
+# ---------- Image stage ---------- #
+
+def acquire_featured_image(title: str, slug: str) -> Tuple[Optional[int], Dict[str, int], Dict]:
+    """Find (or reuse) a featured image for the title. Returns (media_id, timings, image info)."""
+    return featured_media(title, slug, WP_SITE_URL, WP_USERNAME, WP_APP_PASSWORD)
+
+
+def _image_result(future: Future, timeout: Optional[float] = None) -> Tuple[Optional[int], Dict[str, int], Dict]:
+    """The image stage's result; a failed image stage means publishing without an image."""
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        raise
+    except Exception as e:
+        logger.warning("featured image failed: %s", e)
+        return None, {}, {"reused": False, "error": str(e)}
+
+
+def _error_code(res) -> Optional[str]:
+    try:
+        return res.json().get("code")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _find_post(posts_url: str, auth, slug: str) -> Optional[Dict]:
+    """The published post with this slug, if WordPress has one."""
+    try:
+        res = http_client.get(
+            posts_url,
+            auth=auth,
+            params={"slug": slug, "status": "publish", "_fields": "id,link"},
+            timeout=30,
+        )
+        found = res.json() if res.status_code == 200 else []
+    except Exception:
+        return None
+    return found[0] if found else None
+
+
+# ---------- Full publish ---------- #
+
+def publish_article(data: Dict, html: str, slug: str) -> Dict:
+    """
+    Publish a generated article to WordPress.
+
+    The Pexels search/download/upload runs in a background thread as soon as
+    publishing starts. If it finishes within PUBLISH_IMAGE_GRACE seconds the
+    media ID goes straight into the post creation request; otherwise the post
+    is created without it and featured_media is set once the image is ready.
+    A newly uploaded image is attached to the post, or deleted again when the
+    post could not be created. An image that fails is simply left out.
+
+    Returns {"ok", "post", "featured_id", "image", "error", "timings"} where
+    timings are milliseconds per stage and image is featured_media()'s info.
+    """
+    started = time.monotonic()
+    auth = (WP_USERNAME, WP_APP_PASSWORD)
+    posts_url = f"{WP_SITE_URL}/wp-json/wp/v2/posts"
+    timings = {}
+
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="publish-image")
+    image_future = pool.submit(propagate(acquire_featured_image), data["title"], slug)
+
+    try:
+        featured_id, image, image_done = None, {}, False
+        try:
+            featured_id, image_timings, image = _image_result(image_future, timeout=PUBLISH_IMAGE_GRACE)
+            timings.update(image_timings)
+            image_done = True
+        except TimeoutError:
+            pass
+        inline_image = featured_id is not None
+
+        payload = {
+            "title": data["title"],
+            "content": html,
+            "status": "publish",
+            "slug": slug,
+        }
+        if inline_image:
+            payload["featured_media"] = featured_id
+
+        with timed(timings, "post_create") as s:
+            res = http_client.post(posts_url, auth=auth, json=payload, timeout=30)
+            s["status"] = res.status_code
+
+        post = res.json() if res.status_code in (200, 201) else None
+        if post is None and inline_image and _error_code(res) == "rest_invalid_featured_media":
+            # The reused media was deleted in WordPress, which rejects it only after creating
+            # the post: forget the asset and carry on with that post, without an image.
+            forget_media(featured_id, WP_SITE_URL)
+            featured_id, image = None, {**image, "error": "featured media no longer exists"}
+            post = _find_post(posts_url, auth, slug)
+
+        if post is None:
+            # The image may already be uploading: wait for it so it can be removed again.
+            if not image_done:
+                featured_id, _, image = _image_result(image_future)
+            if featured_id and not image.get("reused"):
+                discard_media(featured_id, WP_SITE_URL, WP_USERNAME, WP_APP_PASSWORD)
+            timings["total"] = _ms(started)
+            return {"ok": False, "post": None, "featured_id": None, "image": image, "error": res.text, "timings": timings}
+
+        if not image_done:
+            featured_id, image_timings, image = _image_result(image_future)
+            timings.update(image_timings)
+        if featured_id and not image.get("reused"):
+            # Only sets the media item's parent post, so nothing waits for it.
+            pool.submit(attach_media, featured_id, post["id"], WP_SITE_URL, WP_USERNAME, WP_APP_PASSWORD)
+        if featured_id and not inline_image:
+            with timed(timings, "featured_update"):
+                http_client.post(
+                    f"{posts_url}/{post['id']}",
+                    auth=auth,
+                    json={"featured_media": featured_id},
+                    timeout=30,
+                )
+    finally:
+        pool.shutdown(wait=False)
+
+    timings["total"] = _ms(started)
+    return {"ok": True, "post": post, "featured_id": featured_id, "image": image, "error": "", "timings": timings}
+
+
+def save_published_post(user, keyword: str, data: Dict, result: Dict, quota_reserved: bool = False) -> PublishedPost:
+    """
+    Record a successful publish_article() result. quota_reserved=True means
+    the post's daily quota slot was already taken with reserve_post().
+    """
+    post = result["post"]
+    body = data["body_markdown"]
+    published = PublishedPost.objects.create(
+        user=user,
+        wp_post_id=post["id"],
+        wp_link=post["link"],
+        title=data["title"],
+        keyword=keyword,
+        image_id=result["featured_id"],
+        word_count=len(body.split()),
+        body_markdown=body,
+        summary=summarize(body),
+        key_phrases=key_phrases(body),
+    )
+    if not quota_reserved:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        profile.record_post()
+    return published
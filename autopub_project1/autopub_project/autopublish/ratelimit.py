@@ -0,0 +1,194 @@
+# autopublish/ratelimit.py
+
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from django.db import IntegrityError
+from django.db.models import F
+
+from .context import estimate_tokens
+from .models import RateLimitBucket
+from .tracing import span
+
+# ---------- Settings ---------- #
+
+RATE_LIMITING = os.getenv("RATE_LIMITING", "true").lower() in ("1", "true", "yes")
+# name=count/period[:burst], period being s, m, h or d (optionally with a multiplier, e.g. 15m).
+# *_tokens buckets are LLM token budgets: each call costs its prompt plus RATE_LIMIT_LLM_OUTPUT_TOKENS.
+RATE_LIMITS = os.getenv(
+    "RATE_LIMITS",
+    "serpapi=1/s:5,pexels=200/h:20,"
+    "openai=500/m:20,openai_tokens=200000/m:30000,"
+    "cohere=20/m:5,cohere_tokens=100000/m:20000",
+)
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "60"))
+RATE_LIMIT_LLM_OUTPUT_TOKENS = int(os.getenv("RATE_LIMIT_LLM_OUTPUT_TOKENS", "1800"))
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class RateLimited(Exception):
+    """The wait for a quota slot would exceed the caller's max_wait; nothing was reserved."""
+
+    def __init__(self, name: str, wait: float):
+        super().__init__(f"{name} rate limit: next slot in {wait:.1f}s")
+        self.name = name
+        self.wait = wait
+
+
+class Limit:
+    """`rate` units per second, with up to `burst` units usable back to back."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate
+
+    @property
+    def tolerance(self) -> float:
+        return self.burst * self.interval
+
+    def __repr__(self):
+        return f"Limit({self.rate:g}/s, burst={self.burst:g})"
+
+
+def parse_limits(spec: str) -> Dict[str, Limit]:
+    limits = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r"([\w.-]+)=(\d+(?:\.\d+)?)/(\d*)([smhd])(?::(\d+(?:\.\d+)?))?", part)
+        if not match:
+            raise ValueError(f"Bad rate limit {part!r}, expected name=count/period[:burst]")
+        name, count, multiplier, period, burst = match.groups()
+        seconds = int(multiplier or 1) * PERIODS[period]
+        limits[name] = Limit(float(count) / seconds, float(burst) if burst else 1.0)
+    return limits
+
+
+LIMITS = parse_limits(RATE_LIMITS)
+
+
+# ---------- Buckets (GCRA) ---------- #
+
+def _tat(name: str) -> float:
+    try:
+        return RateLimitBucket.objects.values_list("tat", flat=True).get(name=name)
+    except RateLimitBucket.DoesNotExist:
+        try:
+            RateLimitBucket.objects.create(name=name)
+        except IntegrityError:
+            pass
+        return RateLimitBucket.objects.values_list("tat", flat=True).get(name=name)
+
+
+def acquire(
+    name: str,
+    cost: float = 1,
+    max_wait: Optional[float] = RATE_LIMIT_MAX_WAIT,
+    limit: Optional[Limit] = None,
+) -> float:
+    """
+    Reserve `cost` units of the `name` quota, sleeping until they are due.
+    Returns the seconds waited. Names without a configured limit (and
+    RATE_LIMITING=false) pass straight through.
+
+    The bucket is a single DB row shared by every process. A reservation
+    moves its theoretical arrival time forward with a compare-and-swap
+    UPDATE, so callers are served in the order they reserved instead of
+    all retrying at once. If the wait would exceed max_wait (None: no
+    limit), nothing is reserved and RateLimited is raised.
+    """
+    limit = limit or LIMITS.get(name)
+    if not RATE_LIMITING or limit is None or limit.rate <= 0:
+        return 0.0
+
+    tat = _tat(name)
+    while True:
+        now = time.time()
+        new_tat = max(tat, now) + cost * limit.interval
+        wait = max(new_tat - limit.tolerance - now, 0.0)
+        if max_wait is not None and wait > max_wait:
+            RateLimitBucket.objects.filter(name=name).update(rejected=F("rejected") + 1)
+            raise RateLimited(name, wait)
+
+        reserved = RateLimitBucket.objects.filter(name=name, tat=tat).update(
+            tat=new_tat,
+            rate=limit.rate,
+            burst=limit.burst,
+            granted=F("granted") + round(cost),
+            waited_ms=F("waited_ms") + int(wait * 1000),
+        )
+        if reserved:
+            break
+        tat = _tat(name)
+
+    if wait:
+        with span("rate_limit", bucket=name, wait_ms=int(wait * 1000)):
+            time.sleep(wait)
+    return wait
+
+
+def backoff(name: str, retry_after: Optional[float] = None) -> None:
+    """
+    The upstream answered 429: hold every caller of `name` back for
+    retry_after seconds (default: one burst window) instead of letting
+    each worker find out on its own.
+    """
+    limit = LIMITS.get(name)
+    if not RATE_LIMITING or limit is None or limit.rate <= 0:
+        return
+    delay = retry_after if retry_after is not None else limit.tolerance
+    target = time.time() + delay + limit.tolerance
+    _tat(name)
+    RateLimitBucket.objects.filter(name=name).update(throttled=F("throttled") + 1)
+    RateLimitBucket.objects.filter(name=name, tat__lt=target).update(tat=target)
+
+
+def retry_after(response) -> Optional[float]:
+    """Seconds from a response's Retry-After header (the delta-seconds form), if any."""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def acquire_llm(provider: str, prompt: str, max_wait: Optional[float] = RATE_LIMIT_MAX_WAIT) -> float:
+    """Request slot plus token budget for one LLM call to `provider`."""
+    waited = acquire(provider, max_wait=max_wait)
+    tokens = estimate_tokens(prompt) + RATE_LIMIT_LLM_OUTPUT_TOKENS
+    return waited + acquire(f"{provider}_tokens", tokens, max_wait=max_wait)
+
+
+# ---------- Utilization ---------- #
+
+def rate_limit_stats() -> List[Dict]:
+    """
+    Per bucket: configured rate, utilization of the burst allowance right
+    now (1.0 = no headroom), how far callers are queued ahead (queue_s) and
+    lifetime counters.
+    """
+    now = time.time()
+    rows = []
+    for bucket in RateLimitBucket.objects.order_by("name"):
+        limit = LIMITS.get(bucket.name) or Limit(bucket.rate, bucket.burst)
+        ahead = max(bucket.tat - now, 0.0)
+        tolerance = limit.tolerance if limit.rate > 0 else 0.0
+        rows.append({
+            "name": bucket.name,
+            "rate_per_s": round(limit.rate, 4),
+            "burst": limit.burst,
+            "utilization": round(min(ahead / tolerance, 1.0), 3) if tolerance else 0.0,
+            "queue_s": round(max(ahead - tolerance, 0.0), 2),
+            "granted": bucket.granted,
+            "waited_s": round(bucket.waited_ms / 1000, 1),
+            "rejected": bucket.rejected,
+            "throttled": bucket.throttled,
+        })
+    return rows
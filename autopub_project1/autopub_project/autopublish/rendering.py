@@ -0,0 +1,113 @@
+# autopublish/rendering.py
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from markdown2 import markdown
+
+# ---------- Settings ---------- #
+
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "4096"))
+
+# safe_mode="escape" escapes raw HTML in the LLM output and neutralizes
+# javascript:/data: links, so the rendered HTML can go to WordPress as-is.
+SAFE_MODE = "escape"
+
+_H2 = re.compile(r"^(?=## )", re.MULTILINE)
+# [label]: url definitions are shared by the whole document, so sections can't be rendered apart.
+_LINK_DEFINITION = re.compile(r"^ {0,3}\[[^\]]+\]:\s*\S", re.MULTILINE)
+
+
+# ---------- Section cache ---------- #
+
+class SectionCache:
+    """LRU of rendered HTML keyed by the hash of a section's markdown (per process)."""
+
+    def __init__(self, max_entries: int = RENDER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return html
+
+    def set(self, key: str, html: str) -> None:
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+section_cache = SectionCache()
+
+
+# ---------- Rendering ---------- #
+
+def split_sections(text: str) -> List[str]:
+    """Markdown split before every H2 heading (the text before the first one is a section too)."""
+    if _LINK_DEFINITION.search(text):
+        return [text]
+    return [section for section in _H2.split(text) if section]
+
+
+def render_section(text: str, cache: bool = True) -> str:
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    html = section_cache.get(key) if cache else None
+    if html is None:
+        html = markdown(text, safe_mode=SAFE_MODE)
+        if cache:
+            section_cache.set(key, html)
+    return html
+
+
+def render_markdown(text: str, cache_tail: bool = True) -> str:
+    """
+    Sanitized HTML for a markdown document, rendered section by section.
+    Sections already rendered (same text, any document) come from the
+    cache, so a re-render only pays for the sections that changed.
+
+    cache_tail=False skips caching the last section, for documents that
+    are still growing (streamed previews).
+    """
+    sections = split_sections(text)
+    parts = [
+        render_section(section, cache=cache_tail or i < len(sections) - 1)
+        for i, section in enumerate(sections)
+    ]
+    # markdown2 separates blocks with a blank line; each part already ends with one newline.
+    # The result matches a whole-document render, except that an H2 is never pulled into
+    # a blockquote above it by lazy continuation.
+    return "\n".join(parts)
+
+
+def render_stats() -> Dict:
+    return section_cache.stats()
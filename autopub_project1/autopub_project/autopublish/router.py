@@ -0,0 +1,253 @@
+# autopublish/router.py
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .ratelimit import RateLimited, acquire_llm
+from .tracing import propagate, span
+
+# ---------- Settings ---------- #
+
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "50"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+ROUTER_TIMEOUT = float(os.getenv("ROUTER_TIMEOUT", "90"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+ROUTER_HEDGE = os.getenv("ROUTER_HEDGE", "false").lower() in ("1", "true", "yes")
+ROUTER_HEDGE_MIN_DELAY = float(os.getenv("ROUTER_HEDGE_MIN_DELAY", "2"))
+# How often the router checks whether an attempt that has not started calling its provider yet has.
+ROUTER_POLL_INTERVAL = 0.1
+
+
+# ---------- Providers ---------- #
+
+class Provider:
+    """A named text backend: call(prompt) -> text. Raising or returning "Error: ..." counts as a failure."""
+
+    def __init__(self, name: str, model: str, call: Callable[[str], str]):
+        self.name = name
+        self.model = model
+        self.call = call
+
+    def __repr__(self):
+        return f"Provider({self.name!r}, {self.model!r})"
+
+
+class ProviderHealth:
+    """Rolling window of (latency seconds, ok) samples for one provider."""
+
+    def __init__(self, window: int = ROUTER_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((latency, ok))
+
+    def snapshot(self) -> List[Tuple[float, bool]]:
+        with self._lock:
+            return list(self._samples)
+
+    def error_rate(self) -> float:
+        samples = self.snapshot()
+        if not samples:
+            return 0.0
+        return sum(1 for _, ok in samples if not ok) / len(samples)
+
+    def p95(self) -> Optional[float]:
+        """95th percentile latency of successful calls, or None until enough samples exist."""
+        latencies = sorted(latency for latency, ok in self.snapshot() if ok)
+        if len(latencies) < ROUTER_MIN_SAMPLES:
+            return None
+        return latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+
+    def as_dict(self) -> Dict:
+        samples = self.snapshot()
+        ok = [latency for latency, success in samples if success]
+        p95 = self.p95()
+        return {
+            "samples": len(samples),
+            "error_rate": round(self.error_rate(), 3),
+            "avg_ms": int(sum(ok) / len(ok) * 1000) if ok else None,
+            "p95_ms": int(p95 * 1000) if p95 is not None else None,
+        }
+
+
+class _Attempt:
+    """One provider call, run on its own thread."""
+
+    def __init__(self, provider: Provider):
+        self.provider = provider
+        self.future = Future()
+        # monotonic time the provider call began; the timeout and hedge clocks start here
+        self.started: Optional[float] = None
+        self._settled = False
+        self._lock = threading.Lock()
+
+    def settle(self) -> bool:
+        """True for the first caller only: the attempt's single health sample is theirs to record."""
+        with self._lock:
+            if self._settled:
+                return False
+            self._settled = True
+            return True
+
+
+# ---------- Router ---------- #
+
+class ProviderRouter:
+    """
+    Sends a prompt to the healthiest provider, in preference order.
+
+    - Failover: if the provider errors or does not answer within `timeout`,
+      the next provider is tried.
+    - Hedging (opt-in): if the provider has not answered within its rolling
+      p95 latency (never less than `hedge_min_delay`), the next provider is
+      started too and whichever succeeds first wins.
+    Each attempt runs on its own thread, and both clocks start when it begins
+    calling the provider, so abandoned calls that are still running never
+    delay or time out a new one. Every attempt that called its provider
+    feeds the health statistics once (a timeout counts as a failure).
+    """
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        timeout: float = ROUTER_TIMEOUT,
+        hedge: bool = ROUTER_HEDGE,
+        hedge_min_delay: float = ROUTER_HEDGE_MIN_DELAY,
+        max_error_rate: float = ROUTER_MAX_ERROR_RATE,
+    ):
+        self.providers = list(providers)
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.max_error_rate = max_error_rate
+        self.health = {p.name: ProviderHealth() for p in self.providers}
+
+    def ranked(self) -> List[Provider]:
+        """Preference order, with providers above max_error_rate moved to the back."""
+        return sorted(
+            self.providers,
+            key=lambda p: self.health[p.name].error_rate() > self.max_error_rate,
+        )
+
+    def _attempt(self, attempt: _Attempt, prompt: str) -> Tuple[str, bool]:
+        provider = attempt.provider
+        try:
+            acquire_llm(provider.name, prompt)
+        except RateLimited as e:
+            # Out of quota is not a health problem: fail over without recording a sample.
+            attempt.settle()
+            return f"Error: {e}", False
+        # Waiting for a quota slot is bounded by acquire_llm's max_wait, not the router
+        # timeout: the timeout and hedge clocks only start once the provider is called.
+        start = attempt.started = time.monotonic()
+        with span("provider", provider=provider.name, model=provider.model) as s:
+            try:
+                text = provider.call(prompt)
+                ok = bool(text) and not text.startswith("Error:")
+            except Exception as e:
+                text, ok = f"Error: {e}", False
+            s["failed"] = not ok
+        if attempt.settle():
+            self.health[provider.name].record(time.monotonic() - start, ok)
+        return text, ok
+
+    def _run(self, attempt: _Attempt, prompt: str) -> None:
+        try:
+            attempt.future.set_result(self._attempt(attempt, prompt))
+        except BaseException as e:
+            attempt.future.set_exception(e)
+
+    def _hedge_delay(self, provider: Provider) -> Optional[float]:
+        p95 = self.health[provider.name].p95()
+        if p95 is None:
+            return None
+        return max(p95, self.hedge_min_delay)
+
+    def generate(self, prompt: str) -> Tuple[str, Dict]:
+        """Return (text, meta); meta records provider, latency_ms, hedged and every attempt."""
+        candidates = self.ranked()
+        started = time.monotonic()
+        meta = {"provider": None, "model": None, "latency_ms": None, "hedged": False, "attempts": []}
+        if not candidates:
+            return "Error: No content generation API configured. Set OPENAI_API_KEY or COHERE_API_KEY.", meta
+
+        pending = {}
+        queue = list(candidates)
+        last_error = "Error: all providers failed"
+
+        def launch(hedged=False):
+            attempt = _Attempt(queue.pop(0))
+            pending[attempt.future] = attempt
+            threading.Thread(
+                target=propagate(self._run),
+                args=(attempt, prompt),
+                name=f"llm-{attempt.provider.name}",
+                daemon=True,
+            ).start()
+            meta["attempts"].append({"provider": attempt.provider.name, "hedge": hedged})
+            return attempt
+
+        current = launch()
+        hedge_delay = self._hedge_delay(current.provider) if self.hedge else None
+
+        while pending:
+            now = time.monotonic()
+            if current.started is None:
+                wait_for = ROUTER_POLL_INTERVAL
+            else:
+                wait_for = current.started + self.timeout - now
+                if hedge_delay is not None and queue:
+                    wait_for = min(wait_for, current.started + hedge_delay - now)
+
+            done, _ = wait(list(pending), timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider = pending.pop(future).provider
+                text, ok = future.result()
+                if ok:
+                    meta.update(
+                        provider=provider.name,
+                        model=provider.model,
+                        latency_ms=int((time.monotonic() - started) * 1000),
+                    )
+                    return text, meta
+                last_error = text
+
+            if done:
+                # Failover: nothing succeeded, start the next provider if none is running.
+                if not pending and queue:
+                    current = launch()
+                    hedge_delay = self._hedge_delay(current.provider) if self.hedge else None
+                continue
+
+            if current.started is None:
+                continue
+            elapsed = time.monotonic() - current.started
+            timed_out = elapsed >= self.timeout
+            if timed_out:
+                if current.settle():
+                    self.health[current.provider.name].record(self.timeout, False)
+                last_error = f"Error: {current.provider.name} timed out"
+            elif hedge_delay is None or elapsed < hedge_delay:
+                continue
+
+            if not queue:
+                if timed_out:
+                    break
+                continue
+
+            meta["hedged"] = meta["hedged"] or not timed_out
+            current = launch(hedged=not timed_out)
+            hedge_delay = self._hedge_delay(current.provider) if self.hedge else None
+
+        meta["latency_ms"] = int((time.monotonic() - started) * 1000)
+        return last_error, meta
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: health.as_dict() for name, health in self.health.items()}
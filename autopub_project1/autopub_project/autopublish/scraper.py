@@ -0,0 +1,199 @@
+# autopublish/scraper.py
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional, Union
+from urllib.parse import urlsplit
+
+from django.db import connections
+from newspaper import Article
+
+from . import http_client
+from .cache import record_stat
+from .extractor import EXTRACT_MIN_CHARS, fast_extract
+from .page_cache import page_cache
+from .tracing import propagate, span
+
+# ---------- Settings ---------- #
+
+SCRAPE_MAX_WORKERS = int(os.getenv("SCRAPE_MAX_WORKERS", "8"))
+SCRAPE_PER_HOST = int(os.getenv("SCRAPE_PER_HOST", "2"))
+SCRAPE_DEADLINE = float(os.getenv("SCRAPE_DEADLINE", "25"))
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+# ---------- Single page ---------- #
+
+def _decode(html: Union[bytes, str], encoding: Optional[str]) -> str:
+    if isinstance(html, str):
+        return html
+    return html.decode(encoding or "utf-8", errors="replace")
+
+
+def extract_text(html: Union[bytes, str], url: str = "", max_chars: int = 3000, encoding: Optional[str] = None) -> str:
+    """
+    Extract the readable text from already-downloaded HTML (bytes or str).
+    The streaming lxml extractor runs first and stops at max_chars; newspaper
+    only parses the same document when that finds too little text.
+    """
+    with span("extract") as s:
+        text = fast_extract(html, max_chars, encoding=encoding)
+        s["chars"] = len(text)
+    if len(text) >= min(EXTRACT_MIN_CHARS, max_chars):
+        return text
+
+    with span("extract_newspaper") as s:
+        try:
+            article = Article(url)
+            article.download(input_html=_decode(html, encoding))
+            article.parse()
+            fallback = article.text[:max_chars]
+        except Exception:
+            fallback = ""
+        s["chars"] = len(fallback)
+
+    return fallback if len(fallback) > len(text) else text
+
+
+def scrape_url(url: str, max_chars: int = 3000) -> str:
+    """
+    Return the readable text of one page, truncated to max_chars.
+    Served from the page cache when fresh; stale entries are revalidated with a
+    conditional GET. Error responses are still parsed (as before the cache) but
+    never cached. Returns "" on failure.
+    """
+    with span("scrape", host=(urlsplit(url).hostname or "")) as s:
+        text = _scrape_url(url, max_chars, s)
+        s["chars"] = len(text)
+        return text
+
+
+def _scrape_url(url: str, max_chars: int, s: dict) -> str:
+    # `s` is the "scrape" span's metadata (cache outcome, failure).
+    cached = page_cache.get(url)
+    if cached and cached.get("max_chars", 0) < max_chars and len(cached["text"]) >= cached["max_chars"]:
+        # Stored text was cut shorter than what is being asked for now.
+        cached = None
+
+    if cached and cached["fresh"]:
+        page_cache.touch(url)
+        record_stat("pages", hit=True)
+        s["cache"] = "hit"
+        return cached["text"][:max_chars]
+
+    headers = dict(HEADERS)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        with span("fetch") as fetch:
+            r = http_client.get(url, headers=headers, timeout=15)
+            fetch["status"] = r.status_code
+    except Exception:
+        s["failed"] = True
+        return cached["text"][:max_chars] if cached else ""
+
+    if r.status_code == 304 and cached:
+        page_cache.touch(url, revalidated=True)
+        record_stat("pages", hit=True)
+        s["cache"] = "revalidated"
+        return cached["text"][:max_chars]
+
+    record_stat("pages", hit=False)
+    s["cache"] = "miss"
+    if r.status_code != 200:
+        s["failed"] = True
+
+    # Only trust the declared charset; otherwise lxml sniffs <meta charset> from the bytes.
+    declared = r.encoding if "charset" in r.headers.get("Content-Type", "").lower() else None
+    text = extract_text(r.content, url, max_chars, encoding=declared)
+    if text and r.status_code == 200:
+        page_cache.put(
+            url,
+            text,
+            max_chars,
+            etag=r.headers.get("ETag"),
+            last_modified=r.headers.get("Last-Modified"),
+        )
+    return text
+
+
+# ---------- Per-host concurrency ---------- #
+
+class HostLimiter:
+    """Hands out one bounded semaphore per hostname."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(per_host, 1)
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def slot(self, url: str) -> threading.BoundedSemaphore:
+        host = (urlsplit(url).hostname or "").lower()
+        with self._lock:
+            sem = self._slots.get(host)
+            if sem is None:
+                sem = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return sem
+
+
+# ---------- Batch scraping ---------- #
+
+def scrape_many(
+    urls: List[str],
+    max_chars: int = 3000,
+    max_workers: Optional[int] = None,
+    per_host: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> List[Optional[str]]:
+    """
+    Scrape several pages concurrently.
+    Returns a list aligned with `urls` (SERP order). Pages that failed, or that
+    had not finished when the overall deadline (seconds) ran out, are None.
+    """
+    if not urls:
+        return []
+
+    max_workers = max_workers or SCRAPE_MAX_WORKERS
+    limiter = HostLimiter(per_host or SCRAPE_PER_HOST)
+    ends_at = time.monotonic() + (deadline if deadline is not None else SCRAPE_DEADLINE)
+
+    def work(url):
+        sem = limiter.slot(url)
+        remaining = ends_at - time.monotonic()
+        if remaining <= 0 or not sem.acquire(timeout=remaining):
+            return None
+        try:
+            if time.monotonic() >= ends_at:
+                return None
+            return scrape_url(url, max_chars) or None
+        finally:
+            sem.release()
+            # record_stat opened this pool thread's own DB connection.
+            connections.close_all()
+
+    pool = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(urls)),
+        thread_name_prefix="scrape",
+    )
+    work = propagate(work)
+    futures = [pool.submit(work, url) for url in urls]
+    try:
+        wait(futures, timeout=max(ends_at - time.monotonic(), 0))
+    finally:
+        # Don't block on stragglers: whatever is still running is dropped.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for fut in futures:
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            results.append(fut.result())
+        else:
+            results.append(None)
+    return results
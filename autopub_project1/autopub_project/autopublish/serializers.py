@@ -1,7 +1,18 @@
 from rest_framework import serializers
-from .models import PublishedPost
+from .models import Campaign, CampaignItem, PublishedPost
 
-class PublishedPostSerializer(serializers.ModelSerializer):
+
+class SparseFieldsMixin:
+    """Accepts fields=[...] to serialize only a subset of Meta.fields (unknown names are ignored)."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class PublishedPostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = PublishedPost
         fields = [
@@ -13,5 +24,43 @@ class PublishedPostSerializer(serializers.ModelSerializer):
             "keyword",
             "image_id",
             "word_count",
+            "summary",
+            "key_phrases",
+            "created_at",
+        ]
+
+
+class CampaignItemSerializer(serializers.ModelSerializer):
+    wp_link = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CampaignItem
+        fields = [
+            "id",
+            "keyword",
+            "status",
+            "published_post",
+            "wp_link",
+            "error",
+            "result",
+            "updated_at",
+        ]
+
+    def get_wp_link(self, obj):
+        return (obj.result or {}).get("wp_link")
+
+
+class CampaignSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Campaign
+        fields = [
+            "id",
+            "name",
+            "status",
+            "parallelism",
+            "publish",
+            "error",
             "created_at",
+            "started_at",
+            "finished_at",
         ]
@@ -0,0 +1,246 @@
+# autopublish/singleflight.py
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Callable, Optional, Tuple
+
+from .tracing import span
+
+# ---------- Settings ---------- #
+
+INFLIGHT_LEASE = int(os.getenv("INFLIGHT_LEASE", "300"))
+# How often a running leader pushes its lease forward (default: a third of the lease).
+INFLIGHT_RENEW_INTERVAL = float(os.getenv("INFLIGHT_RENEW_INTERVAL", "0")) or INFLIGHT_LEASE / 3
+INFLIGHT_POLL_INTERVAL = float(os.getenv("INFLIGHT_POLL_INTERVAL", "0.5"))
+INFLIGHT_RESULT_TTL = int(os.getenv("INFLIGHT_RESULT_TTL", "60"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one.
+    The first caller runs `fn`; callers arriving while it is in flight
+    wait for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: str, fn: Callable[[], Any], on_wait: Optional[Callable[[], None]] = None) -> Tuple[Any, bool]:
+        """
+        Return (result, shared) where `shared` is True for waiting callers.
+        on_wait is called once by callers that are about to wait.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if on_wait:
+                on_wait()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result, False
+
+
+# ---------- Across processes ---------- #
+
+class SharedCallError(RuntimeError):
+    """The computation another process ran for this key failed."""
+
+
+class _LeaseRenewal:
+    """Extends a running InflightCall's expires_at from a background thread, for as long as it is entered."""
+
+    def __init__(self, token: uuid.UUID, lease: int, interval: float):
+        self.token = token
+        self.lease = lease
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"inflight-{token}-lease", daemon=True)
+
+    def _run(self):
+        from django.db import connections
+        from django.utils import timezone
+
+        from .models import InflightCall
+
+        try:
+            while not self._stop.wait(self.interval):
+                InflightCall.objects.filter(token=self.token, status="running").update(
+                    expires_at=timezone.now() + timedelta(seconds=self.lease)
+                )
+        finally:
+            connections.close_all()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class SharedFlight:
+    """
+    SingleFlight across processes, for JSON-serializable results.
+
+    Callers in one process are first collapsed by a SingleFlight. The one
+    thread left per process then tries to insert the key's "running"
+    InflightCall row. The process that gets it runs `fn` and stores the
+    outcome on the row, and the others poll the row by token until it
+    finishes. The leader renews its lease while `fn` runs; a leader that
+    dies is replaced once the lease runs out. Finished rows are only read
+    by the callers that were waiting on them, so a call arriving afterwards
+    starts a fresh computation, and every claim prunes rows whose lease or
+    result TTL has passed.
+    """
+
+    def __init__(
+        self,
+        lease: int = INFLIGHT_LEASE,
+        poll_interval: float = INFLIGHT_POLL_INTERVAL,
+        result_ttl: int = INFLIGHT_RESULT_TTL,
+        owner: Optional[str] = None,
+        renew_interval: Optional[float] = None,
+    ):
+        self.lease = lease
+        self.renew_interval = renew_interval or min(INFLIGHT_RENEW_INTERVAL, lease / 3)
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self._local = SingleFlight()
+
+    def do(self, key: str, fn: Callable[[], Any], on_wait: Optional[Callable[[], None]] = None) -> Tuple[Any, bool]:
+        """Return (result, shared) like SingleFlight.do, sharing with other processes too."""
+        (result, shared_remote), shared_local = self._local.do(
+            key, lambda: self._do_shared(key, fn, on_wait), on_wait=on_wait,
+        )
+        return result, shared_local or shared_remote
+
+    def _do_shared(self, key: str, fn: Callable[[], Any], on_wait) -> Tuple[Any, bool]:
+        notified = False
+        while True:
+            token = self._claim(key)
+            if token is not None:
+                return self._lead(key, token, fn), False
+
+            running = self._running(key)
+            if running is None:
+                continue
+            if on_wait and not notified:
+                on_wait()
+                notified = True
+            with span("inflight_wait", key=key) as s:
+                outcome = self._wait(running)
+                s["outcome"] = outcome[0] if outcome else "abandoned"
+            if outcome is None:
+                # The leader's lease ran out: race for the key again.
+                continue
+            status, result, error = outcome
+            if status == "failed":
+                raise SharedCallError(error)
+            return result, True
+
+    def _claim(self, key: str) -> Optional[uuid.UUID]:
+        from django.db import IntegrityError, transaction
+        from django.utils import timezone
+
+        from .models import InflightCall
+
+        now = timezone.now()
+        # Finished results past their TTL, and running rows left behind by leaders
+        # that died: nobody can still be waiting on them, whatever their key.
+        InflightCall.objects.filter(expires_at__lt=now - timedelta(seconds=self.result_ttl)).delete()
+
+        token = uuid.uuid4()
+        try:
+            with transaction.atomic():
+                InflightCall.objects.create(
+                    key=key,
+                    token=token,
+                    owner=self.owner,
+                    started_at=now,
+                    expires_at=now + timedelta(seconds=self.lease),
+                )
+            return token
+        except IntegrityError:
+            pass
+
+        # Another process holds the key. If its lease ran out it has died: retire its row and retry.
+        expired = InflightCall.objects.filter(key=key, status="running", expires_at__lt=now).update(
+            status="expired",
+            expires_at=now + timedelta(seconds=self.result_ttl),
+        )
+        if expired:
+            return self._claim(key)
+        return None
+
+    def _running(self, key: str) -> Optional[uuid.UUID]:
+        from .models import InflightCall
+
+        return InflightCall.objects.filter(key=key, status="running").values_list("token", flat=True).first()
+
+    def _wait(self, token: uuid.UUID) -> Optional[Tuple[str, Any, str]]:
+        """Poll the flight `token` until it finishes: (status, result, error), or None if it was abandoned."""
+        from django.utils import timezone
+
+        from .models import InflightCall
+
+        while True:
+            state = InflightCall.objects.filter(token=token).values_list("status", "expires_at").first()
+            if state is None or state[0] == "expired":
+                return None
+            status, expires_at = state
+            if status == "running" and expires_at < timezone.now():
+                return None
+            if status != "running":
+                row = InflightCall.objects.only("result", "error").get(token=token)
+                return status, row.result, row.error
+            time.sleep(self.poll_interval)
+
+    def _lead(self, key: str, token: uuid.UUID, fn: Callable[[], Any]) -> Any:
+        try:
+            with _LeaseRenewal(token, self.lease, self.renew_interval):
+                result = fn()
+        except BaseException as e:
+            self._finish(token, status="failed", error=f"{type(e).__name__}: {e}"[:2000])
+            raise
+        self._finish(token, status="done", result=result)
+        return result
+
+    def _finish(self, token: uuid.UUID, **fields) -> None:
+        from django.utils import timezone
+
+        from .models import InflightCall
+
+        InflightCall.objects.filter(token=token, status="running").update(
+            expires_at=timezone.now() + timedelta(seconds=self.result_ttl), **fields
+        )
@@ -0,0 +1,288 @@
+# autopublish/social_dispatch.py
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import http_client
+from .models import SocialPost
+from .ratelimit import Limit, RateLimited, acquire
+
+# ---------- Settings ---------- #
+
+SOCIAL_BATCH_SIZE = int(os.getenv("SOCIAL_BATCH_SIZE", "20"))
+SOCIAL_CONCURRENCY = int(os.getenv("SOCIAL_CONCURRENCY", "8"))
+SOCIAL_POLL_INTERVAL = float(os.getenv("SOCIAL_POLL_INTERVAL", "5.0"))
+SOCIAL_STALE_AFTER = int(os.getenv("SOCIAL_STALE_AFTER", "600"))
+# How often a running dispatcher looks for posts left claimed by a dead one.
+SOCIAL_REQUEUE_INTERVAL = float(os.getenv("SOCIAL_REQUEUE_INTERVAL", "60"))
+# Longest a claimed post waits for its platform's rate limit; must stay below SOCIAL_STALE_AFTER.
+SOCIAL_THROTTLE_MAX_WAIT = float(os.getenv("SOCIAL_THROTTLE_MAX_WAIT", str(SOCIAL_STALE_AFTER / 2)))
+
+# Posts per second per platform, e.g. "instagram=0.5,linkedin=1". Unlisted platforms use the default.
+SOCIAL_DEFAULT_RATE = float(os.getenv("SOCIAL_DEFAULT_RATE", "2"))
+SOCIAL_RATE_LIMITS = os.getenv("SOCIAL_RATE_LIMITS", "")
+
+USE_FAKE_SOCIAL = os.getenv("USE_FAKE_SOCIAL", "false").lower() in ("1", "true", "yes")
+FAKE_SOCIAL_DELAY = float(os.getenv("FAKE_SOCIAL_DELAY", "0.2"))
+
+
+class SocialDispatchError(Exception):
+    """Raised by an adapter when the platform rejected the post."""
+
+
+# ---------- Adapters ---------- #
+
+class SocialAdapter:
+    """Publishes one SocialPost to one platform and returns a short response message."""
+
+    def publish(self, post: SocialPost) -> str:
+        raise NotImplementedError
+
+
+class FakeAdapter(SocialAdapter):
+    """Local stand-in: waits `delay` seconds and succeeds (or fails when fail=True)."""
+
+    def __init__(self, platform: str, delay: float = FAKE_SOCIAL_DELAY, fail: bool = False):
+        self.platform = platform
+        self.delay = delay
+        self.fail = fail
+        self.published: List[int] = []
+        self._lock = threading.Lock()
+
+    def publish(self, post: SocialPost) -> str:
+        time.sleep(self.delay)
+        if self.fail:
+            raise SocialDispatchError(f"fake {self.platform} rejected post {post.id}")
+        with self._lock:
+            self.published.append(post.id)
+        return f"fake:{self.platform}:{post.id}"
+
+
+class WebhookAdapter(SocialAdapter):
+    """POSTs the post as JSON to an automation webhook (Zapier, Make, Buffer, ...)."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def publish(self, post: SocialPost) -> str:
+        res = http_client.post(self.url, json={
+            "platform": post.platform,
+            "caption": post.caption,
+            "link": post.published_post.wp_link,
+            "image_url": post.image_url,
+            "pinterest_url": post.pinterest_url,
+        })
+        if res.status_code >= 400:
+            raise SocialDispatchError(f"{res.status_code}: {res.text[:500]}")
+        return res.text[:500] or str(res.status_code)
+
+
+_adapters: Dict[str, SocialAdapter] = {}
+
+
+def register_adapter(platform: str, adapter: SocialAdapter) -> None:
+    _adapters[platform] = adapter
+
+
+def get_adapter(platform: str) -> Optional[SocialAdapter]:
+    """Registered adapter, else the fake (USE_FAKE_SOCIAL) or SOCIAL_WEBHOOK_<PLATFORM> webhook."""
+    if platform in _adapters:
+        return _adapters[platform]
+    if USE_FAKE_SOCIAL:
+        adapter = FakeAdapter(platform)
+    else:
+        url = os.getenv(f"SOCIAL_WEBHOOK_{platform.upper()}")
+        if not url:
+            return None
+        adapter = WebhookAdapter(url)
+    return _adapters.setdefault(platform, adapter)
+
+
+# ---------- Rate limits ---------- #
+
+def _parse_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for part in spec.split(","):
+        if "=" in part:
+            platform, rate = part.split("=", 1)
+            rates[platform.strip()] = float(rate)
+    return rates
+
+
+class PlatformThrottle:
+    """
+    Spaces calls to each platform at least 1/rate seconds apart, across all
+    dispatcher processes. A wait longer than max_wait raises RateLimited.
+    """
+
+    def __init__(
+        self,
+        rates: Dict[str, float],
+        default_rate: float = SOCIAL_DEFAULT_RATE,
+        max_wait: float = SOCIAL_THROTTLE_MAX_WAIT,
+    ):
+        self.rates = rates
+        self.default_rate = default_rate
+        self.max_wait = max_wait
+
+    def wait(self, platform: str) -> None:
+        rate = self.rates.get(platform, self.default_rate)
+        if rate <= 0:
+            return
+        acquire(f"social_{platform}", max_wait=self.max_wait, limit=Limit(rate, burst=1))
+
+
+throttle = PlatformThrottle(_parse_rates(SOCIAL_RATE_LIMITS))
+
+
+# ---------- Claiming ---------- #
+
+def due_posts():
+    now = timezone.now()
+    return SocialPost.objects.filter(
+        Q(scheduled_for__isnull=True) | Q(scheduled_for__lte=now),
+        status="scheduled",
+    )
+
+
+def claim_due_posts(worker_id: str, batch_size: int = SOCIAL_BATCH_SIZE) -> List[SocialPost]:
+    """
+    Move up to batch_size due posts to "dispatching" for this worker.
+
+    Databases with SKIP LOCKED (PostgreSQL, MySQL 8) lock the batch with
+    SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers take disjoint
+    batches without waiting on each other. Elsewhere (SQLite) each row is
+    claimed with a conditional UPDATE, like claim_next_job().
+    """
+    now = timezone.now()
+    claim = {"status": "dispatching", "worker": worker_id, "claimed_at": now}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                due_posts().order_by("scheduled_for", "id")
+                .select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:batch_size]
+            )
+            SocialPost.objects.filter(id__in=ids).update(**claim)
+    else:
+        candidates = due_posts().order_by("scheduled_for", "id").values_list("id", flat=True)[:batch_size * 2]
+        ids = []
+        for post_id in candidates:
+            if SocialPost.objects.filter(id=post_id, status="scheduled").update(**claim):
+                ids.append(post_id)
+                if len(ids) == batch_size:
+                    break
+
+    return list(SocialPost.objects.filter(id__in=ids).select_related("published_post"))
+
+
+def requeue_stale_posts(older_than: int = SOCIAL_STALE_AFTER) -> int:
+    """Put back posts whose dispatcher died mid-batch."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return SocialPost.objects.filter(status="dispatching", claimed_at__lt=cutoff).update(
+        status="scheduled",
+        worker="",
+    )
+
+
+# ---------- Dispatch ---------- #
+
+def _claimed(post: SocialPost):
+    """The post's row, as long as it is still claimed by the worker that loaded it."""
+    return SocialPost.objects.filter(id=post.id, status="dispatching", worker=post.worker)
+
+
+def dispatch_post(post: SocialPost) -> SocialPost:
+    """
+    Publish one claimed post. Returns it with status "posted" or "failed",
+    or "scheduled" when it was handed back (rate limit wait too long) or
+    another dispatcher had taken it over.
+    """
+    adapter = get_adapter(post.platform)
+    if adapter is None:
+        post.status = "failed"
+        post.response_message = f"No adapter configured for {post.platform}"
+    else:
+        try:
+            throttle.wait(post.platform)
+        except RateLimited:
+            # Hand the post back rather than hold it until it looks stale.
+            _claimed(post).update(status="scheduled", worker="", claimed_at=None)
+            post.status = "scheduled"
+            return post
+
+        # Heartbeat: requeue_stale_posts() only takes claims older than SOCIAL_STALE_AFTER.
+        if not _claimed(post).update(claimed_at=timezone.now()):
+            post.status = "scheduled"
+            return post
+
+        try:
+            post.response_message = adapter.publish(post)
+            post.status = "posted"
+            post.posted_at = timezone.now()
+        except Exception as e:
+            post.status = "failed"
+            post.response_message = str(e)[:2000]
+
+    _claimed(post).update(status=post.status, posted_at=post.posted_at, response_message=post.response_message)
+    return post
+
+
+def _dispatch_in_thread(post: SocialPost) -> SocialPost:
+    try:
+        return dispatch_post(post)
+    finally:
+        connections.close_all()
+
+
+def dispatch_batch(posts: List[SocialPost], concurrency: int = SOCIAL_CONCURRENCY) -> Dict[str, int]:
+    """Dispatch claimed posts in parallel; counts of posted, failed and requeued (handed back) posts."""
+    outcome = {"posted": 0, "failed": 0, "requeued": 0}
+    if not posts:
+        return outcome
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(posts)), thread_name_prefix="social") as pool:
+        for post in pool.map(_dispatch_in_thread, posts):
+            outcome["requeued" if post.status == "scheduled" else post.status] += 1
+    return outcome
+
+
+def run_dispatcher(
+    worker_id: str,
+    poll_interval: float = SOCIAL_POLL_INTERVAL,
+    batch_size: int = SOCIAL_BATCH_SIZE,
+    concurrency: int = SOCIAL_CONCURRENCY,
+    once: bool = False,
+) -> Dict[str, int]:
+    """Claim and dispatch due posts until interrupted (or until none are due with once=True)."""
+    totals = {"posted": 0, "failed": 0, "requeued": 0}
+    requeue_stale_posts()
+    last_requeue = time.monotonic()
+
+    while True:
+        close_old_connections()
+        if time.monotonic() - last_requeue >= SOCIAL_REQUEUE_INTERVAL:
+            requeue_stale_posts()
+            last_requeue = time.monotonic()
+
+        posts = claim_due_posts(worker_id, batch_size)
+        if not posts:
+            if once:
+                return totals
+            time.sleep(poll_interval)
+            continue
+
+        outcome = dispatch_batch(posts, concurrency)
+        for status, count in outcome.items():
+            totals[status] += count
+        if not outcome["posted"] and not outcome["failed"]:
+            # Everything was handed back to wait for the rate limit: don't spin on it.
+            time.sleep(poll_interval)
@@ -0,0 +1,121 @@
+# autopublish/social_generator.py
+
+import json
+import re
+from typing import Dict, Iterable, Optional
+
+from .generator import generate_text
+
+# ---------- Platform guidelines ---------- #
+PLATFORM_GUIDELINES = {
+    "instagram": "Up to 150 words, friendly tone, a few emojis, 5-8 relevant hashtags at the end.",
+    "facebook": "2-3 short paragraphs, conversational, end with a question to drive comments.",
+    "linkedin": "Professional tone, 3-5 short paragraphs, one key insight, 3 hashtags max.",
+    "medium": "A compelling 2-3 sentence teaser that invites readers to the full article.",
+    "pinterest": "One keyword-rich sentence (<=100 chars) plus a short description (<=300 chars).",
+}
+
+
+# ---------- Caption generation ---------- #
+def article_context(post) -> str:
+    """Short context for caption prompts: the stored summary and key phrases (title for older posts)."""
+    if not post.summary:
+        return post.title
+    context = post.summary
+    if post.key_phrases:
+        context += "\nKey phrases: " + ", ".join(post.key_phrases)
+    return context
+
+
+def generate_social_caption(
+    platform: str,
+    title: str,
+    keyword: str,
+    wp_link: str,
+    article_text: str,
+) -> str:
+    """Generate a caption promoting a published article on one platform."""
+    guideline = PLATFORM_GUIDELINES.get(platform, "Short, engaging and on-topic.")
+    prompt = f"""
+You are a social media manager. Write a {platform} post promoting this blog article.
+
+Title: {title}
+Target keyword: {keyword}
+Link: {wp_link}
+
+Article content:
+{article_text}
+
+Guidelines: {guideline}
+Include the link once. Return ONLY the caption text.
+""".strip()
+    return generate_text(prompt)
+
+
+def _parse_captions(raw: str, platforms: Iterable[str]) -> Optional[Dict[str, str]]:
+    """
+    Pull {platform: caption} out of the model output, ignoring code fences
+    and stray text. Returns None when the output holds no JSON object.
+    """
+    match = re.search(r"\{.*\}", raw, flags=re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return {
+        p: data[p].strip()
+        for p in platforms
+        if isinstance(data.get(p), str) and data[p].strip()
+    }
+
+
+def generate_social_captions(
+    platforms: Iterable[str],
+    title: str,
+    keyword: str,
+    wp_link: str,
+    article_text: str,
+) -> Dict[str, str]:
+    """
+    Captions for several platforms from a single LLM request.
+    The article context is sent once; the model answers with a JSON object
+    keyed by platform. Platforms the model left out of a valid answer fall
+    back to generate_social_caption(); if the request fails or the answer is
+    not a JSON object, every platform gets the error instead.
+    """
+    platforms = list(dict.fromkeys(platforms))
+    rules = "\n".join(
+        f'- "{p}": {PLATFORM_GUIDELINES.get(p, "Short, engaging and on-topic.")}'
+        for p in platforms
+    )
+    prompt = f"""
+You are a social media manager. Write one post per platform promoting this blog article.
+
+Title: {title}
+Target keyword: {keyword}
+Link: {wp_link}
+
+Article content:
+{article_text}
+
+Platforms and guidelines:
+{rules}
+
+Include the link once in every post.
+Return ONLY a JSON object with the captions keyed by platform, e.g. {{"{platforms[0]}": "..."}}.
+""".strip()
+
+    raw = generate_text(prompt)
+    if raw.startswith("Error:"):
+        return {p: raw for p in platforms}
+    captions = _parse_captions(raw, platforms)
+    if captions is None:
+        return {p: "Error: The model did not return captions as JSON" for p in platforms}
+    for platform in platforms:
+        if platform not in captions:
+            captions[platform] = generate_social_caption(platform, title, keyword, wp_link, article_text)
+    return captions
@@ -0,0 +1,278 @@
+# autopublish/stubserver.py
+#
+# Local stand-in for SerpApi, competitor sites, Pexels and WordPress, used by
+# the bench_pipeline command. Responses are replayed from a fixtures
+# directory (or synthesized) and every route can be given injected latency.
+
+import io
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, quote, urlsplit
+
+ROUTES = ("serp", "page", "pexels", "image", "wp_post", "wp_media")
+
+WORDS = "shoe running comfort price cushion trail road fit size brand review test foot heel grip".split()
+
+
+# ---------- Fixtures ---------- #
+
+class Fixtures:
+    """
+    Recorded (or synthetic) upstream responses.
+
+    A fixtures directory holds serp.json (a SerpApi response), pexels.json
+    (a Pexels search response), image.jpg and pages/*.html. Real responses
+    saved from the APIs can be dropped in as-is: links and image URLs are
+    rewritten to point back at the stub server when served.
+    """
+
+    def __init__(self, serp: Dict, pexels: Dict, image: bytes, pages: List[bytes]):
+        self.serp = serp
+        self.pexels = pexels
+        self.image = image
+        self.pages = pages
+
+    @classmethod
+    def load(cls, path) -> "Fixtures":
+        path = Path(path)
+        pages = [p.read_bytes() for p in sorted((path / "pages").glob("*.htm*"))]
+        if not pages:
+            raise FileNotFoundError(f"No pages/*.html in {path}")
+        return cls(
+            serp=json.loads((path / "serp.json").read_text(encoding="utf-8")),
+            pexels=json.loads((path / "pexels.json").read_text(encoding="utf-8")),
+            image=(path / "image.jpg").read_bytes(),
+            pages=pages,
+        )
+
+    @classmethod
+    def synthetic(cls, pages: int = 5, seed: int = 0) -> "Fixtures":
+        rng = random.Random(seed)
+        serp = {
+            "organic_results": [
+                {
+                    "position": i + 1,
+                    "title": f"Result {i + 1}: " + " ".join(rng.sample(WORDS, 4)),
+                    "link": f"https://competitor{i}.example/article",
+                    "snippet": " ".join(rng.choice(WORDS) for _ in range(25)) + ".",
+                }
+                for i in range(pages)
+            ]
+        }
+        pexels = {
+            "photos": [
+                {"id": 1000 + i, "src": {"large2x": f"https://images.example/{1000 + i}.jpg"}}
+                for i in range(5)
+            ]
+        }
+        return cls(serp, pexels, _synthetic_jpeg(rng), [_synthetic_page(rng) for _ in range(pages)])
+
+    def dump(self, path) -> None:
+        path = Path(path)
+        (path / "pages").mkdir(parents=True, exist_ok=True)
+        (path / "serp.json").write_text(json.dumps(self.serp, indent=2), encoding="utf-8")
+        (path / "pexels.json").write_text(json.dumps(self.pexels, indent=2), encoding="utf-8")
+        (path / "image.jpg").write_bytes(self.image)
+        for i, html in enumerate(self.pages):
+            (path / "pages" / f"{i}.html").write_bytes(html)
+
+
+def _synthetic_page(rng: random.Random, paragraphs: int = 60) -> bytes:
+    nav = "".join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(30))
+    body = "".join(
+        f"<h2>Section {i}</h2>" if i % 10 == 0 else
+        "<p>" + " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 90))) + ".</p>"
+        for i in range(paragraphs)
+    )
+    html = (
+        "<html><head><title>Page</title><script>" + "var a=1;" * 500 + "</script></head>"
+        f"<body><header><nav><ul>{nav}</ul></nav></header><article>{body}</article>"
+        "<footer><p>Copyright. All rights reserved.</p></footer></body></html>"
+    )
+    return html.encode("utf-8")
+
+
+def _synthetic_jpeg(rng: random.Random, size=(2400, 1600)) -> bytes:
+    """A camera-sized photo stand-in (noisy gradient, so it does not compress to nothing)."""
+    from PIL import Image
+
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    gradient = Image.linear_gradient("L").resize(size).convert("RGB")
+    buf = io.BytesIO()
+    Image.blend(noise, gradient, 0.5).save(buf, "JPEG", quality=95)
+    return buf.getvalue()
+
+
+# ---------- Server ---------- #
+
+class StubServer:
+    """
+    Threaded HTTP server replaying Fixtures:
+
+        GET  /serpapi/search.json?q=...   SERP whose links point at /pages/<n>.html
+        GET  /pages/<n>.html              competitor page n
+        GET  /pexels/v1/search?query=...  photos pointing at /images/<id>.jpg
+        GET  /images/<id>.jpg             fixture image, made unique per id
+        GET  /wp-json/wp/v2/media/<id>    {"id"}
+        POST /wp-json/wp/v2/media[/<id>]  {"id"}
+        DELETE /wp-json/wp/v2/media/<id>  {"deleted": true}
+        POST /wp-json/wp/v2/posts[/<id>]  {"id", "link"}
+
+    latency maps a route name (see ROUTES) to milliseconds added to every
+    response, +/- jitter (a fraction of it).
+    """
+
+    def __init__(
+        self,
+        fixtures: Fixtures,
+        latency: Optional[Dict[str, float]] = None,
+        jitter: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.fixtures = fixtures
+        self.latency = latency or {}
+        self.jitter = jitter
+        self.counts = {route: 0 for route in ROUTES}
+        self._ids = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def hit(self, route: str) -> None:
+        with self._lock:
+            self.counts[route] += 1
+        delay = self.latency.get(route, 0) / 1000
+        if delay:
+            time.sleep(max(delay * (1 + random.uniform(-self.jitter, self.jitter)), 0))
+
+    # Responses
+
+    def serp(self, query: str) -> Dict:
+        results = []
+        for i, result in enumerate(self.fixtures.serp.get("organic_results", [])):
+            # The query is part of the link so every keyword scrapes (and caches) its own pages.
+            results.append({**result, "link": f"{self.url}/pages/{i}.html?q={quote(query)}"})
+        return {**self.fixtures.serp, "organic_results": results}
+
+    def page(self, n: int) -> bytes:
+        return self.fixtures.pages[n % len(self.fixtures.pages)]
+
+    def pexels(self, query: str) -> Dict:
+        # Different queries get different photo ids, so image reuse only happens for repeated queries.
+        offset = zlib.crc32(query.encode("utf-8")) % 100000 * 10
+        photos = []
+        for photo in self.fixtures.pexels.get("photos", []):
+            photo_id = int(photo["id"]) + offset
+            photos.append({**photo, "id": photo_id, "src": {"large2x": f"{self.url}/images/{photo_id}.jpg"}})
+        return {**self.fixtures.pexels, "photos": photos}
+
+    def image(self, photo_id: str) -> bytes:
+        # Bytes after the JPEG end marker are ignored by decoders but give each photo its own hash.
+        return self.fixtures.image + f"photo-{photo_id}".encode("ascii")
+
+
+def _handler_for(stub: StubServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body, content_type: str = "application/json") -> None:
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            path = parts.path
+
+            if path == "/serpapi/search.json":
+                stub.hit("serp")
+                self._send(200, stub.serp(query.get("q", [""])[0]))
+            elif path.startswith("/pages/"):
+                stub.hit("page")
+                n = path.rsplit("/", 1)[-1].split(".", 1)[0]
+                self._send(200, stub.page(int(n) if n.isdigit() else 0), "text/html; charset=utf-8")
+            elif path == "/pexels/v1/search":
+                stub.hit("pexels")
+                self._send(200, stub.pexels(query.get("query", [""])[0]))
+            elif path.startswith("/images/"):
+                stub.hit("image")
+                self._send(200, stub.image(path.rsplit("/", 1)[-1].split(".", 1)[0]), "image/jpeg")
+            elif path.startswith("/wp-json/wp/v2/media/"):
+                stub.hit("wp_media")
+                media_id = path.rstrip("/").rsplit("/", 1)[-1]
+                self._send(200, {"id": int(media_id) if media_id.isdigit() else 0})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            path = urlsplit(self.path).path.rstrip("/")
+
+            if path == "/wp-json/wp/v2/media":
+                stub.hit("wp_media")
+                self._send(201, {"id": stub.next_id()})
+            elif path.startswith("/wp-json/wp/v2/media/"):
+                stub.hit("wp_media")
+                media_id = path.rsplit("/", 1)[-1]
+                self._send(200, {"id": int(media_id) if media_id.isdigit() else 0})
+            elif path == "/wp-json/wp/v2/posts":
+                stub.hit("wp_post")
+                post_id = stub.next_id()
+                self._send(201, {"id": post_id, "link": f"{stub.url}/?p={post_id}"})
+            elif path.startswith("/wp-json/wp/v2/posts/"):
+                stub.hit("wp_post")
+                post_id = path.rsplit("/", 1)[-1]
+                self._send(200, {"id": int(post_id) if post_id.isdigit() else 0, "link": f"{stub.url}/?p={post_id}"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_DELETE(self):
+            path = urlsplit(self.path).path.rstrip("/")
+            if path.startswith("/wp-json/wp/v2/media/"):
+                stub.hit("wp_media")
+                self._send(200, {"deleted": True})
+            else:
+                self._send(404, {"error": "not found"})
+
+    return Handler
@@ -0,0 +1,109 @@
+# autopublish/tests/test_api_posts.py
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from autopublish.models import PublishedPost
+from autopublish.pagination import decode_cursor, encode_cursor, keyset_page
+
+POSTS_URL = "/api/posts/"
+
+
+def make_posts(user, count):
+    return [
+        PublishedPost.objects.create(
+            user=user, wp_post_id=i, wp_link=f"https://example.com/p/{i}", title=f"Post {i}", keyword="shoes"
+        )
+        for i in range(count)
+    ]
+
+
+class KeysetPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+
+    def test_pages_cover_every_row_once_newest_first(self):
+        posts = make_posts(self.user, 5)
+        # Identical timestamps: the id breaks the tie.
+        PublishedPost.objects.filter(id__in=[p.id for p in posts[1:4]]).update(created_at=posts[1].created_at)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = keyset_page(PublishedPost.objects.all(), cursor, 2)
+            seen += [p.id for p in page]
+            if cursor is None:
+                break
+
+        expected = list(PublishedPost.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_cursor_round_trip(self):
+        moment = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(moment, 42)), (moment, 42))
+
+    def test_malformed_cursor_raises(self):
+        self.assertIsNone(decode_cursor("not a cursor"))
+        with self.assertRaises(ValueError):
+            keyset_page(PublishedPost.objects.all(), "not a cursor", 2)
+
+
+class PostsApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_follows_next_cursor(self):
+        posts = make_posts(self.user, 3)
+        make_posts(User.objects.create_user("other", password="pw"), 2)
+
+        first = self.client.get(POSTS_URL, {"limit": 2}).json()
+        self.assertEqual([p["id"] for p in first["results"]], [posts[2].id, posts[1].id])
+        second = self.client.get(POSTS_URL, {"limit": 2, "cursor": first["next_cursor"]}).json()
+        self.assertEqual([p["id"] for p in second["results"]], [posts[0].id])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_sparse_fields_load_only_those_columns(self):
+        make_posts(self.user, 2)
+        with CaptureQueriesContext(connection) as queries:
+            results = self.client.get(POSTS_URL, {"fields": "title,keyword"}).json()["results"]
+        self.assertEqual(results[0], {"title": "Post 1", "keyword": "shoes"})
+        page_sql = queries.captured_queries[-1]["sql"]
+        self.assertIn('"title"', page_sql)
+        self.assertNotIn('"wp_link"', page_sql)
+        self.assertNotIn('"body_markdown"', page_sql)
+
+    def test_bad_cursor_is_400(self):
+        self.assertEqual(self.client.get(POSTS_URL, {"cursor": "garbage"}).status_code, 400)
+
+    def test_etag_revalidation(self):
+        post = make_posts(self.user, 2)[0]
+        response = self.client.get(POSTS_URL)
+        etag = response["ETag"]
+
+        self.assertEqual(self.client.get(POSTS_URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(POSTS_URL, HTTP_IF_NONE_MATCH=f'"other", {etag}').status_code, 304)
+        # A different query has a different ETag.
+        self.assertEqual(self.client.get(POSTS_URL, {"limit": 1}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # A substring of the ETag is not a match.
+        self.assertEqual(self.client.get(POSTS_URL, HTTP_IF_NONE_MATCH=etag[1:-2]).status_code, 200)
+
+        post.title = "Edited"
+        post.save()
+        response = self.client.get(POSTS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_since_filters_by_creation_time(self):
+        old, new = make_posts(self.user, 2)
+        PublishedPost.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=10))
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        results = self.client.get(POSTS_URL, {"since": since}).json()["results"]
+        self.assertEqual([p["id"] for p in results], [new.id])
+        self.assertEqual(self.client.get(POSTS_URL, {"since": "yesterday"}).status_code, 400)
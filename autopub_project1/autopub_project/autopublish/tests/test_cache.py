@@ -0,0 +1,75 @@
+# autopublish/tests/test_cache.py
+
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from autopublish.cache import DBCache, cache_stats, make_key, normalize_query
+from autopublish.models import CacheEntry
+
+
+class DBCacheTests(TestCase):
+    def setUp(self):
+        self.cache = DBCache("test", ttl=60, max_entries=2)
+        self.calls = 0
+
+    def compute(self, value="fresh"):
+        def fn():
+            self.calls += 1
+            return value
+        return fn
+
+    def age(self, key, seconds, field="stored_at"):
+        CacheEntry.objects.filter(namespace="test", key=key).update(
+            **{field: timezone.now() - timedelta(seconds=seconds)}
+        )
+
+    def test_entries_expire_after_the_ttl(self):
+        self.cache.set("a", [1, 2])
+        self.assertEqual(self.cache.get("a"), [1, 2])
+
+        self.age("a", 61)
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.evict()
+        self.assertFalse(CacheEntry.objects.filter(namespace="test").exists())
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.age("a", 10, "accessed_at")
+        self.age("b", 5, "accessed_at")
+        self.cache.get("a")  # a is now the most recently used
+
+        self.cache.set("c", 3)
+        self.assertEqual(
+            sorted(CacheEntry.objects.filter(namespace="test").values_list("key", flat=True)),
+            ["a", "c"],
+        )
+
+    def test_get_or_set_computes_once_and_counts(self):
+        self.assertEqual(self.cache.get_or_set("a", self.compute()), "fresh")
+        self.assertEqual(self.cache.get_or_set("a", self.compute("other")), "fresh")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cache_stats(), [{"name": "test", "hits": 1, "misses": 1, "hit_rate": 0.5}])
+
+    def test_rejected_values_are_not_stored(self):
+        self.cache.get_or_set("a", self.compute([]), cache_if=bool)
+        self.cache.get_or_set("a", self.compute([]), cache_if=bool)
+        self.assertEqual(self.calls, 2)
+        self.assertFalse(CacheEntry.objects.filter(namespace="test").exists())
+
+    def test_namespaces_are_separate(self):
+        other = DBCache("other", ttl=60, max_entries=2)
+        self.cache.set("a", 1)
+        self.assertIsNone(other.get("a"))
+
+
+class KeyTests(SimpleTestCase):
+    def test_trivially_different_queries_share_a_key(self):
+        self.assertEqual(normalize_query("  Running   Shoes "), "running shoes")
+        self.assertEqual(
+            make_key("serpapi", 5, normalize_query("Running Shoes")),
+            make_key("serpapi", 5, normalize_query("running  shoes")),
+        )
+        self.assertNotEqual(make_key("serpapi", 5, "shoes"), make_key("serpapi", 10, "shoes"))
@@ -0,0 +1,151 @@
+# autopublish/tests/test_campaigns.py
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from autopublish.campaigns import (
+    claim_next_campaign,
+    create_campaign,
+    parse_keywords,
+    requeue_stale_campaigns,
+    run_campaign,
+)
+from autopublish.generator import stream_content_fake
+from autopublish.models import Campaign, CampaignItem, PublishedPost, UserProfile
+from autopublish.router import Provider, ProviderRouter
+
+
+def fake_router():
+    return ProviderRouter([Provider("fake", "fake", lambda prompt: "".join(stream_content_fake(prompt, delay=0)))])
+
+
+def published(data, html, slug):
+    post_id = abs(hash(slug)) % 10 ** 6
+    return {
+        "ok": True,
+        "post": {"id": post_id, "link": f"https://example.com/{slug}"},
+        "featured_id": None,
+        "image": {},
+        "error": None,
+        "timings": {"total": 1},
+    }
+
+
+class ParseKeywordsTests(SimpleTestCase):
+    def test_merges_list_and_csv_and_drops_duplicates(self):
+        keywords, duplicates = parse_keywords(
+            ["Running  Shoes", "trail shoes"],
+            csv_text="keyword\nrunning shoes\nhiking boots\n",
+        )
+        self.assertEqual(keywords, ["Running Shoes", "trail shoes", "hiking boots"])
+        self.assertEqual(duplicates, 1)
+
+
+class RunCampaignTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+        self.profile = UserProfile.objects.create(user=self.user, daily_post_limit=2)
+        for name, value in (
+            ("fetch_competitors", mock.DEFAULT),
+            ("scrape_many", mock.DEFAULT),
+            ("publish_article", mock.DEFAULT),
+        ):
+            patcher = mock.patch(f"autopublish.campaigns.{name}", value)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.fetch_competitors.return_value = []
+        self.scrape_many.side_effect = lambda urls, **kwargs: [None] * len(urls)
+        self.publish_article.side_effect = published
+
+    def run_with(self, router, keywords, publish=True):
+        campaign = create_campaign(self.user, keywords, parallelism=2, publish=publish)
+        claim_next_campaign("w1")
+        campaign.refresh_from_db()
+        with mock.patch("autopublish.generator.router", router):
+            return run_campaign(campaign)
+
+    def statuses(self, campaign):
+        return list(campaign.items.values_list("keyword", "status"))
+
+    def test_publishes_up_to_the_daily_limit(self):
+        campaign = self.run_with(fake_router(), ["shoes", "boots", "socks"])
+
+        self.assertEqual(campaign.status, "done")
+        self.assertEqual(
+            self.statuses(campaign),
+            [("shoes", "published"), ("boots", "published"), ("socks", "skipped")],
+        )
+        self.assertEqual(PublishedPost.objects.filter(user=self.user).count(), 2)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.quota_used, 2)
+        item = campaign.items.get(keyword="shoes")
+        self.assertEqual(item.result["title"], "The Complete Guide to shoes")
+        self.assertEqual(item.published_post.keyword, "shoes")
+
+    def test_failed_generation_is_not_published(self):
+        campaign = self.run_with(ProviderRouter([]), ["shoes", "boots"])
+
+        self.assertEqual(self.statuses(campaign), [("shoes", "failed"), ("boots", "failed")])
+        self.assertIn("No content generation API configured", campaign.items.first().error)
+        self.publish_article.assert_not_called()
+        self.assertFalse(PublishedPost.objects.exists())
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.posts_used_today(), 0)
+
+    def test_failed_publish_gives_the_slot_back(self):
+        def publish(data, html, slug):
+            if "shoes" in slug:
+                return {"ok": False, "post": None, "featured_id": None, "image": {}, "error": "WordPress down", "timings": {}}
+            return published(data, html, slug)
+
+        self.publish_article.side_effect = publish
+        campaign = self.run_with(fake_router(), ["shoes", "boots"])
+
+        self.assertEqual(self.statuses(campaign), [("shoes", "failed"), ("boots", "published")])
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.quota_used, 1)
+
+    def test_generate_only_keeps_the_draft_on_the_item(self):
+        campaign = self.run_with(fake_router(), ["shoes", "boots", "socks"], publish=False)
+
+        self.assertEqual({status for _, status in self.statuses(campaign)}, {"generated"})
+        self.assertIn("## Why shoes matters", campaign.items.get(keyword="shoes").result["body_markdown"])
+        self.publish_article.assert_not_called()
+
+    def test_campaign_taken_over_is_not_finished_by_the_old_worker(self):
+        campaign = create_campaign(self.user, ["shoes"], publish=False)
+        claim_next_campaign("w1")
+        campaign.refresh_from_db()
+        Campaign.objects.filter(id=campaign.id).update(worker="w2")
+        with mock.patch("autopublish.generator.router", fake_router()):
+            run_campaign(campaign)
+        self.assertEqual(Campaign.objects.get(id=campaign.id).status, "running")
+
+
+class RequeueStaleCampaignsTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+
+    def test_requeues_campaigns_without_a_recent_heartbeat(self):
+        stale = create_campaign(self.user, ["shoes", "boots"])
+        alive = create_campaign(self.user, ["socks"])
+        claim_next_campaign("w1")
+        claim_next_campaign("w2")
+        long_ago = timezone.now() - timedelta(seconds=600)
+        Campaign.objects.filter(id=stale.id).update(heartbeat_at=long_ago)
+        CampaignItem.objects.filter(campaign=stale, keyword="shoes").update(status="published")
+        CampaignItem.objects.filter(campaign=stale, keyword="boots").update(status="generating")
+
+        self.assertEqual(requeue_stale_campaigns(older_than=300), 1)
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.worker), ("queued", ""))
+        self.assertEqual(
+            list(stale.items.values_list("keyword", "status")),
+            [("shoes", "published"), ("boots", "pending")],
+        )
+        self.assertEqual(Campaign.objects.get(id=alive.id).status, "running")
+        self.assertEqual(claim_next_campaign("w3").id, stale.id)
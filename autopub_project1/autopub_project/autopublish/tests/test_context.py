@@ -0,0 +1,57 @@
+# autopublish/tests/test_context.py
+
+from django.test import SimpleTestCase
+
+from autopublish.context import compress_context, dedupe, estimate_tokens, split_paragraphs
+
+SHOES = (
+    "Running shoes need enough cushioning to absorb the impact of every stride on hard roads.\n"
+    "A snug heel and a roomy toe box keep blisters away on long runs and race days.\n"
+    "Accept all cookies\n"
+    "Subscribe to our newsletter\n"
+    "© 2024 Shoe Co. All rights reserved.\n"
+    "Menu\n"
+)
+WEATHER = "The weather forecast for the weekend calls for light rain and a cool breeze near the coast.\n"
+
+
+class SplitParagraphsTests(SimpleTestCase):
+    def texts(self, text, query=""):
+        return [p.text for p in split_paragraphs([text], query=query)]
+
+    def test_drops_short_lines_and_boilerplate(self):
+        self.assertEqual(self.texts(SHOES), SHOES.splitlines()[:2])
+
+    def test_keeps_long_paragraphs_that_mention_boilerplate_words(self):
+        review = (
+            "We tested every shoe for three months and the brands never knew, so nothing here is an "
+            "advertisement; sign up for a store account only if you want the extra discount."
+        )
+        self.assertEqual(self.texts(review), [review])
+
+    def test_keeps_lines_about_the_query(self):
+        line = "Subscribe and save on your cookie cutter set today"
+        self.assertEqual(self.texts(line), [])
+        self.assertEqual(self.texts(line, query="best cookie cutter"), [line])
+
+
+class DedupeTests(SimpleTestCase):
+    def test_near_duplicates_from_other_pages_are_dropped(self):
+        line = SHOES.splitlines()[0]
+        paragraphs = split_paragraphs([line, line.replace("hard roads", "hard roads."), WEATHER])
+        self.assertEqual([p.source for p in dedupe(paragraphs)], [0, 2])
+
+
+class CompressContextTests(SimpleTestCase):
+    def test_relevant_paragraphs_are_kept_within_the_budget(self):
+        texts = [WEATHER, SHOES, None, SHOES]
+        context, stats = compress_context("running shoes", texts, budget=30)
+
+        self.assertEqual(context, SHOES.splitlines()[0])
+        self.assertLessEqual(estimate_tokens(context), 30)
+        self.assertEqual(stats["duplicates_removed"], 2)
+        self.assertEqual(stats["paragraphs_kept"], 1)
+
+    def test_kept_paragraphs_stay_in_page_order(self):
+        context, _ = compress_context("shoes heel toe", [SHOES], budget=1000)
+        self.assertEqual(context, "\n\n".join(SHOES.splitlines()[:2]))
@@ -0,0 +1,54 @@
+# autopublish/tests/test_drafts.py
+
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from autopublish.drafts import delete_expired_drafts, get_draft, save_draft
+from autopublish.models import GeneratedDraft
+
+DRAFT = {
+    "keyword": "running shoes",
+    "data": {"title": "Shoes", "meta_description": "All about shoes", "body_markdown": "## Fit\n\n" + "Snug heel. " * 300},
+    "content_html": "<h2>Fit</h2>" + "<p>Snug heel.</p>" * 300,
+    "slug": "shoes",
+    "competitors": [],
+}
+
+
+class DraftStoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+
+    def test_round_trip_is_stored_compressed(self):
+        draft = save_draft(self.user, DRAFT)
+
+        loaded = get_draft(self.user, str(draft.id))
+        self.assertEqual(loaded.content, DRAFT)
+        self.assertEqual((loaded.data["title"], loaded.slug), ("Shoes", "shoes"))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT content FROM {GeneratedDraft._meta.db_table} WHERE id = %s", [draft.id.hex])
+            stored = bytes(cursor.fetchone()[0])
+        self.assertLess(len(stored), len(json.dumps(DRAFT)) / 5)
+
+    def test_missing_foreign_expired_and_malformed_ids_return_none(self):
+        draft = save_draft(self.user, DRAFT)
+        other = User.objects.create_user("other", password="pw")
+
+        self.assertIsNone(get_draft(other, draft.id))
+        self.assertIsNone(get_draft(self.user, "not-a-uuid"))
+        GeneratedDraft.objects.filter(id=draft.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(get_draft(self.user, draft.id))
+
+    def test_delete_expired_drafts_keeps_live_ones(self):
+        expired = save_draft(self.user, DRAFT)
+        live = save_draft(self.user, DRAFT)
+        GeneratedDraft.objects.filter(id=expired.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(delete_expired_drafts(), 1)
+        self.assertEqual(list(GeneratedDraft.objects.values_list("id", flat=True)), [live.id])
@@ -0,0 +1,78 @@
+# autopublish/tests/test_extractor.py
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+from lxml import etree
+
+from autopublish import extractor
+from autopublish.extractor import fast_extract
+from autopublish.scraper import extract_text
+
+PARAGRAPH = "Running shoes need enough cushioning to absorb every stride."
+
+PAGE = f"""<html><head><title>Shoes</title><script>var tracking = "{PARAGRAPH}";</script></head>
+<body>
+<header><p>{PARAGRAPH} (site header)</p></header>
+<nav><ul><li><a href="/a">Home page of the shoe shop</a></li></ul></nav>
+<article>
+  <h1>How to choose running shoes</h1>
+  <p>{PARAGRAPH}</p>
+  <ul><li>A snug heel and a roomy toe box <b>prevent blisters</b>.</li></ul>
+  <p><a href="/1">See all our running shoes</a> and <a href="/2">trail shoes</a></p>
+  <p>Short.</p>
+  <blockquote><p>Nested quote paragraph that should appear once.</p></blockquote>
+</article>
+<footer><p>Copyright notice for the whole shoe website.</p></footer>
+</body></html>"""
+
+
+class FastExtractTests(SimpleTestCase):
+    def test_keeps_content_blocks_one_per_line(self):
+        self.assertEqual(fast_extract(PAGE).splitlines(), [
+            "How to choose running shoes",
+            PARAGRAPH,
+            "A snug heel and a roomy toe box prevent blisters.",
+            "Nested quote paragraph that should appear once.",
+        ])
+
+    def test_stops_parsing_once_max_chars_are_collected(self):
+        html = ("<html><body>" + f"<p>{PARAGRAPH}</p>" * 2000 + "</body></html>").encode("utf-8")
+        fed = []
+
+        class CountingParser(etree.HTMLPullParser):
+            def feed(self, data):
+                fed.append(len(data))
+                return super().feed(data)
+
+        with mock.patch.object(extractor.etree, "HTMLPullParser", CountingParser), \
+                mock.patch.object(extractor, "EXTRACT_CHUNK_SIZE", 1024):
+            text = fast_extract(html, max_chars=200)
+
+        self.assertEqual(len(text), 200)
+        self.assertTrue(text.startswith(PARAGRAPH))
+        self.assertLess(sum(fed), 4096)
+
+    def test_decodes_bytes_with_the_declared_or_sniffed_charset(self):
+        body = "<p>Chaussures de course légères, idéales pour l'été.</p>"
+        latin1 = f"<html><body>{body}</body></html>".encode("latin-1")
+        self.assertIn("légères", fast_extract(latin1, encoding="latin-1"))
+
+        sniffed = f'<html><head><meta charset="iso-8859-1"></head><body>{body}</body></html>'.encode("latin-1")
+        self.assertIn("légères", fast_extract(sniffed))
+        self.assertIn("légères", fast_extract(sniffed, encoding="x-unknown"))
+
+    def test_broken_html_returns_what_was_found(self):
+        self.assertEqual(fast_extract(f"<div><p>{PARAGRAPH}<p>unclosed <b>{PARAGRAPH}"), f"{PARAGRAPH}\nunclosed {PARAGRAPH}")
+        self.assertEqual(fast_extract(""), "")
+
+
+class ExtractTextTests(SimpleTestCase):
+    def test_newspaper_runs_only_when_the_fast_path_finds_too_little(self):
+        with mock.patch("autopublish.scraper.Article") as article:
+            self.assertEqual(extract_text(f"<p>{PARAGRAPH}</p>" * 5, max_chars=100), fast_extract(f"<p>{PARAGRAPH}</p>" * 5, 100))
+            article.assert_not_called()
+
+            article.return_value.text = "Text found by newspaper. " * 20
+            self.assertEqual(extract_text("<p>Tiny</p>", max_chars=100), ("Text found by newspaper. " * 20)[:100])
+            article.assert_called_once()
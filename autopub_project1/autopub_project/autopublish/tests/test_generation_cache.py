@@ -0,0 +1,82 @@
+# autopublish/tests/test_generation_cache.py
+
+from unittest import mock
+
+from django.test import TestCase
+
+from autopublish import generator
+from autopublish.generator import GenerationError, cached_generate, generation_cache_key, llm_cache, stream_article
+
+
+class GenerationCacheTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(generator, "LLM_CACHE_ENABLED", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+    def generate(self, prompt):
+        self.calls.append(prompt)
+        return "article", {"provider": "fake", "model": "fake", "latency_ms": 5, "hedged": False, "attempts": []}
+
+    def test_second_request_is_served_from_the_cache(self):
+        with mock.patch("autopublish.generator.generate_text_with_meta", self.generate):
+            self.assertEqual(cached_generate("prompt")[0], "article")
+            output, meta = cached_generate("prompt")
+        self.assertEqual((output, meta["provider"]), ("article", "cache"))
+        self.assertEqual(len(self.calls), 1)
+
+    def test_force_regenerates(self):
+        with mock.patch("autopublish.generator.generate_text_with_meta", self.generate):
+            cached_generate("prompt")
+            cached_generate("prompt", force=True)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_errors_are_not_cached(self):
+        def failing(prompt):
+            self.calls.append(prompt)
+            return "Error: quota", {"provider": None, "model": None, "latency_ms": 1, "hedged": False, "attempts": []}
+
+        with mock.patch("autopublish.generator.generate_text_with_meta", failing):
+            cached_generate("prompt")
+            cached_generate("prompt")
+        self.assertEqual(len(self.calls), 2)
+
+
+class StreamArticleCacheTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(generator, "LLM_CACHE_ENABLED", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, chunks, error=None):
+        def stream_text(prompt):
+            yield from chunks
+            if error:
+                raise GenerationError(error)
+        return mock.patch("autopublish.generator.stream_text", stream_text)
+
+    def cached(self):
+        prompt = generator.build_prompt("shoes", [], "", 900)
+        return llm_cache.get(generation_cache_key(prompt))
+
+    def test_finished_stream_is_cached_and_replayed(self):
+        with self.stream(['{"title": ', '"Shoes"}']):
+            self.assertEqual("".join(stream_article("shoes", [], "")), '{"title": "Shoes"}')
+        self.assertEqual(self.cached(), '{"title": "Shoes"}')
+
+        with self.stream(["never used"]):
+            self.assertEqual(list(stream_article("shoes", [], "")), ['{"title": "Shoes"}'])
+
+    def test_stream_that_errors_after_partial_output_is_not_cached(self):
+        with self.stream(['{"title": "Shoes", "body_markdown": "Part one'], error="connection reset"):
+            with self.assertRaises(GenerationError):
+                list(stream_article("shoes", [], ""))
+        self.assertIsNone(self.cached())
+
+    def test_abandoned_stream_is_not_cached(self):
+        with self.stream(["part one", "part two"]):
+            stream = stream_article("shoes", [], "")
+            next(stream)
+            stream.close()
+        self.assertIsNone(self.cached())
@@ -0,0 +1,102 @@
+# autopublish/tests/test_http_client.py
+
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from autopublish import http_client
+from autopublish.http_client import CappedRetry, default_retry, http_stats, session_for
+
+
+class Response:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class HttpClientTests(SimpleTestCase):
+    def setUp(self):
+        # Each test starts with no sessions, stats or paced hosts.
+        for name, value in (
+            ("_sessions", http_client.OrderedDict()),
+            ("_in_use", {}),
+            ("_retired", set()),
+            ("_rate_limited", set()),
+            ("_stats", http_client.OrderedDict()),
+        ):
+            patcher = mock.patch.object(http_client, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.statuses = {}
+
+    def fake(self, method, url, **kwargs):
+        self.kwargs = kwargs
+        return Response(self.statuses.get(url, 200))
+
+    def test_one_session_per_host(self):
+        a = session_for("https://example.com/a")
+        self.assertIs(session_for("HTTPS://Example.com/b?q=1"), a)
+        self.assertIsNot(session_for("https://other.com/"), a)
+        self.assertIsNot(session_for("http://example.com/"), a)
+
+    def test_least_recently_used_session_is_closed(self):
+        with mock.patch.object(http_client, "HTTP_MAX_SESSIONS", 2):
+            first = session_for("https://a.com/")
+            session_for("https://b.com/")
+            with mock.patch.object(requests.Session, "close") as close:
+                session_for("https://c.com/")
+        close.assert_called_once_with()
+        self.assertNotIn("https://a.com", http_client._sessions)
+        self.assertIsNot(session_for("https://a.com/"), first)
+
+    def test_evicted_session_is_closed_only_after_its_request(self):
+        def evicting(method, url, **kwargs):
+            # Another thread pushes this host out while the request runs.
+            session_for("https://b.com/")
+            self.assertFalse(close.called)
+            return Response()
+
+        with mock.patch.object(http_client, "HTTP_MAX_SESSIONS", 1), \
+                mock.patch.object(requests.Session, "close") as close, \
+                mock.patch.object(requests.Session, "request", side_effect=evicting):
+            http_client.get("https://a.com/")
+        close.assert_called_once_with()
+        self.assertEqual(http_client._in_use, {})
+        self.assertEqual(http_client._retired, set())
+
+    def test_requests_get_default_timeouts_and_host_stats(self):
+        self.statuses["https://a.com/down"] = 503
+        with mock.patch.object(requests.Session, "request", self.fake):
+            http_client.get("https://a.com/")
+            self.assertEqual(self.kwargs["timeout"], (http_client.HTTP_CONNECT_TIMEOUT, http_client.HTTP_READ_TIMEOUT))
+            http_client.post("https://a.com/down", timeout=1)
+            self.assertEqual(self.kwargs["timeout"], 1)
+
+        [row] = http_stats()
+        self.assertEqual((row["host"], row["requests"], row["errors"]), ("https://a.com", 2, 1))
+
+    def test_rate_limited_host_does_not_retry_429(self):
+        session_for("https://api.example.com/")
+        with mock.patch.object(requests.Session, "request", self.fake):
+            http_client.get("https://api.example.com/search", rate_limited=True)
+
+        retry = session_for("https://api.example.com/").get_adapter("https://api.example.com/").max_retries
+        self.assertNotIn(429, retry.status_forcelist)
+        self.assertFalse(retry.is_retry("GET", 429, has_retry_after=True))
+        self.assertIn(429, session_for("https://a.com/").get_adapter("https://a.com/").max_retries.status_forcelist)
+
+
+class RetryTests(SimpleTestCase):
+    def test_retry_after_is_capped(self):
+        retry = default_retry()
+        self.assertIsInstance(retry, CappedRetry)
+        with mock.patch.object(http_client, "HTTP_MAX_RETRY_AFTER", 30):
+            self.assertEqual(retry.get_retry_after(Response(429, {"Retry-After": "3600"})), 30)
+            self.assertEqual(retry.get_retry_after(Response(429, {"Retry-After": "2"})), 2)
+        self.assertIsNone(retry.get_retry_after(Response(503)))
+
+    def test_posts_are_not_retried_after_a_server_error(self):
+        retry = default_retry()
+        self.assertTrue(retry.is_retry("GET", 503))
+        self.assertFalse(retry.is_retry("POST", 503))
@@ -0,0 +1,78 @@
+# autopublish/tests/test_images.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+
+from autopublish import images
+from autopublish.images import featured_media
+from autopublish.models import ImageAsset
+from autopublish.stubserver import Fixtures, StubServer
+
+FIXTURES = Fixtures(
+    serp={},
+    pexels={"photos": [{"id": 1000, "src": {"large2x": "https://images.example/1000.jpg"}}]},
+    image=b"\xff\xd8 not really a jpeg \xff\xd9",
+    pages=[b""],
+)
+
+
+class FeaturedMediaTests(TestCase):
+    def setUp(self):
+        self.stub = StubServer(FIXTURES).start()
+        self.addCleanup(self.stub.stop)
+        self.downloads = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.downloads, ignore_errors=True)
+        for patcher in (
+            mock.patch.dict(os.environ, {"PEXELS_API_KEY": "test"}),
+            mock.patch.multiple(
+                images,
+                PEXELS_SEARCH_URL=f"{self.stub.url}/pexels/v1/search",
+                IMAGE_DOWNLOAD_DIR=self.downloads,
+                IMAGE_OPTIMIZE=False,
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def media(self, query="running shoes"):
+        return featured_media(query, "shoes", self.stub.url, "user", "pass")
+
+    def uploads(self):
+        return self.stub.counts["image"], ImageAsset.objects.count()
+
+    def test_repeat_photo_reuses_the_uploaded_media(self):
+        media_id, timings, info = self.media()
+        self.assertIsNotNone(media_id)
+        self.assertFalse(info["reused"])
+        self.assertIn("image_upload", timings)
+
+        again, timings, info = self.media("Running  Shoes")
+        self.assertEqual(again, media_id)
+        self.assertTrue(info["reused"])
+        self.assertNotIn("image_fetch", timings)
+        self.assertEqual(self.uploads(), (1, 1))
+        self.assertEqual(ImageAsset.objects.get().uses, 2)
+        self.assertEqual(os.listdir(self.downloads), [])
+
+    def test_same_bytes_under_another_photo_id_are_reused(self):
+        photo_id = self.stub.pexels("running shoes")["photos"][0]["id"]
+        content_hash = hashlib.sha256(self.stub.image(str(photo_id))).hexdigest()
+        ImageAsset.objects.create(wp_site=images.site_key(self.stub.url), pexels_id=1, content_hash=content_hash, media_id=42)
+
+        media_id, _, info = self.media()
+        self.assertEqual((media_id, info["reused"]), (42, True))
+        self.assertEqual(ImageAsset.objects.get(pexels_id=photo_id).media_id, 42)
+
+    def test_media_deleted_in_wordpress_is_uploaded_again(self):
+        media_id, _, _ = self.media()
+        with mock.patch.object(images, "media_exists", return_value=False):
+            again, _, info = self.media()
+
+        self.assertNotEqual(again, media_id)
+        self.assertFalse(info["reused"])
+        self.assertEqual(list(ImageAsset.objects.values_list("media_id", flat=True)), [again])
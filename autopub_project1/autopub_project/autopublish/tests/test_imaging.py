@@ -0,0 +1,72 @@
+# autopublish/tests/test_imaging.py
+
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from autopublish import images
+from autopublish.imaging import optimize_image
+
+
+class OptimizeImageTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def photo(self, name, size, fmt="JPEG", mode="RGB", **save):
+        path = self.dir / name
+        noise = Image.effect_noise(size, 40).convert(mode)
+        noise.save(path, fmt, **save)
+        return str(path)
+
+    def test_large_photo_is_downscaled_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotated 90 degrees: stored landscape, shown portrait
+        exif[0x010F] = "Camera maker"
+        src = self.photo("big.jpg", (2400, 1600), quality=95, exif=exif)
+
+        result = optimize_image(src, str(self.dir / "out.jpg"), max_width=800)
+
+        self.assertEqual(result["path"], str(self.dir / "out.jpg"))
+        self.assertEqual((result["width"], result["height"]), (800, 1200))
+        self.assertLess(result["bytes_after"], result["bytes_before"])
+        with Image.open(result["path"]) as out:
+            self.assertEqual(out.size, (800, 1200))
+            self.assertEqual(dict(out.getexif()), {})
+            self.assertTrue(out.info.get("progressive"))
+
+    def test_small_compressed_photo_is_kept_as_is(self):
+        src = self.photo("small.jpg", (400, 300), quality=30)
+        result = optimize_image(src, str(self.dir / "out.jpg"), max_width=800, quality=95)
+
+        self.assertEqual((result["path"], result["content_type"]), (src, "image/jpeg"))
+        self.assertEqual(result["bytes_after"], result["bytes_before"])
+        self.assertFalse((self.dir / "out.jpg").exists())
+
+    def test_transparent_png_becomes_jpeg_or_webp(self):
+        src = self.photo("logo.png", (2000, 1000), "PNG", mode="RGBA")
+
+        jpeg = optimize_image(src, str(self.dir / "out.jpg"), max_width=1000)
+        self.assertEqual((jpeg["content_type"], jpeg["ext"]), ("image/jpeg", "jpg"))
+        webp = optimize_image(src, str(self.dir / "out.webp"), max_width=1000, fmt="webp")
+        self.assertEqual((webp["content_type"], webp["width"]), ("image/webp", 1000))
+
+
+class PrepareUploadTests(SimpleTestCase):
+    def test_unreadable_image_is_uploaded_unchanged(self):
+        path = Path(tempfile.mkdtemp()) / "broken.jpg"
+        self.addCleanup(shutil.rmtree, path.parent, ignore_errors=True)
+        path.write_bytes(b"not an image")
+        info = {}
+
+        with mock.patch.object(images, "IMAGE_OPTIMIZE", True), \
+                mock.patch.object(images, "optimize_in_pool", side_effect=lambda src, dst: optimize_image(src, dst)):
+            upload = images.prepare_upload(path, {}, info)
+
+        self.assertEqual((upload["path"], upload["bytes_after"]), (str(path), 12))
+        self.assertEqual(info, {})
+        self.assertEqual(list(path.parent.iterdir()), [path])
@@ -0,0 +1,82 @@
+# autopublish/tests/test_jobs.py
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from autopublish.jobs import claim_next_job, enqueue_generation, requeue_stale_jobs, run_job
+from autopublish.models import GenerationJob
+
+
+class ClaimTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+
+    def test_claims_oldest_queued_job_once(self):
+        first = enqueue_generation(self.user, "running shoes")
+        second = enqueue_generation(self.user, "trail shoes")
+
+        job = claim_next_job("w1")
+        self.assertEqual(job.id, first.id)
+        self.assertEqual(job.status, "running")
+        self.assertEqual(job.worker, "w1")
+        self.assertIsNotNone(job.heartbeat_at)
+
+        self.assertEqual(claim_next_job("w2").id, second.id)
+        self.assertIsNone(claim_next_job("w3"))
+
+    def test_requeues_only_jobs_without_a_recent_heartbeat(self):
+        stale = enqueue_generation(self.user, "stale")
+        alive = enqueue_generation(self.user, "alive")
+        claim_next_job("w1")
+        claim_next_job("w2")
+        long_ago = timezone.now() - timedelta(seconds=600)
+        # Started long ago, but alive kept sending heartbeats.
+        GenerationJob.objects.filter(id=stale.id).update(started_at=long_ago, heartbeat_at=long_ago)
+        GenerationJob.objects.filter(id=alive.id).update(started_at=long_ago)
+
+        self.assertEqual(requeue_stale_jobs(older_than=300), 1)
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((stale.status, stale.worker, stale.stage), ("queued", "", "Queued"))
+        self.assertEqual(alive.status, "running")
+
+    def test_requeues_running_job_without_heartbeat_by_start_time(self):
+        job = enqueue_generation(self.user, "legacy")
+        claim_next_job("w1")
+        GenerationJob.objects.filter(id=job.id).update(
+            heartbeat_at=None, started_at=timezone.now() - timedelta(seconds=600)
+        )
+        self.assertEqual(requeue_stale_jobs(older_than=300), 1)
+
+
+class RunJobTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+
+    def test_failure_is_recorded_by_the_claiming_worker(self):
+        enqueue_generation(self.user, "shoes")
+        job = claim_next_job("w1")
+        with mock.patch("autopublish.jobs.generate_draft", side_effect=RuntimeError("no provider")):
+            job = run_job(job)
+        self.assertEqual((job.status, job.error, job.stage), ("failed", "no provider", "Failed"))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_taken_over_mid_run_is_left_to_its_new_worker(self):
+        enqueue_generation(self.user, "shoes")
+        job = claim_next_job("w1")
+
+        def lose_claim(*args, **kwargs):
+            GenerationJob.objects.filter(id=job.id).update(
+                heartbeat_at=timezone.now() - timedelta(seconds=600)
+            )
+            requeue_stale_jobs(older_than=300)
+            claim_next_job("w2")
+            raise RuntimeError("too late")
+
+        with mock.patch("autopublish.jobs.generate_draft", side_effect=lose_claim):
+            job = run_job(job)
+        self.assertEqual((job.status, job.worker, job.error), ("running", "w2", ""))
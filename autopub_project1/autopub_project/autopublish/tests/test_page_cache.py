@@ -0,0 +1,153 @@
+# autopublish/tests/test_page_cache.py
+
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, TestCase
+
+from autopublish.page_cache import PageCache, normalize_url
+from autopublish.scraper import scrape_url
+
+URL = "https://example.com/shoes"
+
+
+def response(status, body="", headers=None):
+    r = requests.Response()
+    r.status_code = status
+    r._content = body.encode("utf-8")
+    r.headers.update(headers or {})
+    r.encoding = "utf-8"
+    r.url = URL
+    return r
+
+
+def temp_cache(test, **kwargs):
+    root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, root, ignore_errors=True)
+    kwargs.setdefault("ttl", 60)
+    kwargs.setdefault("max_bytes", 10 ** 6)
+    return PageCache(root, **kwargs)
+
+
+class NormalizeUrlTests(SimpleTestCase):
+    def test_variants_of_one_page_share_a_key(self):
+        self.assertEqual(
+            normalize_url("HTTPS://Example.com:443/shoes?b=2&utm_source=x&a=1#reviews"),
+            "https://example.com/shoes?a=1&b=2",
+        )
+        self.assertEqual(normalize_url("http://example.com"), "http://example.com/")
+        self.assertEqual(normalize_url("http://example.com:8080/"), "http://example.com:8080/")
+
+
+class PageCacheTests(SimpleTestCase):
+    def test_stale_entries_keep_their_validators(self):
+        cache = temp_cache(self)
+        cache.put(URL, "text", 3000, etag='"v1"', last_modified="Mon, 05 Oct 2026 10:00:00 GMT")
+        self.assertTrue(cache.get(URL + "#top")["fresh"])
+
+        cache.ttl = 0
+        entry = cache.get(URL)
+        self.assertFalse(entry["fresh"])
+        self.assertEqual((entry["text"], entry["etag"]), ("text", '"v1"'))
+
+    def test_revalidation_restarts_the_ttl(self):
+        cache = temp_cache(self, ttl=30)
+        cache.put(URL, "text", 3000)
+        path = cache._path(URL)
+        entry = cache.get(URL)
+        entry["fetched_at"] = time.time() - 60
+        cache._write(path, entry)
+        self.assertFalse(cache.get(URL)["fresh"])
+
+        cache.touch(URL, revalidated=True)
+        self.assertTrue(cache.get(URL)["fresh"])
+
+    def test_least_recently_used_pages_are_evicted_past_the_byte_budget(self):
+        cache = temp_cache(self, max_bytes=10 ** 6)
+        for i in range(3):
+            cache.put(f"https://example.com/{i}", "x" * 400, 3000)
+            # Oldest first: page 0 was used longest ago...
+            os.utime(cache._path(f"https://example.com/{i}"), (1000 + i, 1000 + i))
+        # ...until it is read again.
+        cache.touch("https://example.com/0")
+
+        cache.max_bytes = 1200  # room for two of the three pages
+        cache.evict()
+        self.assertIsNotNone(cache.get("https://example.com/0"))
+        self.assertIsNone(cache.get("https://example.com/1"))
+        self.assertIsNotNone(cache.get("https://example.com/2"))
+
+
+class ScrapeUrlCacheTests(TestCase):
+    def setUp(self):
+        self.cache = temp_cache(self)
+        self.responses = []
+        self.requests = []
+        for patcher in (
+            mock.patch("autopublish.scraper.page_cache", self.cache),
+            mock.patch("requests.Session.request", self.fake_request),
+            # The extractor is tested on its own; here the body is the text.
+            mock.patch("autopublish.scraper.extract_text", self.fake_extract),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_request(self, method, url, **kwargs):
+        self.requests.append(kwargs.get("headers") or {})
+        outcome = self.responses.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    @staticmethod
+    def fake_extract(html, url="", *args, **kwargs):
+        return html.decode("utf-8") if isinstance(html, bytes) else html
+
+    def expire(self):
+        self.cache.ttl = 0
+
+    def test_fresh_page_is_served_without_a_request(self):
+        self.responses = [response(200, "Fresh text", {"ETag": '"v1"'})]
+        self.assertEqual(scrape_url(URL), "Fresh text")
+        self.assertEqual(scrape_url(URL + "?utm_source=feed"), "Fresh text")
+        self.assertEqual(len(self.requests), 1)
+
+    def test_stale_page_is_revalidated_with_a_conditional_get(self):
+        last_modified = "Mon, 05 Oct 2026 10:00:00 GMT"
+        self.responses = [
+            response(200, "Old text", {"ETag": '"v1"', "Last-Modified": last_modified}),
+            response(304),
+        ]
+        scrape_url(URL)
+        self.expire()
+
+        self.assertEqual(scrape_url(URL), "Old text")
+        self.assertEqual(self.requests[1].get("If-None-Match"), '"v1"')
+        self.assertEqual(self.requests[1].get("If-Modified-Since"), last_modified)
+        self.cache.ttl = 60
+        self.assertTrue(self.cache.get(URL)["fresh"])
+
+    def test_changed_page_replaces_the_entry(self):
+        self.responses = [response(200, "Old text", {"ETag": '"v1"'}), response(200, "New text", {"ETag": '"v2"'})]
+        scrape_url(URL)
+        self.expire()
+
+        self.assertEqual(scrape_url(URL), "New text")
+        self.assertEqual((self.cache.get(URL)["text"], self.cache.get(URL)["etag"]), ("New text", '"v2"'))
+
+    def test_error_responses_are_not_cached(self):
+        self.responses = [response(503, "Down for maintenance"), response(200, "Back")]
+        scrape_url(URL)
+        self.assertIsNone(self.cache.get(URL))
+        self.assertEqual(scrape_url(URL), "Back")
+
+    def test_stale_text_is_served_when_the_site_is_unreachable(self):
+        self.responses = [response(200, "Old text"), requests.ConnectionError("unreachable")]
+        scrape_url(URL)
+        self.expire()
+
+        self.assertEqual(scrape_url(URL), "Old text")
@@ -0,0 +1,107 @@
+# autopublish/tests/test_publisher.py
+
+import json
+import threading
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from autopublish import publisher
+from autopublish.publisher import publish_article
+
+DATA = {"title": "Shoes", "body_markdown": "## Fit"}
+POSTS_URL = "https://wp.example/wp-json/wp/v2/posts"
+
+
+def response(status, payload):
+    r = requests.Response()
+    r.status_code = status
+    r._content = json.dumps(payload).encode("utf-8")
+    r.headers["Content-Type"] = "application/json"
+    return r
+
+
+class PublishArticleTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+        self.create_status = 201
+        self.image = (77, {"image_fetch": 5}, {"reused": False})
+        self.image_ready = threading.Event()
+        self.image_ready.set()
+        self.attached = threading.Event()
+        self.attach_media = mock.Mock(side_effect=lambda *args: self.attached.set())
+        self.discard_media = mock.Mock()
+        for patcher in (
+            mock.patch.multiple(publisher, WP_SITE_URL="https://wp.example", WP_USERNAME="u", WP_APP_PASSWORD="p"),
+            mock.patch.object(publisher, "acquire_featured_image", self.acquire_featured_image),
+            mock.patch.object(publisher, "attach_media", self.attach_media),
+            mock.patch.object(publisher, "discard_media", self.discard_media),
+            mock.patch("requests.Session.request", self.wordpress),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.image_ready.set)
+
+    def acquire_featured_image(self, title, slug):
+        self.image_ready.wait(5)
+        if isinstance(self.image, Exception):
+            raise self.image
+        return self.image
+
+    def wordpress(self, method, url, **kwargs):
+        self.calls.append((url, kwargs.get("json")))
+        if url == POSTS_URL and self.create_status != 201:
+            return response(self.create_status, {"code": "rest_cannot_create"})
+        return response(201, {"id": 9, "link": "https://wp.example/shoes"})
+
+    def publish(self):
+        return publish_article(DATA, "<h2>Fit</h2>", "shoes")
+
+    def test_ready_image_goes_into_the_create_request(self):
+        result = self.publish()
+
+        self.assertTrue(result["ok"])
+        self.assertEqual((result["post"]["id"], result["featured_id"]), (9, 77))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.calls[0][1]["featured_media"], 77)
+        self.assertTrue(self.attached.wait(5))
+        self.attach_media.assert_called_once_with(77, 9, "https://wp.example", "u", "p")
+
+    def test_slow_image_is_set_after_the_post_is_created(self):
+        self.image_ready.clear()
+        with mock.patch.object(publisher, "PUBLISH_IMAGE_GRACE", 0.05):
+            timer = threading.Timer(0.2, self.image_ready.set)
+            timer.start()
+            result = self.publish()
+
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["featured_id"], 77)
+        self.assertNotIn("featured_media", self.calls[0][1])
+        self.assertEqual(self.calls[1], (f"{POSTS_URL}/9", {"featured_media": 77}))
+        self.assertIn("featured_update", result["timings"])
+
+    def test_failed_post_discards_the_uploaded_image(self):
+        self.create_status = 500
+        result = self.publish()
+
+        self.assertFalse(result["ok"])
+        self.assertIn("rest_cannot_create", result["error"])
+        self.discard_media.assert_called_once_with(77, "https://wp.example", "u", "p")
+        self.attach_media.assert_not_called()
+
+    def test_failed_post_keeps_a_reused_image(self):
+        self.create_status = 500
+        self.image = (77, {}, {"reused": True})
+        self.assertFalse(self.publish()["ok"])
+        self.discard_media.assert_not_called()
+
+    def test_failed_image_publishes_without_one(self):
+        self.image = ConnectionError("pexels down")
+        with self.assertLogs("autopublish.publisher", "WARNING"):
+            result = self.publish()
+
+        self.assertTrue(result["ok"])
+        self.assertIsNone(result["featured_id"])
+        self.assertIn("pexels down", result["image"]["error"])
+        self.assertNotIn("featured_media", self.calls[0][1])
@@ -0,0 +1,51 @@
+# autopublish/tests/test_quota.py
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from autopublish.models import PublishedPost, UserProfile
+
+
+class DailyQuotaTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+        self.profile = UserProfile.objects.create(user=self.user, daily_post_limit=2)
+
+    def yesterday(self, used):
+        UserProfile.objects.filter(pk=self.profile.pk).update(
+            quota_date=timezone.localdate() - timedelta(days=1), quota_used=used
+        )
+        self.profile.refresh_from_db()
+
+    def test_counter_starts_over_on_a_new_day(self):
+        self.yesterday(used=2)
+        self.assertEqual((self.profile.posts_used_today(), self.profile.remaining_today()), (0, 2))
+
+        self.profile.record_post()
+        self.assertEqual((self.profile.quota_date, self.profile.quota_used), (timezone.localdate(), 1))
+        self.profile.record_post()
+        self.assertEqual(self.profile.remaining_today(), 0)
+
+    def test_reserve_stops_at_the_limit_and_release_gives_back(self):
+        self.yesterday(used=2)
+        self.assertTrue(self.profile.reserve_post())
+        self.assertTrue(self.profile.reserve_post())
+        self.assertFalse(self.profile.reserve_post())
+        self.assertEqual(self.profile.quota_used, 2)
+
+        self.profile.release_post()
+        self.assertEqual(self.profile.remaining_today(), 1)
+        self.assertTrue(self.profile.reserve_post())
+
+    def test_recount_rebuilds_the_counter_from_todays_posts(self):
+        for i in range(3):
+            PublishedPost.objects.create(user=self.user, wp_post_id=i, wp_link=f"https://example.com/{i}", title="t")
+        PublishedPost.objects.filter(wp_post_id=0).update(created_at=timezone.now() - timedelta(days=2))
+        self.profile.record_post()
+
+        self.profile.recount_today()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.posts_used_today(), 2)
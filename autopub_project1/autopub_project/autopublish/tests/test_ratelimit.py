@@ -0,0 +1,82 @@
+# autopublish/tests/test_ratelimit.py
+
+import time
+from unittest import mock
+
+from django.test import TestCase
+
+from autopublish import generator, ratelimit
+from autopublish.generator import GenerationError, stream_text
+from autopublish.models import RateLimitBucket
+from autopublish.ratelimit import Limit, RateLimited, acquire, backoff, parse_limits
+
+
+class ParseLimitsTests(TestCase):
+    def test_parses_rate_period_and_burst(self):
+        limits = parse_limits("serpapi=1/s:5, pexels=200/h, x=30/15m")
+        self.assertEqual((limits["serpapi"].rate, limits["serpapi"].burst), (1.0, 5.0))
+        self.assertAlmostEqual(limits["pexels"].rate, 200 / 3600)
+        self.assertEqual(limits["pexels"].burst, 1.0)
+        self.assertAlmostEqual(limits["x"].rate, 30 / 900)
+
+    def test_rejects_bad_spec(self):
+        with self.assertRaises(ValueError):
+            parse_limits("serpapi=fast")
+
+
+class AcquireTests(TestCase):
+    def test_burst_passes_then_calls_are_spaced(self):
+        limit = Limit(rate=2, burst=2)
+        self.assertEqual(acquire("test", limit=limit), 0.0)
+        self.assertEqual(acquire("test", limit=limit), 0.0)
+
+        start = time.monotonic()
+        waited = acquire("test", limit=limit)
+        self.assertGreater(waited, 0.0)
+        self.assertLessEqual(waited, 0.5)
+        self.assertGreaterEqual(time.monotonic() - start, waited)
+        self.assertEqual(RateLimitBucket.objects.get(name="test").granted, 3)
+
+    def test_wait_beyond_max_wait_reserves_nothing(self):
+        limit = Limit(rate=1, burst=1)
+        acquire("test", limit=limit)
+        tat = RateLimitBucket.objects.get(name="test").tat
+
+        with self.assertRaises(RateLimited) as caught:
+            acquire("test", limit=limit, max_wait=0.1)
+        self.assertEqual(caught.exception.name, "test")
+
+        bucket = RateLimitBucket.objects.get(name="test")
+        self.assertEqual((bucket.tat, bucket.granted, bucket.rejected), (tat, 1, 1))
+
+    def test_unconfigured_name_passes_through(self):
+        self.assertEqual(acquire("no-such-limit"), 0.0)
+        self.assertFalse(RateLimitBucket.objects.filter(name="no-such-limit").exists())
+
+    def test_backoff_holds_every_caller_back(self):
+        acquire("serpapi")
+        backoff("serpapi", retry_after=30)
+        with self.assertRaises(RateLimited) as caught:
+            acquire("serpapi", max_wait=1)
+        self.assertGreater(caught.exception.wait, 25)
+
+
+class StreamQuotaTests(TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(generator, "USE_FAKE_LLM", True),
+            mock.patch.dict(ratelimit.LIMITS, {"fake": Limit(rate=1 / 3600, burst=1)}),
+            mock.patch("autopublish.generator.stream_content_fake", lambda prompt: iter(["chunk"])),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_streaming_takes_a_quota_slot(self):
+        self.assertEqual(list(stream_text("prompt")), ["chunk"])
+        self.assertEqual(RateLimitBucket.objects.get(name="fake").granted, 1)
+
+    def test_out_of_quota_fails_before_calling_the_provider(self):
+        list(stream_text("prompt"))
+        with self.assertRaisesMessage(GenerationError, "fake"):
+            next(stream_text("prompt"))
+        self.assertEqual(RateLimitBucket.objects.get(name="fake").rejected, 1)
@@ -0,0 +1,58 @@
+# autopublish/tests/test_rendering.py
+
+from django.test import SimpleTestCase
+from markdown2 import markdown
+
+from autopublish.rendering import SAFE_MODE, render_markdown, section_cache, split_sections
+
+DRAFT = """# Best running shoes
+
+Intro with **bold** text.
+
+## Road shoes
+
+- light
+- cushioned
+
+## Trail shoes
+
+| Model | Price |
+|---|---|
+| A | $100 |
+
+Closing paragraph.
+"""
+
+
+class RenderMarkdownTests(SimpleTestCase):
+    def setUp(self):
+        section_cache.clear()
+
+    def test_matches_whole_document_render(self):
+        self.assertEqual(render_markdown(DRAFT), markdown(DRAFT, safe_mode=SAFE_MODE))
+
+    def test_splits_before_each_h2(self):
+        sections = split_sections(DRAFT)
+        self.assertEqual(len(sections), 3)
+        self.assertTrue(sections[1].startswith("## Road shoes"))
+
+    def test_link_definitions_keep_the_document_whole(self):
+        text = "Intro [shop][1]\n\n## Section\n\nMore.\n\n[1]: https://example.com\n"
+        self.assertEqual(split_sections(text), [text])
+        self.assertEqual(render_markdown(text), markdown(text, safe_mode=SAFE_MODE))
+
+    def test_rerender_only_misses_changed_sections(self):
+        render_markdown(DRAFT)
+        self.assertEqual(section_cache.stats()["misses"], 3)
+
+        render_markdown(DRAFT.replace("cushioned", "stiff"))
+        stats = section_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 4))
+
+    def test_growing_tail_is_not_cached(self):
+        render_markdown(DRAFT, cache_tail=False)
+        self.assertEqual(section_cache.stats()["entries"], 2)
+
+    def test_raw_html_is_escaped(self):
+        html = render_markdown("## Hi\n\n<script>alert(1)</script>\n")
+        self.assertNotIn("<script>", html)
@@ -0,0 +1,113 @@
+# autopublish/tests/test_router.py
+
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TransactionTestCase
+
+from autopublish.jobs import claim_next_job, enqueue_generation, run_job
+from autopublish.router import Provider, ProviderRouter
+
+
+def answer(text, delay=0.0):
+    def call(prompt):
+        time.sleep(delay)
+        return text
+    return call
+
+
+def fail(prompt):
+    raise RuntimeError("boom")
+
+
+class ProviderRouterTests(SimpleTestCase):
+    # Provider names without a configured rate limit, so acquire_llm() never waits.
+
+    def test_first_healthy_provider_answers(self):
+        router = ProviderRouter([Provider("a", "m1", answer("from a")), Provider("b", "m2", answer("from b"))])
+        text, meta = router.generate("prompt")
+        self.assertEqual(text, "from a")
+        self.assertEqual((meta["provider"], meta["model"], meta["hedged"]), ("a", "m1", False))
+        self.assertEqual(router.health["a"].snapshot()[0][1], True)
+        self.assertEqual(router.health["b"].snapshot(), [])
+
+    def test_fails_over_on_error(self):
+        router = ProviderRouter([Provider("a", "m", fail), Provider("b", "m", answer("from b"))])
+        text, meta = router.generate("prompt")
+        self.assertEqual((text, meta["provider"]), ("from b", "b"))
+        self.assertEqual([a["provider"] for a in meta["attempts"]], ["a", "b"])
+        self.assertEqual([ok for _, ok in router.health["a"].snapshot()], [False])
+
+    def test_error_text_counts_as_failure(self):
+        router = ProviderRouter([Provider("a", "m", answer("Error: quota")), Provider("b", "m", answer("ok"))])
+        self.assertEqual(router.generate("prompt")[0], "ok")
+
+    def test_fails_over_on_timeout_and_records_one_sample(self):
+        router = ProviderRouter(
+            [Provider("slow", "m", answer("late", delay=1.0)), Provider("fast", "m", answer("from fast"))],
+            timeout=0.2,
+        )
+        text, meta = router.generate("prompt")
+        self.assertEqual((text, meta["provider"]), ("from fast", "fast"))
+        # The abandoned call finishes later; it must not add a second sample.
+        time.sleep(1.0)
+        self.assertEqual(router.health["slow"].snapshot(), [(0.2, False)])
+
+    def test_all_providers_failing_returns_last_error(self):
+        router = ProviderRouter([Provider("a", "m", fail), Provider("b", "m", answer("Error: down"))])
+        text, meta = router.generate("prompt")
+        self.assertEqual(text, "Error: down")
+        self.assertIsNone(meta["provider"])
+
+    def test_quota_wait_does_not_count_against_timeout(self):
+        router = ProviderRouter([Provider("a", "m", answer("from a", delay=0.1))], timeout=0.3)
+        with mock.patch("autopublish.router.acquire_llm", side_effect=lambda name, prompt: time.sleep(0.5)):
+            text, meta = router.generate("prompt")
+        self.assertEqual(text, "from a")
+        self.assertGreaterEqual(meta["latency_ms"], 500)
+
+    def test_unhealthy_provider_is_ranked_last(self):
+        router = ProviderRouter([Provider("a", "m", fail), Provider("b", "m", answer("ok"))], max_error_rate=0.5)
+        router.health["a"].record(0.1, False)
+        self.assertEqual([p.name for p in router.ranked()], ["b", "a"])
+
+    def test_hedges_a_slow_provider(self):
+        router = ProviderRouter(
+            [Provider("slow", "m", answer("late", delay=1.0)), Provider("fast", "m", answer("from fast"))],
+            hedge=True,
+            hedge_min_delay=0.1,
+        )
+        for _ in range(5):
+            router.health["slow"].record(0.1, True)
+        text, meta = router.generate("prompt")
+        self.assertEqual((text, meta["provider"], meta["hedged"]), ("from fast", "fast", True))
+        self.assertEqual([a["hedge"] for a in meta["attempts"]], [False, True])
+
+
+class RoutedGenerationTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+        for name, value in (("fetch_competitors", []), ("scrape_competitor_content", "")):
+            patcher = mock.patch(f"autopublish.pipeline.{name}", return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_with(self, router):
+        enqueue_generation(self.user, "running shoes")
+        with mock.patch("autopublish.generator.router", router):
+            return run_job(claim_next_job("w1"))
+
+    def test_job_fails_when_every_provider_fails(self):
+        job = self.run_with(ProviderRouter([Provider("a", "m", fail), Provider("b", "m", answer("Error: down"))]))
+        self.assertEqual((job.status, job.error), ("failed", "down"))
+
+    def test_job_fails_without_providers(self):
+        job = self.run_with(ProviderRouter([]))
+        self.assertEqual(job.status, "failed")
+        self.assertIn("No content generation API configured", job.error)
+
+    def test_job_records_the_answering_provider(self):
+        article = '{"meta_title": "t", "meta_description": "d", "title": "Shoes", "body_markdown": "## Fit"}'
+        job = self.run_with(ProviderRouter([Provider("a", "m", fail), Provider("b", "m-b", answer(article))]))
+        self.assertEqual((job.status, job.provider), ("done", "b"))
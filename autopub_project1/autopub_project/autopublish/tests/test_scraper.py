@@ -0,0 +1,73 @@
+# autopublish/tests/test_scraper.py
+
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from autopublish.scraper import scrape_many
+
+
+class ScrapeManyTests(SimpleTestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        # Let pages left running past a deadline finish once the test is over.
+        self.addCleanup(self.release.set)
+
+    def scrape(self, pages, **kwargs):
+        """Run scrape_many over `pages` ({url: text or callable}) with scrape_url faked."""
+        def scrape_url(url, max_chars=3000):
+            page = pages[url]
+            return page() if callable(page) else page
+
+        with mock.patch("autopublish.scraper.scrape_url", scrape_url):
+            return scrape_many(list(pages), **kwargs)
+
+    def test_results_follow_serp_order(self):
+        def page(text, delay):
+            def fetch():
+                time.sleep(delay)
+                return text
+            return fetch
+
+        pages = {f"https://site{i}.example/": page(f"page {i}", 0.05 * (3 - i)) for i in range(4)}
+        self.assertEqual(self.scrape(pages), ["page 0", "page 1", "page 2", "page 3"])
+
+    def test_pages_unfinished_at_the_deadline_are_dropped(self):
+        pages = {
+            "https://fast.example/": "fast",
+            "https://slow.example/": lambda: self.release.wait(10) and "slow",
+            "https://also-fast.example/": "also fast",
+        }
+        start = time.monotonic()
+        results = self.scrape(pages, deadline=0.2)
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(results, ["fast", None, "also fast"])
+
+    def test_failed_and_empty_pages_are_none(self):
+        def broken():
+            raise ConnectionError("reset")
+
+        pages = {"https://a.example/": "text", "https://b.example/": broken, "https://c.example/": ""}
+        self.assertEqual(self.scrape(pages), ["text", None, None])
+
+    def test_concurrency_is_bounded_per_host(self):
+        lock = threading.Lock()
+        running = {"now": 0, "most": 0}
+
+        def fetch():
+            with lock:
+                running["now"] += 1
+                running["most"] = max(running["most"], running["now"])
+            time.sleep(0.05)
+            with lock:
+                running["now"] -= 1
+            return "text"
+
+        pages = {f"https://same.example/{i}": fetch for i in range(6)}
+        results = self.scrape(pages, max_workers=6, per_host=2)
+
+        self.assertEqual(results, ["text"] * 6)
+        self.assertEqual(running["most"], 2)
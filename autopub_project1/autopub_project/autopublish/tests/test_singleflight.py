@@ -0,0 +1,123 @@
+# autopublish/tests/test_singleflight.py
+
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from autopublish.models import InflightCall
+from autopublish.singleflight import SharedCallError, SharedFlight, SingleFlight
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls, results, waiting = [], [], []
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        def call():
+            results.append(flight.do("k", slow, on_wait=lambda: waiting.append(1)))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        while len(waiting) < 3:
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [("result", False)] + [("result", True)] * 3)
+
+
+class SharedFlightTests(TransactionTestCase):
+    def flight(self, owner, **options):
+        options.setdefault("poll_interval", 0.05)
+        return SharedFlight(owner=owner, **options)
+
+    def run_leader(self, flight, key, fn):
+        out = {}
+
+        def lead():
+            try:
+                out["result"] = flight.do(key, fn)
+            except Exception as e:
+                out["error"] = e
+
+        thread = threading.Thread(target=lead)
+        thread.start()
+        # Wait until the leader holds the key.
+        while not InflightCall.objects.filter(key=key, status="running").exists():
+            time.sleep(0.01)
+        return thread, out
+
+    def test_second_process_waits_for_the_leader(self):
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {"draft": 1}
+
+        thread, out = self.run_leader(self.flight("a"), "k", compute)
+        self.assertEqual(self.flight("b").do("k", compute, on_wait=release.set), ({"draft": 1}, True))
+        thread.join()
+        self.assertEqual(out["result"], ({"draft": 1}, False))
+        self.assertEqual(len(calls), 1)
+
+    def test_leader_failure_reaches_the_waiter(self):
+        release = threading.Event()
+
+        def compute():
+            release.wait(5)
+            raise RuntimeError("provider down")
+
+        thread, out = self.run_leader(self.flight("a"), "k", compute)
+        with self.assertRaises(SharedCallError) as caught:
+            self.flight("b").do("k", lambda: "unused", on_wait=release.set)
+        thread.join()
+        self.assertIn("provider down", str(caught.exception))
+        self.assertIsInstance(out["error"], RuntimeError)
+
+    def test_leader_renews_its_lease_while_running(self):
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            # Outlive the one second lease.
+            time.sleep(1.5)
+            return "done"
+
+        thread, out = self.run_leader(self.flight("a", lease=1, renew_interval=0.2), "k", compute)
+        self.assertEqual(self.flight("b", lease=1).do("k", compute, on_wait=release.set), ("done", True))
+        thread.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_dead_leader_is_replaced(self):
+        now = timezone.now()
+        InflightCall.objects.create(
+            key="k", token=uuid.uuid4(), owner="dead", started_at=now, expires_at=now - timedelta(seconds=1)
+        )
+        self.assertEqual(self.flight("b").do("k", lambda: "fresh"), ("fresh", False))
+
+    def test_claim_prunes_rows_nobody_waits_for(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        for key, status in (("old-done", "done"), ("old-running", "running")):
+            InflightCall.objects.create(
+                key=key, token=uuid.uuid4(), status=status, started_at=long_ago, expires_at=long_ago
+            )
+
+        self.flight("a", result_ttl=60).do("new", lambda: 1)
+        self.assertEqual(list(InflightCall.objects.values_list("key", flat=True)), ["new"])
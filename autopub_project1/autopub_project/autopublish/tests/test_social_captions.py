@@ -0,0 +1,108 @@
+# autopublish/tests/test_social_captions.py
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from autopublish.api_views import _int_ids
+from autopublish.models import PublishedPost, SocialPost
+from autopublish.social_generator import generate_social_captions
+
+BULK_URL = "/api/social/generate/bulk/"
+
+
+class ScriptedLLM:
+    """Stands in for generate_text: answers the batched prompt, then one caption per single-platform prompt."""
+
+    def __init__(self, batched):
+        self.batched = batched
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        if len(self.prompts) == 1:
+            return self.batched
+        return "single caption"
+
+
+class GenerateCaptionsTests(SimpleTestCase):
+    def captions(self, batched, platforms=("instagram", "linkedin")):
+        self.llm = ScriptedLLM(batched)
+        with mock.patch("autopublish.social_generator.generate_text", self.llm):
+            return generate_social_captions(platforms, "Shoes", "shoes", "https://example.com/shoes", "About shoes")
+
+    def test_one_request_covers_every_platform(self):
+        captions = self.captions('```json\n{"instagram": "Insta", "linkedin": "Pro"}\n```')
+        self.assertEqual(captions, {"instagram": "Insta", "linkedin": "Pro"})
+        self.assertEqual(len(self.llm.prompts), 1)
+
+    def test_only_platforms_left_out_are_asked_again(self):
+        captions = self.captions('{"instagram": "Insta", "linkedin": ""}')
+        self.assertEqual(captions, {"instagram": "Insta", "linkedin": "single caption"})
+        self.assertEqual(len(self.llm.prompts), 2)
+        self.assertIn("Write a linkedin post", self.llm.prompts[1])
+
+    def test_failed_request_is_an_error_for_every_platform(self):
+        captions = self.captions("Error: quota exceeded")
+        self.assertEqual(captions, {"instagram": "Error: quota exceeded", "linkedin": "Error: quota exceeded"})
+        self.assertEqual(len(self.llm.prompts), 1)
+
+    def test_answer_without_json_is_an_error_for_every_platform(self):
+        captions = self.captions("Sorry, I cannot help with that.")
+        self.assertEqual(set(captions), {"instagram", "linkedin"})
+        self.assertTrue(all(c.startswith("Error:") for c in captions.values()))
+        self.assertEqual(len(self.llm.prompts), 1)
+
+
+class IntIdsTests(SimpleTestCase):
+    def test_accepts_numbers_and_digit_strings(self):
+        self.assertEqual(_int_ids([1, "2"]), [1, 2])
+
+    def test_rejects_anything_else(self):
+        for values in ([True], [1.5], ["x"], [None], [[1]]):
+            self.assertIsNone(_int_ids(values), values)
+
+
+class BulkCaptionsApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = PublishedPost.objects.create(
+            user=self.user, wp_post_id=1, wp_link="https://example.com/p/1", title="Shoes", keyword="shoes"
+        )
+
+    def test_invalid_platforms_are_rejected(self):
+        for platforms in (5, "instagram", [], [1], ["instagram", None]):
+            response = self.client.post(BULK_URL, {"post_ids": [self.post.id], "platforms": platforms}, format="json")
+            self.assertEqual(response.status_code, 400, platforms)
+            self.assertIn("platforms", response.json()["error"])
+
+    def test_unknown_platform_is_rejected(self):
+        response = self.client.post(BULK_URL, {"post_ids": [self.post.id], "platforms": ["myspace"]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("myspace", response.json()["error"])
+
+    def generate(self, batched, platforms):
+        with mock.patch("autopublish.social_generator.generate_text", ScriptedLLM(batched)):
+            return self.client.post(BULK_URL, {"post_ids": [self.post.id], "platforms": platforms}, format="json")
+
+    def test_creates_one_row_per_platform(self):
+        response = self.generate('{"instagram": "Insta"}', ["instagram", "facebook"])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["errors"], [])
+        self.assertEqual(
+            sorted(SocialPost.objects.values_list("platform", "caption")),
+            [("facebook", "single caption"), ("instagram", "Insta")],
+        )
+
+    def test_failed_generation_is_reported_per_platform(self):
+        response = self.generate("Error: quota exceeded", ["instagram", "facebook"])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            sorted((e["platform"], e["error"]) for e in response.json()["errors"]),
+            [("facebook", "Error: quota exceeded"), ("instagram", "Error: quota exceeded")],
+        )
+        self.assertFalse(SocialPost.objects.exists())
@@ -0,0 +1,126 @@
+# autopublish/tests/test_social_dispatch.py
+
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from autopublish import social_dispatch
+from autopublish.models import PublishedPost, SocialPost
+from autopublish.social_dispatch import (
+    FakeAdapter,
+    PlatformThrottle,
+    claim_due_posts,
+    dispatch_batch,
+    dispatch_post,
+    register_adapter,
+    requeue_stale_posts,
+    run_dispatcher,
+)
+
+
+class DispatcherTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("writer", password="pw")
+        self.post = PublishedPost.objects.create(
+            user=self.user, wp_post_id=1, wp_link="https://example.com/p/1", title="Shoes"
+        )
+        self.adapter = FakeAdapter("instagram", delay=0)
+        register_adapter("instagram", self.adapter)
+        self.addCleanup(social_dispatch._adapters.clear)
+        # No platform rate limit unless a test sets one.
+        patcher = mock.patch.object(social_dispatch, "throttle", PlatformThrottle({}, default_rate=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def social(self, **fields):
+        fields.setdefault("platform", "instagram")
+        return SocialPost.objects.create(user=self.user, published_post=self.post, caption="hi", **fields)
+
+    def test_claims_only_due_posts_once(self):
+        due = self.social()
+        self.social(scheduled_for=timezone.now() + timedelta(hours=1))
+
+        claimed = claim_due_posts("w1")
+        self.assertEqual([p.id for p in claimed], [due.id])
+        self.assertEqual((claimed[0].status, claimed[0].worker), ("dispatching", "w1"))
+        self.assertEqual(claim_due_posts("w2"), [])
+
+    def test_batch_posts_through_the_adapter(self):
+        posts = [self.social() for _ in range(3)]
+        outcome = dispatch_batch(claim_due_posts("w1"), concurrency=2)
+
+        self.assertEqual(outcome, {"posted": 3, "failed": 0, "requeued": 0})
+        self.assertEqual(sorted(self.adapter.published), [p.id for p in posts])
+        for post in SocialPost.objects.all():
+            self.assertEqual(post.status, "posted")
+            self.assertEqual(post.response_message, f"fake:instagram:{post.id}")
+            self.assertIsNotNone(post.posted_at)
+
+    def test_adapter_failure_marks_post_failed(self):
+        register_adapter("instagram", FakeAdapter("instagram", delay=0, fail=True))
+        self.social()
+        post = dispatch_post(claim_due_posts("w1")[0])
+        self.assertEqual(post.status, "failed")
+        self.assertIn("rejected", SocialPost.objects.get(id=post.id).response_message)
+
+    def test_platform_without_adapter_fails(self):
+        self.social(platform="medium")
+        with mock.patch.object(social_dispatch, "USE_FAKE_SOCIAL", False), mock.patch.dict(os.environ):
+            os.environ.pop("SOCIAL_WEBHOOK_MEDIUM", None)
+            post = dispatch_post(claim_due_posts("w1")[0])
+        self.assertEqual(post.status, "failed")
+
+    def test_long_rate_limit_wait_hands_post_back(self):
+        throttle = PlatformThrottle({"instagram": 0.001}, max_wait=1)
+        throttle.wait("instagram")  # uses the one-post burst
+        self.social()
+        with mock.patch.object(social_dispatch, "throttle", throttle):
+            post = dispatch_post(claim_due_posts("w1")[0])
+
+        self.assertEqual(post.status, "scheduled")
+        row = SocialPost.objects.get(id=post.id)
+        self.assertEqual((row.status, row.worker, row.claimed_at), ("scheduled", "", None))
+        self.assertEqual(self.adapter.published, [])
+
+    def test_post_taken_over_is_not_published_twice(self):
+        self.social()
+        stale = claim_due_posts("w1")[0]
+        SocialPost.objects.filter(id=stale.id).update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_posts(older_than=600), 1)
+        current = claim_due_posts("w2")[0]
+
+        self.assertEqual(dispatch_post(stale).status, "scheduled")
+        self.assertEqual(self.adapter.published, [])
+        self.assertEqual(dispatch_post(current).status, "posted")
+        self.assertEqual(self.adapter.published, [current.id])
+
+    def test_run_once_drains_due_posts(self):
+        self.social()
+        self.social()
+        totals = run_dispatcher("w1", once=True)
+        self.assertEqual(totals, {"posted": 2, "failed": 0, "requeued": 0})
+
+    def test_running_dispatcher_picks_up_posts_of_a_dead_one(self):
+        self.social()
+        dead = self.social()
+        SocialPost.objects.filter(id=dead.id).update(status="dispatching", worker="dead")
+
+        calls = []
+
+        def requeue(older_than=None):
+            calls.append(older_than)
+            if len(calls) == 2:
+                # The dead dispatcher's claim goes stale after this one has started.
+                SocialPost.objects.filter(worker="dead").update(claimed_at=timezone.now() - timedelta(hours=1))
+            return requeue_stale_posts(older_than=600)
+
+        with mock.patch.object(social_dispatch, "SOCIAL_REQUEUE_INTERVAL", 0), \
+                mock.patch.object(social_dispatch, "requeue_stale_posts", requeue):
+            totals = run_dispatcher("w1", batch_size=1, once=True)
+
+        self.assertEqual(totals["posted"], 2)
+        self.assertEqual(SocialPost.objects.get(id=dead.id).status, "posted")
@@ -0,0 +1,73 @@
+# autopublish/tests/test_streaming.py
+
+from unittest import mock
+
+from django.test import TestCase
+
+from autopublish import generator
+from autopublish.generator import GenerationError, stream_content_fake, stream_content_openai
+from autopublish.pipeline import partial_markdown, stream_draft
+
+
+def fake_stream(prompt):
+    return stream_content_fake(prompt, delay=0)
+
+
+def broken_stream(prompt):
+    yield '{"title": "Shoes", "body_markdown": "Part one'
+    raise GenerationError("connection reset")
+
+
+class StreamDraftTests(TestCase):
+    def setUp(self):
+        for name, value in (("fetch_competitors", []), ("scrape_competitor_content", "")):
+            patcher = mock.patch(f"autopublish.pipeline.{name}", return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def events(self, stream):
+        with mock.patch("autopublish.generator.stream_text", stream):
+            return list(stream_draft("running shoes"))
+
+    def test_fake_provider_streams_to_a_draft(self):
+        events = self.events(fake_stream)
+        names = [name for name, _ in events]
+        self.assertEqual(names[-1], "done")
+        self.assertIn("competitors", names)
+
+        draft = events[-1][1]
+        self.assertEqual(draft["data"]["title"], "The Complete Guide to running shoes")
+        self.assertIn("<h2>Why running shoes matters</h2>", draft["content_html"])
+
+    def test_error_after_partial_output_fails_the_stream(self):
+        events = self.events(broken_stream)
+        self.assertEqual(events[-1], ("failed", {"error": "connection reset"}))
+        self.assertNotIn("done", [name for name, _ in events])
+
+    def test_no_provider_fails_the_stream(self):
+        with mock.patch.multiple(generator, USE_FAKE_LLM=False, co=None, OPENAI_API_KEY=None):
+            events = list(stream_draft("running shoes"))
+        self.assertEqual(events[-1][0], "failed")
+        self.assertIn("No content generation API configured", events[-1][1]["error"])
+
+
+class OpenAIStreamTests(TestCase):
+    def test_error_mid_stream_is_raised_not_yielded(self):
+        def chunks():
+            yield {"choices": [{"delta": {"content": "Part one"}}]}
+            raise ConnectionError("connection reset")
+
+        with mock.patch("openai.ChatCompletion.create", return_value=chunks()):
+            stream = stream_content_openai("prompt")
+            self.assertEqual(next(stream), "Part one")
+            with self.assertRaisesMessage(GenerationError, "connection reset"):
+                next(stream)
+
+
+class PartialMarkdownTests(TestCase):
+    def test_decodes_the_body_received_so_far(self):
+        raw = '{"title": "Shoes", "body_markdown": "## Fit\\n\\nSnug \\"heel\\" and'
+        self.assertEqual(partial_markdown(raw), '# Shoes\n\n## Fit\n\nSnug "heel" and')
+
+    def test_plain_markdown_is_passed_through(self):
+        self.assertEqual(partial_markdown("## Fit\n\nSnug"), "## Fit\n\nSnug")
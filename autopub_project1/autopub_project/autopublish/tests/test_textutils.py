@@ -0,0 +1,69 @@
+# autopublish/tests/test_textutils.py
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from autopublish.models import PublishedPost
+from autopublish.publisher import save_published_post
+from autopublish.social_generator import article_context
+from autopublish.textutils import key_phrases, markdown_to_text, summarize
+
+ARTICLE = """# Running shoes
+
+## Cushioning
+
+Running shoes with good cushioning protect your knees on long road runs.
+Cushioning wears out after about 500 miles of road running.
+The weather was nice yesterday and we had lunch outside.
+
+## Fit
+
+- A snug heel keeps running shoes stable.
+- Try running shoes on in the afternoon, when feet are largest.
+
+Read the [full sizing guide](https://example.com/sizing) for **more** tips.
+"""
+
+
+class TextUtilsTests(SimpleTestCase):
+    def test_markdown_to_text_keeps_only_prose(self):
+        text = markdown_to_text(ARTICLE)
+        self.assertNotIn("#", text)
+        self.assertNotIn("https://", text)
+        self.assertIn("A snug heel keeps running shoes stable.", text)
+        self.assertIn("Read the full sizing guide for more tips.", text)
+
+    def test_summary_keeps_the_most_central_sentences_in_order(self):
+        text = markdown_to_text(ARTICLE)
+        summary = summarize(ARTICLE, max_sentences=3)
+        sentences = summary.split(". ")
+        self.assertEqual(len(sentences), 3)
+        self.assertNotIn("lunch", summary)
+        positions = [text.index(s.rstrip(".")) for s in sentences]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_short_articles_are_their_own_summary(self):
+        self.assertEqual(summarize("Shoes need a snug heel."), "Shoes need a snug heel.")
+
+    def test_key_phrases_prefer_repeated_phrases(self):
+        phrases = key_phrases(ARTICLE, limit=3)
+        self.assertEqual(phrases[0], "running shoes")
+        self.assertIn("cushioning", phrases)
+        self.assertNotIn("running", phrases)
+
+
+class StoredSummaryTests(TestCase):
+    def test_published_post_keeps_body_summary_and_phrases_for_captions(self):
+        user = User.objects.create_user("writer", password="pw")
+        result = {"post": {"id": 1, "link": "https://example.com/shoes"}, "featured_id": None}
+        post = save_published_post(user, "running shoes", {"title": "Shoes", "body_markdown": ARTICLE}, result)
+
+        post = PublishedPost.objects.get(id=post.id)
+        self.assertEqual(post.body_markdown, ARTICLE)
+        self.assertEqual(post.word_count, len(ARTICLE.split()))
+        context = article_context(post)
+        self.assertTrue(context.startswith(post.summary))
+        self.assertIn("Key phrases: running shoes", context)
+
+        post.summary = ""
+        self.assertEqual(article_context(post), "Shoes")
@@ -0,0 +1,92 @@
+# autopublish/tests/test_tracing.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from autopublish.models import TraceSpan
+from autopublish.tracing import propagate, prune_traces, span, span_stats, start_trace, timed, traced_iter
+
+
+class TraceTests(TestCase):
+    def spans(self):
+        return {s.name: s for s in TraceSpan.objects.all()}
+
+    def test_trace_stores_its_spans_and_total(self):
+        timings = {}
+        with start_trace("generate", "running shoes") as trace:
+            with span("serp", source="cache"):
+                pass
+            with timed(timings, "publish"):
+                pass
+            with self.assertRaises(ValueError), span("write"):
+                raise ValueError("model down")
+            with span("scrape") as s:
+                s["failed"] = True
+
+        spans = self.spans()
+        self.assertEqual(set(spans), {"serp", "publish", "write", "scrape", "total"})
+        self.assertEqual({s.trace_id for s in spans.values()}, {trace.id})
+        self.assertEqual(spans["serp"].meta, {"source": "cache"})
+        self.assertEqual((spans["write"].ok, spans["write"].meta["error"]), (False, "model down"))
+        self.assertFalse(spans["scrape"].ok)
+        self.assertTrue(spans["total"].ok)
+        self.assertIn("publish", timings)
+
+    def test_spans_outside_a_trace_are_not_stored(self):
+        with span("serp"):
+            pass
+        self.assertFalse(TraceSpan.objects.exists())
+
+    def test_pool_threads_join_the_callers_trace(self):
+        def scrape(i):
+            with span("scrape", page=i):
+                return i
+
+        with start_trace("generate"), ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(propagate(scrape), range(3)))
+
+        self.assertEqual(TraceSpan.objects.filter(name="scrape").count(), 3)
+
+    def test_streamed_pipeline_is_traced_until_closed(self):
+        def events():
+            try:
+                with span("serp"):
+                    yield "competitors"
+                with span("write"):
+                    yield "chunk"
+            finally:
+                with span("cleanup"):
+                    pass
+
+        stream = traced_iter("stream", "shoes", events())
+        self.assertEqual(next(stream), "competitors")
+        stream.close()
+
+        self.assertEqual(set(self.spans()), {"serp", "cleanup", "total"})
+
+
+class SpanStatsTests(TestCase):
+    def test_percentiles_and_counts_per_stage(self):
+        TraceSpan.objects.bulk_create(
+            TraceSpan(trace_id="t", kind="generate", name="write", duration_ms=ms, ok=ms % 10 != 0)
+            for ms in range(1, 101)
+        )
+        TraceSpan.objects.create(trace_id="t", kind="publish", name="total", duration_ms=7)
+
+        stats = {(s["kind"], s["name"]): s for s in span_stats()}
+        self.assertEqual(stats[("generate", "write")], {
+            "kind": "generate", "name": "write", "count": 100, "errors": 10, "avg_ms": 50.5,
+            "p50_ms": 51, "p95_ms": 96, "p99_ms": 100,
+        })
+        self.assertEqual(stats[("publish", "total")]["p99_ms"], 7)
+        self.assertEqual([s["kind"] for s in span_stats(kind="publish")], ["publish"])
+
+    def test_old_spans_are_outside_the_window_and_pruned(self):
+        TraceSpan.objects.create(trace_id="t", kind="generate", name="write", duration_ms=5)
+        TraceSpan.objects.update(created_at=timezone.now() - timedelta(days=40))
+
+        self.assertEqual(span_stats(), [])
+        self.assertEqual(prune_traces(older_than=30 * 86400), 1)
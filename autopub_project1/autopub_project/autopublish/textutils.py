@@ -0,0 +1,90 @@
+# autopublish/textutils.py
+
+import re
+from collections import Counter
+from typing import List
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from
+further had has have having he her here hers herself him himself his how i if in into is
+it its itself just me more most my myself no nor not now of off on once only or other our
+ours ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your yours yourself
+yourselves get make use using one also may many much every like
+""".split())
+
+SUMMARY_SENTENCES = 3
+KEY_PHRASES = 8
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+
+def markdown_to_text(markdown: str) -> str:
+    """Drop markdown syntax, headings and list bullets, keeping the prose."""
+    lines = []
+    for line in markdown.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        line = re.sub(r"^([-*+]|\d+\.)\s+", "", line)
+        line = re.sub(r"!?\[([^\]]*)\]\([^)]*\)", r"\1", line)
+        line = re.sub(r"[*_`>]+", "", line)
+        lines.append(line)
+    return " ".join(lines)
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def summarize(markdown: str, max_sentences: int = SUMMARY_SENTENCES) -> str:
+    """
+    Extractive summary: the highest-scoring sentences, in their original
+    order. A sentence scores the average corpus frequency of its content words.
+    """
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(markdown_to_text(markdown)) if len(s.split()) >= 4]
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+
+    freq = Counter(w for w in _words(" ".join(sentences)) if w not in STOPWORDS)
+
+    def score(sentence):
+        words = [w for w in _words(sentence) if w not in STOPWORDS]
+        return sum(freq[w] for w in words) / (len(words) or 1)
+
+    best = sorted(range(len(sentences)), key=lambda i: score(sentences[i]), reverse=True)[:max_sentences]
+    return " ".join(sentences[i] for i in sorted(best))
+
+
+def key_phrases(markdown: str, limit: int = KEY_PHRASES) -> List[str]:
+    """
+    Most frequent one- to three-word phrases, counted within clauses and
+    without stopwords at either end. Multi-word phrases must repeat.
+    """
+    counts = Counter()
+    for clause in re.split(r"[.!?,;:()\n]+", markdown_to_text(markdown)):
+        words = _words(clause)
+        for n in (1, 2, 3):
+            for i in range(len(words) - n + 1):
+                gram = words[i:i + n]
+                if gram[0] in STOPWORDS or gram[-1] in STOPWORDS or any(len(w) < 3 for w in gram):
+                    continue
+                counts[" ".join(gram)] += 1
+
+    # Longer phrases are rarer, so weight them up a little. Ties keep first-seen order.
+    scored = sorted(
+        (phrase for phrase, count in counts.items() if count > 1 or " " not in phrase),
+        key=lambda phrase: -counts[phrase] * (1 + 0.5 * phrase.count(" ")),
+    )
+
+    phrases = []
+    for phrase in scored:
+        if any(phrase in kept or kept in phrase for kept in phrases):
+            continue
+        phrases.append(phrase)
+        if len(phrases) == limit:
+            break
+    return phrases
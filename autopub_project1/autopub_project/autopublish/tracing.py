@@ -0,0 +1,242 @@
+# autopublish/tracing.py
+
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ---------- Settings ---------- #
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_STATS_WINDOW = int(os.getenv("TRACE_STATS_WINDOW", str(7 * 86400)))
+TRACE_RETENTION = int(os.getenv("TRACE_RETENTION", str(30 * 86400)))
+
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("autopublish_trace", default=None)
+
+
+# ---------- Traces and spans ---------- #
+
+class Trace:
+    """Spans recorded for one generation/publish, persisted as TraceSpan rows when it ends."""
+
+    def __init__(self, kind: str, label: str = ""):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.label = label[:255]
+        self.started = time.monotonic()
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, duration_ms: float, ok: bool, meta: Dict) -> None:
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "offset_ms": int((time.monotonic() - self.started) * 1000 - duration_ms),
+                "duration_ms": int(duration_ms),
+                "ok": ok,
+                "meta": meta,
+            })
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **meta):
+    """
+    Time a block as a span of the current trace (a no-op outside one).
+    The yielded dict can be filled with extra metadata (cache hit, status...).
+    An exception marks the span as failed and is re-raised.
+    """
+    trace = _current.get()
+    start = time.monotonic()
+    ok = True
+    try:
+        yield meta
+    except BaseException as e:
+        ok = False
+        meta["error"] = str(e)[:200]
+        raise
+    finally:
+        duration_ms = (time.monotonic() - start) * 1000
+        if trace is not None:
+            trace.add(name, duration_ms, ok and not meta.get("failed"), meta)
+        logger.debug("span name=%s duration_ms=%d ok=%s meta=%s", name, duration_ms, ok, meta)
+
+
+@contextmanager
+def timed(timings: Dict[str, int], name: str, **meta):
+    """span() that also stores its duration in milliseconds under timings[name]."""
+    start = time.monotonic()
+    try:
+        with span(name, **meta) as s:
+            yield s
+    finally:
+        timings[name] = int((time.monotonic() - start) * 1000)
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn: Callable) -> Callable:
+    """Run fn (in a pool thread) inside the caller's context, so its spans join the caller's trace."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+def _finish(trace: Trace, ok: bool) -> None:
+    total_ms = (time.monotonic() - trace.started) * 1000
+    trace.add("total", total_ms, ok, {})
+    logger.info(
+        "trace kind=%s label=%r trace_id=%s spans=%d total_ms=%d ok=%s",
+        trace.kind, trace.label, trace.id, len(trace.spans), total_ms, ok,
+    )
+    if TRACING_ENABLED:
+        save_trace(trace)
+
+
+@contextmanager
+def start_trace(kind: str, label: str = ""):
+    """Collect the spans of everything run inside the block and store them when it exits."""
+    trace = Trace(kind, label)
+    token = _current.set(trace)
+    ok = True
+    try:
+        yield trace
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        _current.reset(token)
+        _finish(trace, ok)
+
+
+def traced_iter(kind: str, label: str, iterator):
+    """
+    Generator wrapper that traces a streamed pipeline (e.g. an SSE response).
+    Every step runs inside one private context holding the trace, so it also
+    works when the server resumes the generator from different threads.
+    """
+    trace = Trace(kind, label)
+    context = contextvars.copy_context()
+    context.run(_current.set, trace)
+    ok = True
+    try:
+        while True:
+            try:
+                item = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        # On an early close (client disconnected) the wrapped generator's own
+        # cleanup must also run inside the trace's context.
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            context.run(close)
+        _finish(trace, ok)
+
+
+# ---------- Storage and aggregates ---------- #
+
+def save_trace(trace: Trace) -> None:
+    from .models import TraceSpan
+
+    try:
+        TraceSpan.objects.bulk_create(
+            TraceSpan(
+                trace_id=trace.id,
+                kind=trace.kind,
+                label=trace.label,
+                name=s["name"],
+                offset_ms=max(s["offset_ms"], 0),
+                duration_ms=s["duration_ms"],
+                ok=s["ok"],
+                meta=s["meta"],
+            )
+            for s in trace.spans
+        )
+    except Exception:
+        logger.exception("Could not store trace %s", trace.id)
+
+
+PERCENTILES = {"p50_ms": 0.50, "p95_ms": 0.95, "p99_ms": 0.99}
+
+
+def span_stats(window: int = TRACE_STATS_WINDOW, kind: Optional[str] = None) -> List[Dict]:
+    """
+    Per (kind, span name): count, error count, avg and p50/p95/p99 duration
+    over the last `window` seconds. Everything is computed by the database
+    (GROUP BY, plus one window-function query per percentile), so no span
+    rows are loaded into Python.
+    """
+    from django.db.models import Avg, Count, F, IntegerField, Q, Window
+    from django.db.models.functions import Cast, Floor, Least, RowNumber
+    from django.utils import timezone
+
+    from .models import TraceSpan
+
+    spans = TraceSpan.objects.filter(created_at__gte=timezone.now() - timedelta(seconds=window))
+    if kind:
+        spans = spans.filter(kind=kind)
+
+    groups = {}
+    totals = spans.values("kind", "name").annotate(
+        count=Count("id"),
+        errors=Count("id", filter=Q(ok=False)),
+        avg=Avg("duration_ms"),
+    )
+    for row in totals.order_by("kind", "name"):
+        groups[(row["kind"], row["name"])] = {
+            "kind": row["kind"],
+            "name": row["name"],
+            "count": row["count"],
+            "errors": row["errors"],
+            "avg_ms": round(row["avg"], 1),
+        }
+
+    group = [F("kind"), F("name")]
+    ranked = spans.annotate(
+        position=Window(RowNumber(), partition_by=group, order_by=F("duration_ms").asc()),
+        size=Window(Count("id"), partition_by=group),
+    )
+    for key, pct in PERCENTILES.items():
+        # 1-based row at index min(floor(size * pct), size - 1) of the sorted durations.
+        target = Least(Cast(Floor(F("size") * pct), IntegerField()), F("size") - 1) + 1
+        for row_kind, name, duration in ranked.filter(position=target).values_list("kind", "name", "duration_ms"):
+            groups[(row_kind, name)][key] = duration
+
+    return list(groups.values())
+
+
+def prune_traces(older_than: int = TRACE_RETENTION) -> int:
+    from django.utils import timezone
+
+    from .models import TraceSpan
+
+    deleted, _ = TraceSpan.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=older_than)).delete()
+    return deleted
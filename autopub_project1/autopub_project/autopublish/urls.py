@@ -6,5 +6,9 @@ urlpatterns = [
     path("dashboard/", views.dashboard, name="dashboard"),
     path("ask/", views.ask_keyword, name="ask_keyword"),
     path("generate/", views.generate_content_view, name="generate_content"),
+    path("generate/live/", views.generate_live, name="generate_live"),
+    path("generate/stream/", views.generate_stream, name="generate_stream"),
+    path("drafts/<uuid:draft_id>/", views.draft_preview, name="draft_preview"),
+    path("jobs/<int:job_id>/status/", views.job_status, name="job_status"),
     path("publish/", views.publish_content, name="publish_content"),
 ]
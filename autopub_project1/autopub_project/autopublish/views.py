@@ -1,104 +1,19 @@
-from django.shortcuts import render, redirect
-from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login as auth_login
-from django.utils import timezone
+from django.utils.html import escape
 
-from bs4 import BeautifulSoup
-from markdown2 import markdown
-from dotenv import load_dotenv
-from newspaper import Article
-
-import os
 import json
-import re
-import requests
-
-from .models import PublishedPost, UserProfile
-from .generator import generate_article
-from .utils import fetch_pexels_image_bytes, upload_image_to_wordpress
-
-# ---------------- ENV ---------------- #
-load_dotenv()
-
-SERPAPI_KEY = os.getenv("SERPAPI_KEY")
-WP_SITE_URL = os.getenv("WP_SITE_URL")
-WP_USERNAME = os.getenv("WP_USERNAME")
-WP_APP_PASSWORD = os.getenv("WP_APP_PASSWORD")
-
-
-# ---------------- COMPETITOR FETCH ---------------- #
-def fetch_competitors(keyword: str):
-    url = "https://serpapi.com/search.json"
-    params = {
-        "engine": "google",
-        "q": keyword,
-        "api_key": SERPAPI_KEY,
-        "hl": "en",
-        "num": 5,
-    }
-
-    try:
-        res = requests.get(url, params=params, timeout=20)
-        if res.status_code != 200:
-            return []
-
-        data = res.json()
-        competitors = []
-
-        for result in data.get("organic_results", []):
-            competitors.append({
-                "title": result.get("title"),
-                "link": result.get("link"),
-                "snippet": result.get("snippet"),
-            })
-
-        return competitors
 
-    except Exception:
-        return []
-
-
-def scrape_competitor_content(competitors, max_articles=10, max_chars=3000):
-    texts = []
-    headers = {"User-Agent": "Mozilla/5.0"}
-
-    for comp in competitors[:max_articles]:
-        url = comp.get("link")
-        if not url:
-            continue
-
-        text = ""
-        try:
-            article = Article(url)
-            article.download()
-            article.parse()
-            text = article.text
-        except:
-            pass
-
-        if not text:
-            try:
-                r = requests.get(url, headers=headers, timeout=15)
-                soup = BeautifulSoup(r.text, "html.parser")
-                text = "\n".join(p.get_text() for p in soup.find_all("p"))
-            except:
-                continue
-
-        if text:
-            texts.append(text[:max_chars])
-
-    return "\n\n".join(texts)
-
-
-# ---------------- CLEAN GPT OUTPUT ---------------- #
-def clean_output(raw):
-    bad_keys = ["meta_title", "meta_description", "title", "body_markdown"]
-    cleaned = "\n".join(
-        l for l in raw.splitlines() if not any(k in l for k in bad_keys)
-    )
-    return re.sub(r"^[\{\}\[\]]+$", "", cleaned).strip()
+from .drafts import get_draft, save_draft
+from .jobs import enqueue_generation
+from .models import GenerationJob, PublishedPost, UserProfile
+from .pagination import keyset_page
+from .pipeline import stream_draft
+from .publisher import publish_article, save_published_post
+from .tracing import start_trace, traced_iter
 
 
 # ---------------- AUTH ---------------- #
@@ -116,20 +31,30 @@ def register(request):
 
 
 # ---------------- DASHBOARD ---------------- #
+DASHBOARD_PAGE_SIZE = 25
+
+
 @login_required
 def dashboard(request):
-    posts = PublishedPost.objects.filter(user=request.user).order_by("-created_at")
+    try:
+        posts, next_cursor = keyset_page(
+            PublishedPost.objects.filter(user=request.user).only("title", "wp_link", "keyword", "created_at"),
+            request.GET.get("cursor"),
+            DASHBOARD_PAGE_SIZE,
+        )
+    except ValueError:
+        return HttpResponse("Invalid cursor", status=400)
     profile, _ = UserProfile.objects.get_or_create(user=request.user)
-
-    today = timezone.now().date()
-    used_today = posts.filter(created_at__date=today).count()
+    used_today = profile.posts_used_today()
 
     return render(
         request,
         "dashboard.html",
         {
             "posts": posts,
+            "next_cursor": next_cursor,
             "profile": profile,
+            "used_today": used_today,
             "remaining": max(profile.daily_post_limit - used_today, 0),
         },
     )
@@ -139,119 +64,148 @@ def dashboard(request):
 @login_required
 def ask_keyword(request):
     if request.method == "POST":
-        request.session["keyword"] = request.POST.get("keyword")
-        return render(request, "loading.html")
+        keyword = (request.POST.get("keyword") or "").strip()
+        if not keyword:
+            return redirect("ask_keyword")
+        force = bool(request.POST.get("force"))
+        if request.POST.get("stream"):
+            request.session["keyword"] = keyword
+            request.session["force"] = force
+            request.session["stream_pending"] = True
+            return redirect("generate_live")
+        job = enqueue_generation(request.user, keyword, force=force)
+        request.session["keyword"] = keyword
+        request.session["job_id"] = job.id
+        return render(request, "loading.html", {"job": job})
     return render(request, "ask_keyword.html")
 
 
+# ---------------- GENERATION JOBS ---------------- #
+@login_required
+def job_status(request, job_id):
+    job = get_object_or_404(GenerationJob, id=job_id, user=request.user)
+    return JsonResponse({
+        "id": job.id,
+        "keyword": job.keyword,
+        "status": job.status,
+        "progress": job.progress,
+        "stage": job.stage,
+        "error": job.error,
+    })
+
+
 # ---------------- GENERATE BLOG ---------------- #
 @login_required
 def generate_content_view(request):
-    keyword = request.session.get("keyword")
-    if not keyword:
+    job_id = request.GET.get("job") or request.session.get("job_id")
+    if not job_id:
         return redirect("ask_keyword")
 
-    competitors = fetch_competitors(keyword)
-    competitors_for_ui = competitors.copy()
-    competitor_content = scrape_competitor_content(competitors)
+    job = get_object_or_404(GenerationJob, id=job_id, user=request.user)
+    if job.status == "failed":
+        return HttpResponse(f"Generation failed: {escape(job.error)}", status=500)
+    if job.status != "done":
+        return render(request, "loading.html", {"job": job})
+    if job.draft_id is None:
+        return HttpResponse("Draft expired, please generate again", status=410)
 
-    raw_output = generate_article(
-        keyword,
-        competitors,
-        competitor_content,
-        900,
-    )
+    return redirect("draft_preview", draft_id=job.draft_id)
 
-    try:
-        data = json.loads(raw_output)
-    except:
-        cleaned = clean_output(raw_output)
-        data = {
-            "meta_title": keyword,
-            "meta_description": f"Guide to {keyword}",
-            "title": f"Complete Guide to {keyword}",
-            "body_markdown": cleaned,
-        }
-
-    content_html = markdown(f"# {data['title']}\n\n{data['body_markdown']}")
-
-    request.session["content_data"] = data
-    request.session["content_html"] = content_html
-    request.session["slug"] = keyword.lower().replace(" ", "-")
 
+@login_required
+def draft_preview(request, draft_id):
+    draft = get_draft(request.user, draft_id)
+    if draft is None:
+        return HttpResponse("Draft not found or expired", status=404)
+
+    # The session only remembers which draft is current, never its content.
+    request.session["keyword"] = draft.keyword
+    request.session["draft_id"] = str(draft.id)
+
+    data = draft.data
     return render(
         request,
         "preview_content.html",
         {
-            "keyword": keyword,
-            "competitors": competitors_for_ui,
+            "draft_id": draft.id,
+            "keyword": draft.keyword,
+            "competitors": draft.content["competitors"],
             "meta_title": data["meta_title"],
             "meta_description": data["meta_description"],
             "title": data["title"],
-            "content": content_html,
+            "content": draft.content_html,
         },
     )
 
 
+# ---------------- STREAMING GENERATION ---------------- #
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@login_required
+def generate_live(request):
+    keyword = request.session.get("keyword")
+    if not keyword:
+        return redirect("ask_keyword")
+    return render(request, "stream_preview.html", {"keyword": keyword})
+
+
+@login_required
+def generate_stream(request):
+    keyword = request.session.get("keyword")
+    if not keyword:
+        return HttpResponse("No keyword", status=400)
+    # Each submitted keyword is streamed once: an EventSource reconnect (or a reload)
+    # must not rerun the paid SERP and LLM calls. 204 tells EventSource to stop retrying.
+    if not request.session.pop("stream_pending", False):
+        return HttpResponse(status=204)
+    force = request.session.pop("force", False)
+
+    def events():
+        try:
+            for event, payload in traced_iter("stream", keyword, stream_draft(keyword, force=force)):
+                if event == "done":
+                    draft = save_draft(request.user, payload)
+                    # The session middleware has already run by now, so save explicitly.
+                    request.session["draft_id"] = str(draft.id)
+                    request.session.save()
+                    payload = {
+                        "draft_id": str(draft.id),
+                        "title": payload["data"]["title"],
+                        "html": payload["content_html"],
+                    }
+                yield _sse(event, payload)
+        except Exception as e:
+            yield _sse("failed", {"error": str(e)})
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 # ---------------- PUBLISH WORDPRESS ---------------- #
 @login_required
 def publish_content(request):
-    data = request.session.get("content_data")
-    html = request.session.get("content_html")
-    slug = request.session.get("slug")
+    draft_id = request.POST.get("draft_id") or request.session.get("draft_id")
+    draft = get_draft(request.user, draft_id) if draft_id else None
 
-    if not data:
+    if draft is None:
         return HttpResponse("No content", status=400)
 
-    auth = (WP_USERNAME, WP_APP_PASSWORD)
-    posts_url = f"{WP_SITE_URL}/wp-json/wp/v2/posts"
+    data = draft.data
+    with start_trace("publish", draft.keyword):
+        result = publish_article(data, draft.content_html, draft.slug)
+        if not result["ok"]:
+            return HttpResponse(result["error"])
 
-    res = requests.post(
-        posts_url,
-        auth=auth,
-        json={
-            "title": data["title"],
-            "content": html,
-            "status": "publish",
-            "slug": slug,
-        },
-    )
-
-    if res.status_code not in (200, 201):
-        return HttpResponse(res.text)
-
-    post = res.json()
-    post_id = post["id"]
-    post_link = post["link"]
-
-    featured_id = None
-    img = fetch_pexels_image_bytes(data["title"])
-    if img:
-        featured_id = upload_image_to_wordpress(
-            img,
-            f"{slug}.jpg",
-            WP_SITE_URL,
-            WP_USERNAME,
-            WP_APP_PASSWORD,
-            post_id,
-        )
+        published = save_published_post(request.user, draft.keyword, data, result)
+    post_link = published.wp_link
 
-    if featured_id:
-        requests.post(
-            f"{WP_SITE_URL}/wp-json/wp/v2/posts/{post_id}",
-            auth=auth,
-            json={"featured_media": featured_id},
-        )
-
-    PublishedPost.objects.create(
-        user=request.user,
-        wp_post_id=post_id,
-        wp_link=post_link,
-        title=data["title"],
-        keyword=request.session.get("keyword", ""),
-        image_id=featured_id,
-        word_count=len(data["body_markdown"].split()),
-    )
+    # A published draft cannot be published twice.
+    draft.delete()
+    request.session.pop("draft_id", None)
 
     return render(
         request,
@@ -259,5 +213,7 @@ def publish_content(request):
         {
             "success": True,
             "response": post_link,
+            "timings": result["timings"],
+            "image": result["image"],
         },
     )